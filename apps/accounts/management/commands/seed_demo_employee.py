@@ -6,7 +6,8 @@ from django.utils import timezone
 
 from apps.accounts.models import Department, Role, User
 from apps.attendance.models import AttendanceMark, WorkCalendarDay
-from apps.bpm.models import ProcessInstance, ProcessTemplate, StepInstance, StepTemplate
+from apps.bpm.models import ProcessInstance, ProcessTemplate, StepTemplate
+from apps.bpm.services import start_processes
 from apps.kb.models import KBArticle, KBCategory, KBViewLog
 from apps.tasks.models import Board, Column, Task
 
@@ -153,6 +154,7 @@ class Command(BaseCommand):
         )
         step_1, _ = StepTemplate.objects.get_or_create(
             process_template=template,
+            version__isnull=True,
             order=1,
             defaults={
                 "name": "Подготовка заявки",
@@ -162,6 +164,7 @@ class Command(BaseCommand):
         )
         step_2, _ = StepTemplate.objects.get_or_create(
             process_template=template,
+            version__isnull=True,
             order=2,
             defaults={
                 "name": "Согласование руководителем",
@@ -170,33 +173,17 @@ class Command(BaseCommand):
             },
         )
 
-        process, _ = ProcessInstance.objects.get_or_create(
+        if not ProcessInstance.objects.filter(
             template=template,
             created_by=employee_user,
             status=ProcessInstance.Status.IN_PROGRESS,
-        )
-        StepInstance.objects.update_or_create(
-            process_instance=process,
-            step_template=step_1,
-            defaults={
-                "status": StepInstance.Status.IN_PROGRESS,
-                "responsible_user": employee_user,
-                "started_at": timezone.now(),
-                "finished_at": None,
-                "comment": "",
-            },
-        )
-        StepInstance.objects.update_or_create(
-            process_instance=process,
-            step_template=step_2,
-            defaults={
-                "status": StepInstance.Status.PENDING,
-                "responsible_user": teamlead_user,
-                "started_at": None,
-                "finished_at": None,
-                "comment": "",
-            },
-        )
+        ).exists():
+            start_processes(
+                template,
+                created_by=employee_user,
+                subject_ids=[employee_user.id],
+                responsible_by_step={step_1.id: employee_user.id, step_2.id: teamlead_user.id},
+            )
 
         for delta in range(0, 5):
             day = today - timedelta(days=delta)
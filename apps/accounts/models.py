@@ -234,17 +234,26 @@ class User(AbstractUser):
         return self.role.name == Role.Name.TEAMLEAD
 
     def save(self, *args, **kwargs):
-        previous_role_name = None
+        previous = None
         if self.pk:
-            previous_role_name = (
+            previous = (
                 type(self)
                 .objects.filter(pk=self.pk)
-                .values_list("role__name", flat=True)
+                .values_list("role__name", "role_id", "department_id")
                 .first()
             )
+        previous_role_name = previous[0] if previous else None
 
         super().save(*args, **kwargs)
 
+        # Payroll summaries group records by the user's current department and
+        # exclude interns, so both buckets are rebuilt when either changes.
+        if previous and previous[1:] != (self.role_id, self.department_id):
+            # apps.payroll.models imports this module.
+            from apps.payroll.models import PayrollMonthSummary
+
+            PayrollMonthSummary.refresh_for_user_change(self.pk, {previous[2], self.department_id})
+
         # If a teamlead is demoted to another role, clear manager for their team.
         if previous_role_name == Role.Name.TEAMLEAD and (
             not self.role_id or self.role.name != Role.Name.TEAMLEAD
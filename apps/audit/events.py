@@ -67,6 +67,7 @@ class AuditEvents:
     TASK_CREATED = "task_created"
     TASK_UPDATED = "task_updated"
     TASK_MOVED = "task_moved"
+    TASK_WEEKLY_PLAN_REMINDERS_GENERATED = "task_weekly_plan_reminders_generated"
 
     # Regulations
     REGULATION_CREATED = "regulation_created"
@@ -90,4 +91,5 @@ class AuditEvents:
     # Payroll
     HOURLY_RATE_CHANGED = "hourly_rate_changed"
     PAYROLL_PERIOD_GENERATED = "payroll_period_generated"
+    PAYROLL_RUN_STARTED = "payroll_run_started"
     PAYROLL_PERIOD_STATUS_CHANGED = "payroll_period_status_changed"
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from apps.bpm.services import detect_breaches
+
+
+class Command(BaseCommand):
+    help = "Marks in-progress BPM steps past their SLA deadline and notifies the responsible users and their managers."
+
+    def handle(self, *args, **options):
+        result = detect_breaches()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"bpm_sla_breaches: checked_at={result.checked_at.isoformat()} "
+                f"breached={result.breached} notified={result.notified}"
+            )
+        )
@@ -0,0 +1,56 @@
+# Generated by Django 4.2.30 on 2026-10-19 10:18
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def forwards(apps, schema_editor):
+    ProcessInstance = apps.get_model("bpm", "ProcessInstance")
+    ProcessParticipant = apps.get_model("bpm", "ProcessParticipant")
+    StepInstance = apps.get_model("bpm", "StepInstance")
+    rows = {}
+    for instance_id, user_id in ProcessInstance.objects.values_list("id", "created_by_id").iterator():
+        rows[(instance_id, user_id, "creator")] = False
+    steps = StepInstance.objects.filter(responsible_user_id__isnull=False).values_list(
+        "process_instance_id", "responsible_user_id", "status"
+    )
+    for instance_id, user_id, status in steps.iterator():
+        key = (instance_id, user_id, "responsible")
+        rows[key] = rows.get(key, False) or status == "in_progress"
+    ProcessParticipant.objects.bulk_create(
+        [
+            ProcessParticipant(instance_id=instance_id, user_id=user_id, role=role, has_active_step=active)
+            for (instance_id, user_id, role), active in rows.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('bpm', '0002_alter_steptemplate_role_responsible'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProcessParticipant',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('role', models.CharField(choices=[('creator', 'Creator'), ('responsible', 'Responsible')], max_length=20)),
+                ('has_active_step', models.BooleanField(default=False)),
+                ('instance', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='participants', to='bpm.processinstance')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='process_participations', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'instance'], name='bpm_participant_user_idx'), models.Index(fields=['user', 'has_active_step'], name='bpm_participant_inbox_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='processparticipant',
+            constraint=models.UniqueConstraint(fields=('instance', 'user', 'role'), name='bpm_participant_unique'),
+        ),
+        migrations.RunPython(forwards, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 4.2.30 on 2026-10-19 10:21
+
+from datetime import timedelta
+
+from django.db import migrations, models
+
+
+def forwards(apps, schema_editor):
+    # Running steps get a plain clock deadline; the breach detector picks up
+    # the ones already past it on its first run.
+    StepInstance = apps.get_model("bpm", "StepInstance")
+    steps = StepInstance.objects.filter(
+        status="in_progress",
+        started_at__isnull=False,
+        step_template__sla_hours__isnull=False,
+    ).select_related("step_template")
+    batch = []
+    for step in steps.iterator():
+        step.due_at = step.started_at + timedelta(hours=step.step_template.sla_hours)
+        batch.append(step)
+    StepInstance.objects.bulk_update(batch, ["due_at"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bpm', '0003_processparticipant'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stepinstance',
+            name='breached_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='stepinstance',
+            name='due_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='stepinstance',
+            index=models.Index(fields=['status', 'due_at'], name='bpm_step_sla_idx'),
+        ),
+        migrations.RunPython(forwards, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,84 @@
+# Generated by Django 4.2.30 on 2026-10-19 10:26
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+STEP_FIELDS = ("name", "order", "role_responsible", "requires_comment", "sla_hours")
+
+
+def forwards(apps, schema_editor):
+    # Existing instances are pinned to a version 1 frozen from today's steps;
+    # the original step rows stay editable drafts with unchanged ids.
+    ProcessInstance = apps.get_model("bpm", "ProcessInstance")
+    ProcessTemplate = apps.get_model("bpm", "ProcessTemplate")
+    ProcessTemplateVersion = apps.get_model("bpm", "ProcessTemplateVersion")
+    StepInstance = apps.get_model("bpm", "StepInstance")
+    StepTemplate = apps.get_model("bpm", "StepTemplate")
+    for template in ProcessTemplate.objects.filter(instances__isnull=False).distinct():
+        version = ProcessTemplateVersion.objects.create(template=template, number=1)
+        for draft in StepTemplate.objects.filter(process_template=template, version__isnull=True):
+            frozen = StepTemplate.objects.create(
+                process_template=template,
+                version=version,
+                **{field: getattr(draft, field) for field in STEP_FIELDS},
+            )
+            StepInstance.objects.filter(step_template=draft).update(step_template=frozen)
+        ProcessInstance.objects.filter(template=template).update(template_version=version)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('bpm', '0004_stepinstance_sla'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProcessTemplateVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.PositiveIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='published_process_versions', to=settings.AUTH_USER_MODEL)),
+                ('template', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='versions', to='bpm.processtemplate')),
+            ],
+            options={
+                'ordering': ['template', '-number'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='processtemplateversion',
+            constraint=models.UniqueConstraint(fields=('template', 'number'), name='bpm_template_version_unique'),
+        ),
+        migrations.AddField(
+            model_name='steptemplate',
+            name='version',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='steps', to='bpm.processtemplateversion'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='steptemplate',
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name='steptemplate',
+            constraint=models.UniqueConstraint(condition=models.Q(('version__isnull', True)), fields=('process_template', 'order'), name='bpm_steptemplate_draft_order'),
+        ),
+        migrations.AddConstraint(
+            model_name='steptemplate',
+            constraint=models.UniqueConstraint(fields=('version', 'order'), name='bpm_steptemplate_version_order'),
+        ),
+        migrations.AddField(
+            model_name='processinstance',
+            name='template_version',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='instances', to='bpm.processtemplateversion'),
+        ),
+        migrations.AddField(
+            model_name='processinstance',
+            name='subject_user',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='subject_process_instances', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(forwards, migrations.RunPython.noop),
+    ]
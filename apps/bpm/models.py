@@ -16,12 +16,52 @@ class ProcessTemplate(models.Model):
         return self.name
 
 
+class ProcessTemplateVersion(models.Model):
+    """
+    An immutable snapshot of a template's steps. Instances are pinned to the
+    version they were started from, so editing the template (its draft
+    steps) never changes running processes.
+    """
+
+    template = models.ForeignKey(
+        ProcessTemplate,
+        on_delete=models.CASCADE,
+        related_name="versions",
+    )
+    number = models.PositiveIntegerField()
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="published_process_versions",
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["template", "-number"]
+        constraints = [
+            models.UniqueConstraint(fields=["template", "number"], name="bpm_template_version_unique"),
+        ]
+
+    def __str__(self):
+        return f"{self.template_id}:v{self.number}"
+
+
 class StepTemplate(models.Model):
     process_template = models.ForeignKey(
         ProcessTemplate,
         on_delete=models.CASCADE,
         related_name="steps",
     )
+    # Null for the editable draft steps; set on the frozen copies of a version.
+    version = models.ForeignKey(
+        ProcessTemplateVersion,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="steps",
+    )
     name = models.CharField(max_length=255)
     order = models.PositiveIntegerField(default=1)
     role_responsible = models.CharField(max_length=32, choices=Role.Name.choices)
@@ -30,7 +70,14 @@ class StepTemplate(models.Model):
 
     class Meta:
         ordering = ["order", "id"]
-        unique_together = ("process_template", "order")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["process_template", "order"],
+                condition=models.Q(version__isnull=True),
+                name="bpm_steptemplate_draft_order",
+            ),
+            models.UniqueConstraint(fields=["version", "order"], name="bpm_steptemplate_version_order"),
+        ]
 
     def __str__(self):
         return f"{self.process_template_id}:{self.name}"
@@ -48,6 +95,20 @@ class ProcessInstance(models.Model):
         on_delete=models.PROTECT,
         related_name="instances",
     )
+    template_version = models.ForeignKey(
+        ProcessTemplateVersion,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name="instances",
+    )
+    subject_user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="subject_process_instances",
+    )
     created_by = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.PROTECT,
@@ -86,6 +147,10 @@ class StepInstance(models.Model):
         related_name="step_instances_responsible",
     )
     started_at = models.DateTimeField(null=True, blank=True)
+    # Set when the step starts and its template has an SLA (services.sla_due_at).
+    due_at = models.DateTimeField(null=True, blank=True)
+    # Set by the breach detector once the overdue step has been escalated.
+    breached_at = models.DateTimeField(null=True, blank=True)
     finished_at = models.DateTimeField(null=True, blank=True)
     comment = models.TextField(blank=True)
 
@@ -94,4 +159,39 @@ class StepInstance(models.Model):
         indexes = [
             models.Index(fields=["status"]),
             models.Index(fields=["responsible_user", "status"]),
+            models.Index(fields=["status", "due_at"], name="bpm_step_sla_idx"),
+        ]
+
+
+class ProcessParticipant(models.Model):
+    """
+    Who takes part in a process instance and how; rebuilt from the instance
+    and its steps by ``services.sync_participants`` whenever they change.
+    Visibility, inbox and access checks read this table only.
+    """
+
+    class InstanceRole(models.TextChoices):
+        CREATOR = "creator", "Creator"
+        RESPONSIBLE = "responsible", "Responsible"
+
+    instance = models.ForeignKey(
+        ProcessInstance,
+        on_delete=models.CASCADE,
+        related_name="participants",
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="process_participations",
+    )
+    role = models.CharField(max_length=20, choices=InstanceRole.choices)
+    has_active_step = models.BooleanField(default=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["instance", "user", "role"], name="bpm_participant_unique"),
+        ]
+        indexes = [
+            models.Index(fields=["user", "instance"], name="bpm_participant_user_idx"),
+            models.Index(fields=["user", "has_active_step"], name="bpm_participant_inbox_idx"),
         ]
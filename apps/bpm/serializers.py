@@ -3,6 +3,9 @@ from rest_framework import serializers
 from .models import ProcessInstance, ProcessTemplate, StepInstance, StepTemplate
 
 
+BULK_START_LIMIT = 200
+
+
 class StepTemplateSerializer(serializers.ModelSerializer):
     class Meta:
         model = StepTemplate
@@ -16,14 +19,31 @@ class StepTemplateSerializer(serializers.ModelSerializer):
             "sla_hours",
         )
 
+    def validate(self, attrs):
+        template = attrs.get("process_template", getattr(self.instance, "process_template", None))
+        order = attrs.get("order", getattr(self.instance, "order", 1))
+        drafts = StepTemplate.objects.filter(process_template=template, order=order, version__isnull=True)
+        if self.instance is not None:
+            drafts = drafts.exclude(pk=self.instance.pk)
+        if drafts.exists():
+            raise serializers.ValidationError({"order": "Another step of this template already has this order."})
+        return attrs
+
 
 class ProcessTemplateSerializer(serializers.ModelSerializer):
-    steps = StepTemplateSerializer(many=True, read_only=True)
+    steps = serializers.SerializerMethodField()
 
     class Meta:
         model = ProcessTemplate
         fields = ("id", "name", "description", "is_active", "steps")
 
+    def get_steps(self, obj):
+        """The editable draft steps; frozen version copies are not shown."""
+        steps = getattr(obj, "draft_steps", None)
+        if steps is None:
+            steps = obj.steps.filter(version__isnull=True)
+        return StepTemplateSerializer(steps, many=True).data
+
 
 class StepInstanceSerializer(serializers.ModelSerializer):
     step_name = serializers.CharField(source="step_template.name", read_only=True)
@@ -41,6 +61,8 @@ class StepInstanceSerializer(serializers.ModelSerializer):
             "responsible_user",
             "responsible_username",
             "started_at",
+            "due_at",
+            "breached_at",
             "finished_at",
             "comment",
         )
@@ -49,6 +71,7 @@ class StepInstanceSerializer(serializers.ModelSerializer):
 class ProcessInstanceSerializer(serializers.ModelSerializer):
     template_name = serializers.CharField(source="template.name", read_only=True)
     created_by_username = serializers.CharField(source="created_by.username", read_only=True)
+    template_version_number = serializers.IntegerField(source="template_version.number", read_only=True, default=None)
     steps = StepInstanceSerializer(many=True, read_only=True)
 
     class Meta:
@@ -57,6 +80,9 @@ class ProcessInstanceSerializer(serializers.ModelSerializer):
             "id",
             "template",
             "template_name",
+            "template_version",
+            "template_version_number",
+            "subject_user",
             "created_by",
             "created_by_username",
             "status",
@@ -67,6 +93,7 @@ class ProcessInstanceSerializer(serializers.ModelSerializer):
 
 class ProcessInstanceCreateSerializer(serializers.Serializer):
     template_id = serializers.IntegerField()
+    subject_user_id = serializers.IntegerField(min_value=1, required=False, allow_null=True, default=None)
     responsible_by_step = serializers.DictField(
         child=serializers.IntegerField(),
         required=False,
@@ -74,5 +101,36 @@ class ProcessInstanceCreateSerializer(serializers.Serializer):
     )
 
 
+class ProcessBulkStartSerializer(serializers.Serializer):
+    template_id = serializers.IntegerField()
+    subject_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        min_length=1,
+        max_length=BULK_START_LIMIT,
+    )
+    responsible_by_step = serializers.DictField(
+        child=serializers.IntegerField(),
+        required=False,
+        default=dict,
+    )
+
+    def validate_subject_ids(self, value):
+        if len(set(value)) != len(value):
+            raise serializers.ValidationError("Subjects must be unique.")
+        return value
+
+
 class StepCompleteSerializer(serializers.Serializer):
     comment = serializers.CharField(required=False, allow_blank=True)
+
+
+class ProcessListQuerySerializer(serializers.Serializer):
+    status = serializers.ChoiceField(choices=ProcessInstance.Status.choices, required=False)
+    responsible = serializers.IntegerField(min_value=1, required=False)
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        if attrs.get("date_from") and attrs.get("date_to") and attrs["date_from"] > attrs["date_to"]:
+            raise serializers.ValidationError({"date_to": "Must not be earlier than date_from."})
+        return attrs
@@ -0,0 +1,313 @@
+"""
+Process participants and step SLAs.
+
+``ProcessParticipant`` holds one row per (instance, user, role in process):
+the creator, and every responsible user of a step, flagged while one of
+their steps is in progress. It is rebuilt for an instance from its steps
+after every change to them, so list, inbox and access queries are single
+indexed lookups instead of OR-joins over steps.
+
+A step whose template has ``sla_hours`` gets ``due_at`` when it starts.
+``detect_breaches`` (``manage.py detect_bpm_sla_breaches``, run every few
+minutes) finds in-progress steps past ``due_at`` that are not yet marked
+with one range scan of the (status, due_at) index, marks them and notifies
+the responsible user and their manager in one ``bulk_create``.
+
+Processes start from an immutable ``ProcessTemplateVersion``:
+``pin_current_version`` freezes the template's draft steps into a new
+version when they changed since the last one, and ``start_processes``
+creates any number of instances from it with one ``bulk_create`` for the
+instances and one for all their steps.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.accounts.access_policy import AccessPolicy
+from apps.accounts.models import User
+from apps.attendance.models import WorkCalendarDay
+from apps.common.models import Notification
+from apps.common.notification_codes import NotificationCode, NotificationEntity
+
+from .models import (
+    ProcessInstance,
+    ProcessParticipant,
+    ProcessTemplate,
+    ProcessTemplateVersion,
+    StepInstance,
+    StepTemplate,
+)
+
+
+STEP_FIELDS = ("name", "order", "role_responsible", "requires_comment", "sla_hours")
+
+
+def participant_rows(creators, steps) -> list[ProcessParticipant]:
+    """
+    ``creators``: (instance_id, created_by_id) pairs; ``steps``:
+    (instance_id, responsible_user_id, status) triples.
+    """
+    rows: dict[tuple[int, int, str], bool] = {}
+    for instance_id, user_id in creators:
+        rows[(instance_id, user_id, ProcessParticipant.InstanceRole.CREATOR)] = False
+    for instance_id, user_id, status in steps:
+        if user_id is None:
+            continue
+        key = (instance_id, user_id, ProcessParticipant.InstanceRole.RESPONSIBLE)
+        rows[key] = rows.get(key, False) or status == StepInstance.Status.IN_PROGRESS
+    return [
+        ProcessParticipant(instance_id=instance_id, user_id=user_id, role=role, has_active_step=active)
+        for (instance_id, user_id, role), active in rows.items()
+    ]
+
+
+@transaction.atomic
+def sync_participants(instance_ids) -> int:
+    """Rebuild the participant rows of the given instances; returns rows written."""
+    instance_ids = list(instance_ids)
+    creators = ProcessInstance.objects.filter(id__in=instance_ids).values_list("id", "created_by_id")
+    steps = StepInstance.objects.filter(process_instance_id__in=instance_ids).values_list(
+        "process_instance_id", "responsible_user_id", "status"
+    )
+    rows = participant_rows(creators, steps)
+    ProcessParticipant.objects.filter(instance_id__in=instance_ids).delete()
+    return len(ProcessParticipant.objects.bulk_create(rows, batch_size=1000))
+
+
+def visible_participations(user):
+    """Participant rows that make an instance visible to ``user``; ``None`` means everything is."""
+    if AccessPolicy.is_admin_like(user):
+        return None
+    condition = Q(user=user)
+    if AccessPolicy.is_teamlead(user):
+        condition |= Q(user__manager=user)
+    return ProcessParticipant.objects.filter(condition)
+
+
+def can_access_instance(user, instance_id: int) -> bool:
+    participations = visible_participations(user)
+    return participations is None or participations.filter(instance_id=instance_id).exists()
+
+
+def sla_due_at(started_at: datetime, sla_hours: int | None) -> datetime | None:
+    """
+    Deadline of a step started at ``started_at``. With
+    ``BPM_SLA_WORKING_CALENDAR`` enabled the SLA clock stops on non-working
+    days (``WorkCalendarDay`` rows, weekends where there is no row).
+    """
+    if not sla_hours:
+        return None
+    remaining = timedelta(hours=sla_hours)
+    if not getattr(settings, "BPM_SLA_WORKING_CALENDAR", False):
+        return started_at + remaining
+
+    cursor = timezone.localtime(started_at)
+    horizon = cursor.date() + timedelta(days=sla_hours // 24 * 3 + 14)
+    working = dict(
+        WorkCalendarDay.objects.filter(date__range=(cursor.date(), horizon)).values_list("date", "is_working_day")
+    )
+    while True:
+        day = cursor.date()
+        next_midnight = timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+        if working.get(day, day.weekday() < 5):
+            if remaining <= next_midnight - cursor:
+                return cursor + remaining
+            remaining -= next_midnight - cursor
+        cursor = next_midnight
+
+
+def start_step(step: StepInstance, now: datetime) -> None:
+    """Move ``step`` (with its ``step_template`` loaded) to in progress; the caller saves it."""
+    step.status = StepInstance.Status.IN_PROGRESS
+    step.started_at = now
+    step.due_at = sla_due_at(now, step.step_template.sla_hours)
+
+
+@dataclass(frozen=True)
+class BreachResult:
+    checked_at: datetime
+    breached: int
+    notified: int
+
+
+def _breach_recipients(step: StepInstance) -> set[int]:
+    user = step.responsible_user
+    if user is None:
+        return {step.process_instance.created_by_id}
+    return {user.id, user.manager_id} - {None}
+
+
+@transaction.atomic
+def detect_breaches(now: datetime | None = None) -> BreachResult:
+    now = now or timezone.now()
+    steps = list(
+        StepInstance.objects.select_for_update(skip_locked=True, of=("self",))
+        .filter(status=StepInstance.Status.IN_PROGRESS, due_at__lte=now, breached_at__isnull=True)
+        .select_related("step_template", "process_instance__template", "responsible_user")
+        .order_by("due_at", "id")
+    )
+    if not steps:
+        return BreachResult(checked_at=now, breached=0, notified=0)
+
+    StepInstance.objects.filter(id__in=[step.id for step in steps]).update(breached_at=now)
+    notifications = []
+    for step in steps:
+        instance = step.process_instance
+        message = (
+            f"Шаг «{step.step_template.name}» процесса «{instance.template.name}» "
+            f"просрочен: срок истёк {timezone.localtime(step.due_at):%d.%m.%Y %H:%M}."
+        )
+        for user_id in _breach_recipients(step):
+            notifications.append(
+                Notification(
+                    user_id=user_id,
+                    title="Нарушен срок шага процесса",
+                    message=message,
+                    type=Notification.Type.SYSTEM,
+                    code=NotificationCode.BPM_STEP_SLA_BREACHED,
+                    severity=Notification.Severity.WARNING,
+                    entity_type=NotificationEntity.BPM_STEP_INSTANCE,
+                    entity_id=str(step.id),
+                    action_url=f"/bpm/{instance.id}",
+                )
+            )
+    Notification.objects.bulk_create(notifications, batch_size=1000)
+    return BreachResult(checked_at=now, breached=len(steps), notified=len(notifications))
+
+
+class UnknownSubjects(Exception):
+    """Some subject or explicitly responsible users do not exist or are inactive."""
+
+    def __init__(self, user_ids):
+        super().__init__(user_ids)
+        self.user_ids = sorted(user_ids)
+
+
+def _definition(steps) -> list[tuple]:
+    return [tuple(getattr(step, field) for field in STEP_FIELDS) for step in steps]
+
+
+@transaction.atomic
+def pin_current_version(template: ProcessTemplate, *, user=None) -> tuple[ProcessTemplateVersion, list[StepTemplate]]:
+    """
+    Latest version of ``template`` and its frozen steps in order. A new
+    version is published first when the draft steps differ from it.
+    """
+    ProcessTemplate.objects.select_for_update().get(pk=template.pk)
+    drafts = list(StepTemplate.objects.filter(process_template=template, version__isnull=True).order_by("order", "id"))
+    latest = template.versions.order_by("-number").first()
+    if latest is not None:
+        frozen = list(latest.steps.order_by("order", "id"))
+        if _definition(frozen) == _definition(drafts):
+            return latest, frozen
+
+    version = ProcessTemplateVersion.objects.create(
+        template=template,
+        number=latest.number + 1 if latest else 1,
+        created_by=user,
+    )
+    frozen = StepTemplate.objects.bulk_create(
+        [
+            StepTemplate(
+                process_template=template,
+                version=version,
+                **{field: getattr(draft, field) for field in STEP_FIELDS},
+            )
+            for draft in drafts
+        ]
+    )
+    return version, frozen
+
+
+def _resolve_responsible(step: StepTemplate, subject, explicit):
+    """Explicit choice first, then the subject or their manager when their role fits the step."""
+    if explicit is not None:
+        return explicit
+    if subject is None:
+        return None
+    if subject.role_id and subject.role.name == step.role_responsible:
+        return subject
+    manager = subject.manager
+    if manager is not None and manager.role_id and manager.role.name == step.role_responsible:
+        return manager
+    return None
+
+
+@transaction.atomic
+def start_processes(
+    template: ProcessTemplate,
+    *,
+    created_by,
+    subject_ids: list[int | None],
+    responsible_by_step: dict | None = None,
+) -> tuple[ProcessTemplateVersion, list[ProcessInstance]]:
+    """
+    One instance per entry of ``subject_ids`` (``None`` for an instance
+    without a subject), pinned to the current version of ``template``.
+    ``responsible_by_step`` maps step template ids (draft or frozen) to users
+    and wins over role-based resolution.
+    """
+    version, steps = pin_current_version(template, user=created_by)
+    responsible_by_step = {
+        int(key): value for key, value in (responsible_by_step or {}).items() if str(key).isdigit()
+    }
+    explicit_by_order = {}
+    if responsible_by_step:
+        orders = StepTemplate.objects.filter(process_template=template, id__in=responsible_by_step).values_list(
+            "id", "order"
+        )
+        explicit_by_order = {order: responsible_by_step[step_id] for step_id, order in orders}
+
+    wanted = {user_id for user_id in subject_ids if user_id} | set(explicit_by_order.values())
+    users = {
+        user.id: user
+        for user in User.objects.filter(id__in=wanted, is_active=True).select_related("role", "manager__role")
+    }
+    missing = wanted - users.keys()
+    if missing:
+        raise UnknownSubjects(missing)
+
+    instances = ProcessInstance.objects.bulk_create(
+        [
+            ProcessInstance(
+                template=template,
+                template_version=version,
+                subject_user_id=subject_id,
+                created_by=created_by,
+                status=ProcessInstance.Status.IN_PROGRESS,
+            )
+            for subject_id in subject_ids
+        ]
+    )
+
+    now = timezone.now()
+    step_rows = []
+    for instance in instances:
+        subject = users.get(instance.subject_user_id)
+        for index, step_t in enumerate(steps):
+            explicit = users.get(explicit_by_order.get(step_t.order))
+            step = StepInstance(
+                process_instance=instance,
+                step_template=step_t,
+                responsible_user=_resolve_responsible(step_t, subject, explicit),
+            )
+            if index == 0:
+                start_step(step, now)
+            step_rows.append(step)
+    StepInstance.objects.bulk_create(step_rows, batch_size=1000)
+
+    ProcessParticipant.objects.bulk_create(
+        participant_rows(
+            [(instance.id, instance.created_by_id) for instance in instances],
+            [(step.process_instance_id, step.responsible_user_id, step.status) for step in step_rows],
+        ),
+        batch_size=1000,
+    )
+    return version, instances
@@ -1,9 +1,17 @@
-from django.test import TestCase
+from datetime import date, datetime, timedelta
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from rest_framework.test import APIClient
 
-from apps.accounts.models import Role, User
+from apps.accounts.models import Permission, Role, User
+from apps.attendance.models import WorkCalendarDay
+from apps.common.models import Notification
 
-from .models import ProcessTemplate, StepTemplate
+from .models import ProcessInstance, ProcessParticipant, ProcessTemplate, StepInstance, StepTemplate
+from .services import detect_breaches, sla_due_at
 
 
 class BpmApiTests(TestCase):
@@ -39,3 +47,198 @@ class BpmApiTests(TestCase):
         self.client.force_authenticate(self.admin)
         response = self.client.get("/api/v1/bpm/admin/templates/")
         self.assertEqual(response.status_code, 200)
+
+    def test_list_and_access_follow_participants(self):
+        teamlead_role, _ = Role.objects.get_or_create(name=Role.Name.TEAMLEAD, defaults={"level": Role.Level.TEAMLEAD})
+        teamlead = User.objects.create_user(username="bpm_lead", password="StrongPass123!", role=teamlead_role)
+        self.employee.manager = teamlead
+        self.employee.save(update_fields=["manager"])
+        outsider = User.objects.create_user(username="bpm_outsider", password="StrongPass123!", role=self.employee_role)
+        StepTemplate.objects.create(
+            process_template=self.template,
+            name="Approve",
+            order=2,
+            role_responsible=Role.Name.EMPLOYEE,
+        )
+
+        self.client.force_authenticate(self.admin)
+        for _ in range(3):
+            response = self.client.post(
+                "/api/v1/bpm/instances/",
+                {"template_id": self.template.id, "responsible_by_step": {str(self.step.id): self.employee.id}},
+                format="json",
+            )
+            self.assertEqual(response.status_code, 201)
+        instance_id = response.data["id"]
+        self.assertEqual(
+            set(ProcessParticipant.objects.filter(instance_id=instance_id).values_list("user_id", "role", "has_active_step")),
+            {(self.admin.id, "creator", False), (self.employee.id, "responsible", True)},
+        )
+
+        self.client.force_authenticate(self.employee)
+        response = self.client.get("/api/v1/bpm/", {"page_size": 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["waiting_my_action"], 3)
+        self.assertEqual(len(response.data["results"]), 2)
+        self.assertIsNotNone(response.data["next"])
+
+        self.client.force_authenticate(teamlead)
+        self.assertEqual(self.client.get(f"/api/v1/bpm/{instance_id}/").status_code, 200)
+        response = self.client.get("/api/v1/bpm/", {"responsible": self.employee.id})
+        self.assertEqual((len(response.data["results"]), response.data["waiting_my_action"]), (3, 0))
+        self.client.force_authenticate(outsider)
+        self.assertEqual(self.client.get(f"/api/v1/bpm/{instance_id}/").status_code, 403)
+        self.assertEqual(self.client.get("/api/v1/bpm/").data["results"], [])
+        self.assertEqual(self.client.get("/api/v1/bpm/", {"status": "bogus"}).status_code, 400)
+
+        step_id = StepInstance.objects.get(process_instance_id=instance_id, step_template__order=1).id
+        self.client.force_authenticate(self.employee)
+        response = self.client.post(f"/api/v1/bpm/steps/{step_id}/complete/", {}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get("/api/v1/bpm/").data["waiting_my_action"], 2)
+
+    def test_sla_deadline_breach_detection_and_dashboard(self):
+        teamlead_role, _ = Role.objects.get_or_create(name=Role.Name.TEAMLEAD, defaults={"level": Role.Level.TEAMLEAD})
+        teamlead = User.objects.create_user(username="bpm_sla_lead", password="StrongPass123!", role=teamlead_role)
+        self.employee.manager = teamlead
+        self.employee.save(update_fields=["manager"])
+        self.step.sla_hours = 4
+        self.step.save(update_fields=["sla_hours"])
+
+        self.client.force_authenticate(self.admin)
+        response = self.client.post(
+            "/api/v1/bpm/instances/",
+            {"template_id": self.template.id, "responsible_by_step": {str(self.step.id): self.employee.id}},
+            format="json",
+        )
+        step = StepInstance.objects.get(id=response.data["steps"][0]["id"])
+        self.assertEqual(step.due_at, step.started_at + timedelta(hours=4))
+
+        self.assertEqual(detect_breaches(now=step.due_at - timedelta(minutes=1)).breached, 0)
+        with self.assertNumQueries(5):  # savepoint, select, update, insert, release
+            result = detect_breaches(now=step.due_at + timedelta(minutes=1))
+        self.assertEqual((result.breached, result.notified), (1, 2))
+        self.assertEqual(
+            set(Notification.objects.filter(code="bpm.step_sla_breached").values_list("user_id", flat=True)),
+            {self.employee.id, teamlead.id},
+        )
+        self.assertEqual(detect_breaches(now=step.due_at + timedelta(hours=1)).breached, 0)
+
+        permission, _ = Permission.objects.get_or_create(
+            codename="bpm.manage_templates",
+            defaults={"module": "bpm", "description": "Manage BPM templates"},
+        )
+        self.admin_role.permissions.add(permission)
+        response = self.client.get("/api/v1/bpm/sla/")
+        self.assertEqual(response.status_code, 200)
+        row = response.data["templates"][0]
+        self.assertEqual((row["template_id"], row["breached_total"], row["in_progress"]), (self.template.id, 1, 1))
+        self.client.force_authenticate(self.employee)
+        self.assertEqual(self.client.get("/api/v1/bpm/sla/").status_code, 403)
+
+    @override_settings(BPM_SLA_WORKING_CALENDAR=True)
+    def test_sla_deadline_skips_non_working_days(self):
+        friday = timezone.make_aware(datetime(2026, 3, 6, 20, 0))
+        WorkCalendarDay.objects.create(date=date(2026, 3, 9), is_working_day=False, is_holiday=True)
+        self.assertEqual(sla_due_at(friday, 8), timezone.make_aware(datetime(2026, 3, 10, 4, 0)))
+        self.assertIsNone(sla_due_at(friday, None))
+
+    def test_instances_are_pinned_to_immutable_template_versions(self):
+        self.client.force_authenticate(self.employee)
+        first = self.client.post("/api/v1/bpm/instances/", {"template_id": self.template.id}, format="json").data
+        again = self.client.post("/api/v1/bpm/instances/", {"template_id": self.template.id}, format="json").data
+        self.assertEqual((first["template_version_number"], again["template_version_number"]), (1, 1))
+
+        self.step.name = "Collect and sign docs"
+        self.step.save(update_fields=["name"])
+        edited = self.client.post("/api/v1/bpm/instances/", {"template_id": self.template.id}, format="json").data
+        self.assertEqual(edited["template_version_number"], 2)
+        self.assertEqual(edited["steps"][0]["step_name"], "Collect and sign docs")
+        self.assertEqual(self.client.get(f"/api/v1/bpm/{first['id']}/").data["steps"][0]["step_name"], "Collect docs")
+        self.assertEqual(StepTemplate.objects.filter(process_template=self.template, version__isnull=True).count(), 1)
+
+    def test_bulk_start_creates_cohort_with_constant_queries(self):
+        teamlead_role, _ = Role.objects.get_or_create(name=Role.Name.TEAMLEAD, defaults={"level": Role.Level.TEAMLEAD})
+        intern_role, _ = Role.objects.get_or_create(name=Role.Name.INTERN, defaults={"level": Role.Level.INTERN})
+        teamlead = User.objects.create_user(username="bpm_cohort_lead", password="StrongPass123!", role=teamlead_role)
+        interns = [
+            User.objects.create_user(
+                username=f"bpm_intern_{idx}",
+                password="StrongPass123!",
+                role=intern_role,
+                manager=teamlead,
+            )
+            for idx in range(7)
+        ]
+        StepTemplate.objects.create(process_template=self.template, name="Mentor", order=2, role_responsible=Role.Name.TEAMLEAD)
+        StepTemplate.objects.create(process_template=self.template, name="Read rules", order=3, role_responsible=Role.Name.INTERN)
+        self.client.force_authenticate(self.admin)
+
+        def bulk_start(subjects):
+            return self.client.post(
+                "/api/v1/bpm/instances/bulk/",
+                {
+                    "template_id": self.template.id,
+                    "subject_ids": [user.id for user in subjects],
+                    "responsible_by_step": {str(self.step.id): self.employee.id},
+                },
+                format="json",
+            )
+
+        bulk_start(interns[:1])
+        with CaptureQueriesContext(connection) as small:
+            self.assertEqual(bulk_start(interns[1:3]).status_code, 201)
+        with CaptureQueriesContext(connection) as large:
+            response = bulk_start(interns[3:])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(small), len(large))
+        self.assertEqual((response.data["created"], response.data["template_version_number"]), (4, 1))
+
+        instance = ProcessInstance.objects.get(id=response.data["instance_ids"][0])
+        self.assertEqual(instance.subject_user, interns[3])
+        responsible = list(instance.steps.order_by("step_template__order").values_list("responsible_user_id", flat=True))
+        self.assertEqual(responsible, [self.employee.id, teamlead.id, interns[3].id])
+        self.assertTrue(
+            ProcessParticipant.objects.filter(instance=instance, user=self.employee, has_active_step=True).exists()
+        )
+
+        response = self.client.post(
+            "/api/v1/bpm/instances/bulk/",
+            {"template_id": self.template.id, "subject_ids": [interns[0].id, 999999]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["errors"]["subject_ids"], [999999])
+        self.assertEqual(ProcessInstance.objects.count(), 7)
+
+        User.objects.filter(id=teamlead.id).update(is_active=False)
+        response = self.client.post(
+            "/api/v1/bpm/instances/bulk/",
+            {
+                "template_id": self.template.id,
+                "subject_ids": [interns[0].id],
+                "responsible_by_step": {str(self.step.id): teamlead.id},
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["errors"]["subject_ids"], [teamlead.id])
+        self.assertEqual(ProcessInstance.objects.count(), 7)
+
+    def test_frozen_version_steps_are_not_editable(self):
+        permission, _ = Permission.objects.get_or_create(
+            codename="bpm.manage_templates",
+            defaults={"module": "bpm", "description": "Manage BPM templates"},
+        )
+        self.admin_role.permissions.add(permission)
+        self.client.force_authenticate(self.admin)
+        self.client.post("/api/v1/bpm/instances/", {"template_id": self.template.id}, format="json")
+        frozen = StepTemplate.objects.get(process_template=self.template, version__isnull=False)
+
+        url = "/api/v1/bpm/admin/step-templates/"
+        self.assertEqual(self.client.patch(f"{url}{frozen.id}/", {"name": "x"}, format="json").status_code, 404)
+        self.assertEqual(self.client.patch(f"{url}{self.step.id}/", {"name": "Docs"}, format="json").status_code, 200)
+        duplicate = {"process_template": self.template.id, "name": "Dup", "order": 1, "role_responsible": Role.Name.EMPLOYEE}
+        self.assertEqual(self.client.post(url, duplicate, format="json").status_code, 400)
+        response = self.client.get(f"/api/v1/bpm/admin/templates/{self.template.id}/")
+        self.assertEqual([step["id"] for step in response.data["steps"]], [self.step.id])
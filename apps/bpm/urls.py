@@ -2,10 +2,12 @@ from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
 from .views import (
+    ProcessBulkStartAPIView,
     ProcessCreateAPIView,
     ProcessDetailAPIView,
     ProcessListAPIView,
     ProcessTemplateAdminViewSet,
+    SlaDashboardAPIView,
     StepCompleteAPIView,
     StepTemplateAdminViewSet,
 )
@@ -19,7 +21,9 @@ router.register(r"admin/step-templates", StepTemplateAdminViewSet, basename="bpm
 urlpatterns = [
     path("", ProcessListAPIView.as_view(), name="bpm-list"),
     path("instances/", ProcessCreateAPIView.as_view(), name="bpm-instance-create"),
+    path("instances/bulk/", ProcessBulkStartAPIView.as_view(), name="bpm-instance-bulk-start"),
     path("<int:pk>/", ProcessDetailAPIView.as_view(), name="bpm-detail"),
+    path("sla/", SlaDashboardAPIView.as_view(), name="bpm-sla-dashboard"),
     path("steps/<int:step_id>/complete/", StepCompleteAPIView.as_view(), name="bpm-step-complete"),
     path("", include(router.urls)),
 ]
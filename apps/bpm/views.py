@@ -1,5 +1,4 @@
-from django.contrib.auth import get_user_model
-from django.db.models import Q
+from django.db.models import Count, F, Prefetch, Q
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from rest_framework.permissions import IsAuthenticated
@@ -8,101 +7,102 @@ from rest_framework.viewsets import ModelViewSet
 from rest_framework.views import APIView
 
 from apps.accounts.access_policy import AccessPolicy
+from apps.common.pagination import CreatedAtCursorPagination
 
-from .models import ProcessInstance, ProcessTemplate, StepInstance, StepTemplate
+from .models import ProcessInstance, ProcessParticipant, ProcessTemplate, StepInstance, StepTemplate
 from .permissions import CanManageBpmTemplates
 from .serializers import (
+    ProcessBulkStartSerializer,
     ProcessInstanceCreateSerializer,
     ProcessInstanceSerializer,
+    ProcessListQuerySerializer,
     ProcessTemplateSerializer,
     StepCompleteSerializer,
     StepTemplateSerializer,
 )
+from .services import (
+    UnknownSubjects,
+    can_access_instance,
+    start_processes,
+    start_step,
+    sync_participants,
+    visible_participations,
+)
 
 
-User = get_user_model()
-
-
-def _can_access_instance(user, instance: ProcessInstance) -> bool:
-    if AccessPolicy.is_admin_like(user):
-        return True
-    if instance.created_by_id == user.id:
-        return True
-    if instance.steps.filter(responsible_user_id=user.id).exists():
-        return True
-    if AccessPolicy.is_teamlead(user):
-        subordinate_ids = user.team_members.values_list("id", flat=True)
-        if instance.created_by_id in subordinate_ids:
-            return True
-        return instance.steps.filter(responsible_user_id__in=subordinate_ids).exists()
-    return False
+def _instances_with_steps():
+    return ProcessInstance.objects.select_related("template", "template_version", "created_by").prefetch_related(
+        "steps",
+        "steps__step_template",
+        "steps__responsible_user",
+    )
+
+
+def _filter_instances(qs, params: dict, prefix: str = ""):
+    """Apply list filters to ``qs``, whose instance is reached through ``prefix``."""
+    if params.get("status"):
+        qs = qs.filter(**{f"{prefix}status": params["status"]})
+    if params.get("date_from"):
+        qs = qs.filter(**{f"{prefix}created_at__date__gte": params["date_from"]})
+    if params.get("date_to"):
+        qs = qs.filter(**{f"{prefix}created_at__date__lte": params["date_to"]})
+    if params.get("responsible"):
+        responsible = ProcessParticipant.objects.filter(
+            user_id=params["responsible"],
+            role=ProcessParticipant.InstanceRole.RESPONSIBLE,
+        )
+        qs = qs.filter(**{f"{prefix}id__in": responsible.values("instance_id")})
+    return qs
 
 
 class ProcessListAPIView(APIView):
+    """
+    Keyset-paginated ``{"next", "previous", "results", "waiting_my_action"}``.
+    Visibility comes from ``ProcessParticipant`` as a semi-join, so no
+    ``distinct`` is needed; the inbox count reads the caller's flagged rows.
+    """
+
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        qs = ProcessInstance.objects.select_related("template", "created_by").prefetch_related(
-            "steps",
-            "steps__step_template",
-            "steps__responsible_user",
+        query = ProcessListQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+
+        qs = _instances_with_steps()
+        participations = visible_participations(request.user)
+        if participations is not None:
+            qs = qs.filter(id__in=participations.values("instance_id"))
+        qs = _filter_instances(qs, params)
+
+        waiting = ProcessParticipant.objects.filter(
+            user=request.user,
+            role=ProcessParticipant.InstanceRole.RESPONSIBLE,
+            has_active_step=True,
         )
+        waiting_my_action = _filter_instances(waiting, params, prefix="instance__").count()
 
-        if not AccessPolicy.is_admin_like(request.user):
-            if AccessPolicy.is_teamlead(request.user):
-                sub_ids = list(request.user.team_members.values_list("id", flat=True))
-                qs = qs.filter(
-                    Q(created_by=request.user)
-                    | Q(created_by_id__in=sub_ids)
-                    | Q(steps__responsible_user=request.user)
-                    | Q(steps__responsible_user_id__in=sub_ids)
-                ).distinct()
-            else:
-                qs = qs.filter(Q(created_by=request.user) | Q(steps__responsible_user=request.user)).distinct()
-
-        status_value = request.query_params.get("status")
-        if status_value:
-            qs = qs.filter(status=status_value)
-        responsible = request.query_params.get("responsible")
-        if responsible:
-            qs = qs.filter(steps__responsible_user_id=responsible)
-        date_from = request.query_params.get("date_from")
-        if date_from:
-            qs = qs.filter(created_at__date__gte=date_from)
-        date_to = request.query_params.get("date_to")
-        if date_to:
-            qs = qs.filter(created_at__date__lte=date_to)
-
-        waiting_my_action = qs.filter(
-            steps__responsible_user=request.user,
-            steps__status=StepInstance.Status.IN_PROGRESS,
-        ).distinct().count()
-
-        return Response(
-            {
-                "waiting_my_action": waiting_my_action,
-                "items": ProcessInstanceSerializer(qs, many=True).data,
-            }
-        )
+        paginator = CreatedAtCursorPagination()
+        page = paginator.paginate_queryset(qs, request, view=self)
+        response = paginator.get_paginated_response(ProcessInstanceSerializer(page, many=True).data)
+        response.data["waiting_my_action"] = waiting_my_action
+        return response
 
 
 class ProcessDetailAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, pk: int):
-        instance = get_object_or_404(
-            ProcessInstance.objects.select_related("template", "created_by").prefetch_related(
-                "steps",
-                "steps__step_template",
-                "steps__responsible_user",
-            ),
-            pk=pk,
-        )
-        if not _can_access_instance(request.user, instance):
+        instance = get_object_or_404(_instances_with_steps(), pk=pk)
+        if not can_access_instance(request.user, instance.id):
             return Response({"detail": "Access denied."}, status=403)
         return Response(ProcessInstanceSerializer(instance).data)
 
 
+def _unknown_subjects_response(exc: UnknownSubjects) -> Response:
+    return Response({"detail": "Unknown or inactive users.", "subject_ids": exc.user_ids}, status=400)
+
+
 class ProcessCreateAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -110,30 +110,50 @@ class ProcessCreateAPIView(APIView):
         serializer = ProcessInstanceCreateSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         template = get_object_or_404(ProcessTemplate, pk=serializer.validated_data["template_id"], is_active=True)
-        responsible_map = serializer.validated_data.get("responsible_by_step", {})
+        try:
+            _, instances = start_processes(
+                template,
+                created_by=request.user,
+                subject_ids=[serializer.validated_data["subject_user_id"]],
+                responsible_by_step=serializer.validated_data["responsible_by_step"],
+            )
+        except UnknownSubjects as exc:
+            return _unknown_subjects_response(exc)
+        instance = _instances_with_steps().get(pk=instances[0].pk)
+        return Response(ProcessInstanceSerializer(instance).data, status=201)
 
-        instance = ProcessInstance.objects.create(
-            template=template,
-            created_by=request.user,
-            status=ProcessInstance.Status.IN_PROGRESS,
-        )
 
-        now = timezone.now()
-        steps = list(template.steps.order_by("order", "id"))
-        for index, step_t in enumerate(steps):
-            responsible_id = responsible_map.get(str(step_t.id)) or responsible_map.get(step_t.id)
-            responsible_user = User.objects.filter(id=responsible_id).first() if responsible_id else None
-            status_value = StepInstance.Status.IN_PROGRESS if index == 0 else StepInstance.Status.PENDING
-            StepInstance.objects.create(
-                process_instance=instance,
-                step_template=step_t,
-                status=status_value,
-                responsible_user=responsible_user,
-                started_at=now if index == 0 else None,
-            )
+class ProcessBulkStartAPIView(APIView):
+    """
+    Start one instance per subject (e.g. an onboarding cohort) from the
+    template's current version. Responsible users come from
+    ``responsible_by_step`` or, per step role, the subject or their manager.
+    """
 
-        instance.refresh_from_db()
-        return Response(ProcessInstanceSerializer(instance).data, status=201)
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = ProcessBulkStartSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        template = get_object_or_404(ProcessTemplate, pk=serializer.validated_data["template_id"], is_active=True)
+        try:
+            version, instances = start_processes(
+                template,
+                created_by=request.user,
+                subject_ids=serializer.validated_data["subject_ids"],
+                responsible_by_step=serializer.validated_data["responsible_by_step"],
+            )
+        except UnknownSubjects as exc:
+            return _unknown_subjects_response(exc)
+        return Response(
+            {
+                "template_version": version.id,
+                "template_version_number": version.number,
+                "created": len(instances),
+                "instance_ids": [instance.id for instance in instances],
+            },
+            status=201,
+        )
 
 
 class StepCompleteAPIView(APIView):
@@ -145,7 +165,7 @@ class StepCompleteAPIView(APIView):
             pk=step_id,
         )
         instance = step.process_instance
-        if not _can_access_instance(request.user, instance):
+        if not can_access_instance(request.user, instance.id):
             return Response({"detail": "Access denied."}, status=403)
         if step.status != StepInstance.Status.IN_PROGRESS:
             return Response({"detail": "Step is not in progress."}, status=409)
@@ -169,27 +189,73 @@ class StepCompleteAPIView(APIView):
                 step_template__order__gt=step.step_template.order,
                 status=StepInstance.Status.PENDING,
             )
+            .select_related("step_template")
             .order_by("step_template__order", "id")
             .first()
         )
         if next_step:
-            next_step.status = StepInstance.Status.IN_PROGRESS
-            next_step.started_at = timezone.now()
-            next_step.save(update_fields=["status", "started_at"])
+            start_step(next_step, timezone.now())
+            next_step.save(update_fields=["status", "started_at", "due_at"])
         else:
             instance.status = ProcessInstance.Status.COMPLETED
             instance.save(update_fields=["status"])
+        sync_participants([instance.id])
 
         return Response(ProcessInstanceSerializer(instance).data)
 
 
+class SlaDashboardAPIView(APIView):
+    """Step SLA counts per process template, from one grouped query."""
+
+    permission_classes = [IsAuthenticated, CanManageBpmTemplates]
+
+    def get(self, request):
+        now = timezone.now()
+        in_progress = Q(status=StepInstance.Status.IN_PROGRESS)
+        rows = (
+            StepInstance.objects.filter(due_at__isnull=False)
+            .values("step_template__process_template_id", "step_template__process_template__name")
+            .annotate(
+                with_sla=Count("id"),
+                in_progress=Count("id", filter=in_progress),
+                overdue_now=Count("id", filter=in_progress & Q(due_at__lte=now)),
+                breached_total=Count("id", filter=Q(breached_at__isnull=False)),
+                completed_late=Count(
+                    "id",
+                    filter=Q(status=StepInstance.Status.COMPLETED, finished_at__gt=F("due_at")),
+                ),
+            )
+            .order_by("-overdue_now", "-breached_total", "step_template__process_template__name")
+        )
+        return Response(
+            {
+                "generated_at": now,
+                "templates": [
+                    {
+                        "template_id": row["step_template__process_template_id"],
+                        "template_name": row["step_template__process_template__name"],
+                        "steps_with_sla": row["with_sla"],
+                        "in_progress": row["in_progress"],
+                        "overdue_now": row["overdue_now"],
+                        "breached_total": row["breached_total"],
+                        "completed_late": row["completed_late"],
+                    }
+                    for row in rows
+                ],
+            }
+        )
+
+
 class ProcessTemplateAdminViewSet(ModelViewSet):
-    queryset = ProcessTemplate.objects.all().order_by("name")
+    queryset = ProcessTemplate.objects.prefetch_related(
+        Prefetch("steps", queryset=StepTemplate.objects.filter(version__isnull=True), to_attr="draft_steps")
+    ).order_by("name")
     serializer_class = ProcessTemplateSerializer
     permission_classes = [IsAuthenticated, CanManageBpmTemplates]
 
 
 class StepTemplateAdminViewSet(ModelViewSet):
-    queryset = StepTemplate.objects.select_related("process_template").all()
+    # Frozen version steps are immutable; only drafts can be edited.
+    queryset = StepTemplate.objects.select_related("process_template").filter(version__isnull=True)
     serializer_class = StepTemplateSerializer
     permission_classes = [IsAuthenticated, CanManageBpmTemplates]
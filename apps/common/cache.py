@@ -0,0 +1,34 @@
+"""
+Versioned cache keys.
+
+Every key of a ``VersionedCache`` embeds a global version stored in the same
+cache; ``invalidate_all`` bumps it, which orphans every entry at once (they
+expire by their own timeout). Entries live in the "shared" cache
+(``settings.CACHES``) by default, so an invalidation is seen by every worker.
+"""
+
+from django.core.cache import caches
+from django.utils.connection import ConnectionProxy
+
+
+class VersionedCache:
+    def __init__(self, prefix: str, alias: str = "shared"):
+        self.prefix = prefix
+        self.version_key = f"{prefix}:version"
+        self.cache = ConnectionProxy(caches, alias)
+
+    def current_version(self) -> int:
+        version = self.cache.get(self.version_key)
+        if version is None:
+            version = 1
+            self.cache.add(self.version_key, version, timeout=None)
+        return version
+
+    def key(self, *parts, version=None) -> str:
+        return ":".join([self.prefix, f"v{version or self.current_version()}", *map(str, parts)])
+
+    def invalidate_all(self) -> None:
+        try:
+            self.cache.incr(self.version_key)
+        except ValueError:
+            self.cache.set(self.version_key, 2, timeout=None)
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from apps.common.uploads import purge
+
+
+class Command(BaseCommand):
+    help = (
+        "Aborts stale chunked uploads, reconciles blob reference counts and deletes "
+        "blobs no attachment references any more."
+    )
+
+    def handle(self, *args, **options):
+        result = purge()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"uploads_purge: sessions_aborted={result['sessions_aborted']} "
+                f"reconciled={result['reconciled']} blobs_deleted={result['blobs_deleted']}"
+            )
+        )
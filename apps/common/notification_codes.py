@@ -10,9 +10,12 @@ class NotificationCode:
 
     SCHEDULE_WEEKLY_PLAN_DEADLINE_MISSED = "schedule.weekly_plan_deadline_missed"
 
+    BPM_STEP_SLA_BREACHED = "bpm.step_sla_breached"
+
 
 class NotificationEntity:
     FEEDBACK = "feedback"
     EMPLOYEE_DAILY_REPORT = "employee_daily_report"
     INTERN_ONBOARDING_REQUEST = "intern_onboarding_request"
     WEEKLY_WORK_PLAN = "weekly_work_plan"
+    BPM_STEP_INSTANCE = "bpm_step_instance"
@@ -0,0 +1,63 @@
+"""
+Highlighting shared by the task and knowledge-base search.
+
+Hits carry a title and a snippet that clients render as HTML, so every
+piece of user text is escaped and only the ``<mark>`` markers are markup.
+On PostgreSQL ``ts_headline`` is asked for private-use sentinel markers
+(``HEADLINE_OPTIONS``) and ``headline_html`` escapes its output before
+turning them into ``<mark>``; other backends highlight in Python with
+``highlight`` / ``snippet``.
+"""
+
+from __future__ import annotations
+
+import re
+
+from django.utils.html import escape
+
+
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_STOP = "</mark>"
+MAX_TERMS = 8
+
+_SENTINEL_START = "\ue000"
+_SENTINEL_STOP = "\ue001"
+HEADLINE_OPTIONS = {"start_sel": _SENTINEL_START, "stop_sel": _SENTINEL_STOP}
+
+
+def search_terms(text: str) -> list[str]:
+    return list(dict.fromkeys(term.lower() for term in re.findall(r"\w+", text)))[:MAX_TERMS]
+
+
+def terms_pattern(terms):
+    return re.compile("|".join(re.escape(term) for term in terms), re.IGNORECASE)
+
+
+def highlight(text: str, pattern) -> str:
+    """Escape ``text`` and wrap every match of ``pattern`` in ``<mark>``."""
+    if pattern is None:
+        return escape(text)
+    parts = []
+    position = 0
+    for match in pattern.finditer(text):
+        parts.append(escape(text[position : match.start()]))
+        parts.append(f"{HIGHLIGHT_START}{escape(match.group(0))}{HIGHLIGHT_STOP}")
+        position = match.end()
+    parts.append(escape(text[position:]))
+    return "".join(parts)
+
+
+def snippet(text: str, pattern, *, words: int) -> str:
+    """About ``words`` words of ``text`` around the first match, escaped and highlighted."""
+    tokens = (text or "").split()
+    first = 0
+    if pattern is not None:
+        first = next((index for index, token in enumerate(tokens) if pattern.search(token)), 0)
+    start = max(0, first - words // 3)
+    return highlight(" ".join(tokens[start : start + words]), pattern)
+
+
+def headline_html(value: str | None) -> str:
+    """Escaped ``ts_headline`` output (run with ``HEADLINE_OPTIONS``) with ``<mark>`` markers."""
+    text = escape(value or "")
+    return text.replace(_SENTINEL_START, HIGHLIGHT_START).replace(_SENTINEL_STOP, HIGHLIGHT_STOP)
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from apps.common.models import Notification
+from apps.common.models import Notification, UploadSession
 
 
 class NotificationSerializer(serializers.ModelSerializer):
@@ -18,3 +18,38 @@ class NotificationSerializer(serializers.ModelSerializer):
             "is_read",
             "created_at",
         )
+
+
+class UploadSessionCreateSerializer(serializers.Serializer):
+    filename = serializers.CharField(max_length=255)
+    size = serializers.IntegerField(min_value=1)
+    content_type = serializers.CharField(max_length=255, required=False, allow_blank=True, default="")
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    blob = serializers.SerializerMethodField()
+    chunk_size = serializers.SerializerMethodField()
+
+    class Meta:
+        model = UploadSession
+        fields = (
+            "id",
+            "filename",
+            "content_type",
+            "size",
+            "received_bytes",
+            "status",
+            "chunk_size",
+            "blob",
+            "created_at",
+            "updated_at",
+        )
+        read_only_fields = fields
+
+    def get_blob(self, obj):
+        if not obj.blob_id:
+            return None
+        return {"id": obj.blob_id, "sha256": obj.blob.sha256, "size": obj.blob.size}
+
+    def get_chunk_size(self, obj):
+        return self.context.get("chunk_size")
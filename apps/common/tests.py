@@ -1,9 +1,17 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from django.utils import timezone
 from unittest.mock import patch
 from rest_framework.test import APIClient
 
 from apps.accounts.models import Role, User
-from apps.common.models import Notification
+from apps.common.cache import VersionedCache
+from apps.common.models import Notification, UploadBlob
+from apps.common.uploads import purge
 
 
 class NotificationsApiTests(TestCase):
@@ -78,3 +86,185 @@ class NotificationsApiTests(TestCase):
         self.assertEqual(response.data.get("unread_count"), 2)
         self.assertEqual(response.data.get("total_count"), 2)
         self.assertEqual(len(response.data.get("items", [])), 1)
+
+
+@override_settings(UPLOAD_CHUNK_SIZE=4, UPLOAD_MAX_SIZE=64)
+class ChunkedUploadApiTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        self.client = APIClient()
+        role, _ = Role.objects.get_or_create(name=Role.Name.EMPLOYEE, defaults={"level": Role.Level.EMPLOYEE})
+        self.user = User.objects.create_user(username="uploader", password="StrongPass123!", role=role)
+        self.other = User.objects.create_user(username="uploader2", password="StrongPass123!", role=role)
+        self.client.force_authenticate(user=self.user)
+
+    def _put_chunk(self, session_id, offset, data):
+        return self.client.generic(
+            "PUT",
+            f"/api/v1/common/uploads/{session_id}/chunk/?offset={offset}",
+            data,
+            content_type="application/octet-stream",
+        )
+
+    def _upload(self, content, filename="report.pdf"):
+        response = self.client.post(
+            "/api/v1/common/uploads/",
+            {"filename": filename, "size": len(content)},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+        session_id = response.data["id"]
+        for offset in range(0, len(content), 4):
+            self.assertEqual(self._put_chunk(session_id, offset, content[offset : offset + 4]).status_code, 200)
+        response = self.client.post(f"/api/v1/common/uploads/{session_id}/complete/", {}, format="json")
+        self.assertEqual(response.status_code, 200)
+        return response.data["blob"]["id"]
+
+    def test_upload_resumes_from_received_bytes(self):
+        response = self.client.post("/api/v1/common/uploads/", {"filename": "a.pdf", "size": 10}, format="json")
+        session_id = response.data["id"]
+        self.assertEqual(response.data["chunk_size"], 4)
+        self.assertEqual(self._put_chunk(session_id, 0, b"0123").status_code, 200)
+
+        response = self._put_chunk(session_id, 0, b"0123")
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data["errors"]["received_bytes"], 4)
+
+        status_response = self.client.get(f"/api/v1/common/uploads/{session_id}/")
+        self.assertEqual(status_response.data["received_bytes"], 4)
+        self.assertEqual(self._put_chunk(session_id, 4, b"456789").status_code, 200)
+        response = self.client.post(f"/api/v1/common/uploads/{session_id}/complete/", {}, format="json")
+        self.assertEqual(response.status_code, 200)
+        blob = UploadBlob.objects.get(id=response.data["blob"]["id"])
+        with blob.file.open("rb") as stored:
+            self.assertEqual(stored.read(), b"0123456789")
+
+    def test_upload_rejects_files_over_limit(self):
+        response = self.client.post("/api/v1/common/uploads/", {"filename": "a.pdf", "size": 65}, format="json")
+        self.assertEqual(response.status_code, 413)
+
+    def test_identical_content_is_stored_once(self):
+        first = self._upload(b"same bytes")
+        second = self._upload(b"same bytes", filename="copy.pdf")
+        self.assertEqual(first, second)
+        self.assertEqual(UploadBlob.objects.count(), 1)
+
+    def test_task_attachment_references_blob(self):
+        from apps.tasks.models import Task, TaskAttachment
+        from apps.tasks.services import get_user_default_board
+
+        board = get_user_default_board(self.user)
+        task = Task.objects.create(
+            board=board,
+            column=board.columns.order_by("order").first(),
+            title="With file",
+            assignee=self.user,
+            reporter=self.user,
+        )
+        blob_id = self._upload(b"attachment", filename="quarterly-plan.pdf")
+
+        self.client.force_authenticate(user=self.other)
+        response = self.client.post(f"/api/v1/tasks/{task.id}/attachments/", {"blob_id": blob_id}, format="json")
+        self.assertIn(response.status_code, (403, 404))
+
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post(f"/api/v1/tasks/{task.id}/attachments/", {"blob_id": blob_id}, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["original_name"], "quarterly-plan.pdf")
+        self.assertEqual(UploadBlob.objects.get(id=blob_id).ref_count, 1)
+        response = self.client.get("/api/v1/tasks/search/", {"q": "quarterly"})
+        self.assertEqual([hit["id"] for hit in response.data["results"]], [task.id])
+
+        TaskAttachment.objects.get(task=task).delete()
+        self.assertEqual(UploadBlob.objects.get(id=blob_id).ref_count, 0)
+
+    def test_regulation_file_keeps_the_uploaded_name(self):
+        from apps.regulations.models import Regulation
+
+        admin_role, _ = Role.objects.get_or_create(name=Role.Name.ADMIN, defaults={"level": Role.Level.ADMIN})
+        admin = User.objects.create_user(username="uploader_admin", password="StrongPass123!", role=admin_role)
+        self.client.force_authenticate(user=admin)
+        blob_id = self._upload(b"%PDF-1.4", filename="Регламент.pdf")
+        response = self.client.post(
+            "/api/v1/regulations/admin/",
+            {"title": "Uploaded", "type": "file", "file_blob_id": blob_id, "language": "ru", "is_active": True},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["original_name"], "Регламент.pdf")
+
+        regulation = Regulation.objects.get(id=response.data["id"])
+        response = self.client.get(f"/api/v1/regulations/{regulation.id}/download/")
+        self.assertIn("%D0%A0%D0%B5%D0%B3%D0%BB%D0%B0%D0%BC%D0%B5%D0%BD%D1%82.pdf", response["Content-Disposition"])
+        response.close()
+
+        response = self.client.patch(
+            f"/api/v1/regulations/admin/{regulation.id}/",
+            {"type": "link", "external_url": "https://example.com/reg"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["original_name"], "")
+
+    def test_onboarding_report_keeps_the_uploaded_name(self):
+        from apps.onboarding_core.models import OnboardingDay
+        from apps.reports.models import OnboardingReport
+
+        intern_role, _ = Role.objects.get_or_create(name=Role.Name.INTERN, defaults={"level": Role.Level.INTERN})
+        intern = User.objects.create_user(username="uploader_intern", password="StrongPass123!", role=intern_role)
+        day = OnboardingDay.objects.create(day_number=1, title="Upload day", is_active=True)
+        self.client.force_authenticate(user=intern)
+        blob_id = self._upload(b"%PDF-1.4 report", filename="Отчёт за день.pdf")
+        response = self.client.post(
+            "/api/v1/reports/submit/",
+            {"day_id": str(day.id), "did": "Did", "will_do": "Will", "attachment_blob_id": blob_id},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+        report = OnboardingReport.objects.get(id=response.data["id"])
+        self.assertEqual(report.original_name, "Отчёт за день.pdf")
+        self.assertTrue(report.attachment.name.startswith("blobs/"))
+        self.assertEqual(UploadBlob.objects.get(id=blob_id).ref_count, 1)
+
+    def test_purge_keeps_blob_attached_after_reconcile(self):
+        blob_id = self._upload(b"late attach")
+
+        def attach_after_reconcile():
+            UploadBlob.objects.filter(id=blob_id).update(ref_count=1)
+            return 0
+
+        with patch("apps.common.uploads.reconcile_ref_counts", side_effect=attach_after_reconcile):
+            result = purge(now=timezone.now() + timedelta(days=2))
+        self.assertEqual(result["blobs_deleted"], 0)
+        self.assertTrue(UploadBlob.objects.filter(id=blob_id).exists())
+
+    def test_purge_reconciles_counts_and_deletes_unreferenced_blobs(self):
+        blob_id = self._upload(b"orphan")
+        UploadBlob.objects.filter(id=blob_id).update(ref_count=3)
+        name = UploadBlob.objects.get(id=blob_id).file.name
+
+        with self.captureOnCommitCallbacks(execute=True):
+            result = purge(now=timezone.now() + timedelta(days=2))
+
+        self.assertEqual(result["reconciled"], 1)
+        self.assertEqual(result["blobs_deleted"], 1)
+        self.assertFalse(UploadBlob.objects.filter(id=blob_id).exists())
+        self.assertFalse(default_storage.exists(name))
+
+
+class VersionedCacheTests(TestCase):
+    def test_invalidate_all_moves_every_key_to_a_new_version(self):
+        first, second = VersionedCache("tests_a"), VersionedCache("tests_b")
+        key = first.key("item", 1)
+        self.assertEqual(key, f"tests_a:v{first.current_version()}:item:1")
+        first.cache.set(key, "cached")
+
+        first.invalidate_all()
+        self.assertNotEqual(first.key("item", 1), key)
+        self.assertIsNone(first.cache.get(first.key("item", 1)))
+        self.assertEqual(second.key("item", 1), "tests_b:v1:item:1")
@@ -0,0 +1,291 @@
+"""
+Resumable chunked uploads and content-addressed blob storage.
+
+A client opens an ``UploadSession`` with the file's name and size, then
+sends raw chunks at increasing offsets; each chunk is streamed straight to
+a temp file (never buffered by Django), and after an interruption the client
+asks for ``received_bytes`` and continues from there. On completion the file
+is hashed once from disk and stored as ``blobs/<sha[:2]>/<sha><ext>``; an
+identical file uploaded later reuses the existing blob.
+
+Models attach a blob by pointing their ``FileField`` at the blob's storage
+name and keeping a ``*_blob`` foreign key, so URLs, downloads and admin
+keep working unchanged while the bytes are stored once.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.db.models import F, ProtectedError
+from django.utils import timezone
+
+from .models import UploadBlob, UploadSession
+
+
+COPY_BUFFER_SIZE = 64 * 1024
+
+
+class UploadError(Exception):
+    def __init__(self, detail: str, *, status_code: int = 400, **extra):
+        super().__init__(detail)
+        self.detail = detail
+        self.status_code = status_code
+        self.extra = extra
+
+
+def max_upload_size() -> int:
+    return int(getattr(settings, "UPLOAD_MAX_SIZE", 20 * 1024 * 1024))
+
+
+def chunk_size() -> int:
+    return int(getattr(settings, "UPLOAD_CHUNK_SIZE", 1024 * 1024))
+
+
+def _temp_dir() -> Path:
+    path = Path(getattr(settings, "UPLOAD_TEMP_DIR", "") or Path(settings.MEDIA_ROOT) / "uploads" / "tmp")
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def temp_path(session: UploadSession) -> Path:
+    return _temp_dir() / f"{session.id}.part"
+
+
+def start_session(*, owner, filename: str, size: int, content_type: str = "") -> UploadSession:
+    if size > max_upload_size():
+        raise UploadError("File is too large.", status_code=413, max_size=max_upload_size())
+    session = UploadSession.objects.create(
+        owner=owner,
+        filename=os.path.basename(filename)[:255],
+        size=size,
+        content_type=content_type,
+    )
+    temp_path(session).touch()
+    return session
+
+
+def _locked_session(session_id, owner) -> UploadSession:
+    session = UploadSession.objects.select_for_update().filter(id=session_id, owner=owner).first()
+    if session is None:
+        raise UploadError("Upload not found.", status_code=404)
+    if session.status != UploadSession.Status.ACTIVE:
+        raise UploadError("Upload is not active.", status_code=409, status=session.status)
+    return session
+
+
+@transaction.atomic
+def append_chunk(session_id, *, owner, offset: int, stream, length: int) -> UploadSession:
+    """
+    Append ``length`` bytes read from ``stream`` at ``offset``. The offset
+    must equal ``received_bytes`` so retried or out-of-order chunks are
+    rejected with the position to resume from.
+    """
+    session = _locked_session(session_id, owner)
+    if offset != session.received_bytes:
+        raise UploadError("Unexpected offset.", status_code=409, received_bytes=session.received_bytes)
+    if length <= 0 or length > session.size - session.received_bytes:
+        raise UploadError("Chunk exceeds the declared file size.", status_code=413, received_bytes=session.received_bytes)
+
+    path = temp_path(session)
+    written = 0
+    with path.open("r+b" if path.exists() else "wb") as target:
+        target.truncate(session.received_bytes)
+        target.seek(session.received_bytes)
+        while written < length:
+            data = stream.read(min(COPY_BUFFER_SIZE, length - written))
+            if not data:
+                break
+            target.write(data)
+            written += len(data)
+        if written != length:
+            target.truncate(session.received_bytes)
+            raise UploadError("Chunk is shorter than Content-Length.", received_bytes=session.received_bytes)
+
+    session.received_bytes += written
+    session.save(update_fields=["received_bytes", "updated_at"])
+    return session
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as source:
+        for block in iter(lambda: source.read(COPY_BUFFER_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _store_blob(path: Path, *, sha256: str, filename: str, size: int, content_type: str) -> UploadBlob:
+    blob = UploadBlob.objects.filter(sha256=sha256).first()
+    if blob is not None:
+        return blob
+    extension = Path(filename).suffix.lower()[:16]
+    with path.open("rb") as source:
+        name = default_storage.save(f"blobs/{sha256[:2]}/{sha256}{extension}", File(source))
+    try:
+        with transaction.atomic():
+            return UploadBlob.objects.create(sha256=sha256, file=name, size=size, content_type=content_type)
+    except IntegrityError:
+        # Another session stored the same content first.
+        default_storage.delete(name)
+        return UploadBlob.objects.get(sha256=sha256)
+
+
+@transaction.atomic
+def complete_session(session_id, *, owner) -> UploadSession:
+    session = _locked_session(session_id, owner)
+    if session.received_bytes != session.size:
+        raise UploadError("Upload is incomplete.", status_code=409, received_bytes=session.received_bytes)
+    path = temp_path(session)
+    session.blob = _store_blob(
+        path,
+        sha256=_sha256(path),
+        filename=session.filename,
+        size=session.size,
+        content_type=session.content_type,
+    )
+    session.status = UploadSession.Status.COMPLETED
+    session.save(update_fields=["blob", "status", "updated_at"])
+    transaction.on_commit(lambda: path.unlink(missing_ok=True))
+    return session
+
+
+@transaction.atomic
+def abort_session(session_id, *, owner) -> UploadSession:
+    session = _locked_session(session_id, owner)
+    session.status = UploadSession.Status.ABORTED
+    session.save(update_fields=["status", "updated_at"])
+    path = temp_path(session)
+    transaction.on_commit(lambda: path.unlink(missing_ok=True))
+    return session
+
+
+def resolve_blob(user, blob_id):
+    """
+    The blob and the name it was uploaded under, if ``user`` completed an
+    upload of it. Knowing a blob id alone does not grant access to its content.
+    """
+    session = (
+        UploadSession.objects.filter(owner=user, blob_id=blob_id, status=UploadSession.Status.COMPLETED)
+        .select_related("blob")
+        .order_by("-created_at")
+        .first()
+    )
+    if session is None:
+        return None, None
+    return session.blob, session.filename
+
+
+class _BlobValue:
+    """What FileField validators look at: ``name`` for extensions, ``size`` for limits."""
+
+    def __init__(self, name: str, size: int):
+        self.name = name
+        self.size = size
+
+
+def validate_blob_for(model, field_name: str, blob: UploadBlob, filename: str) -> None:
+    """Run the model field's validators (extension, size) against the uploaded file."""
+    model._meta.get_field(field_name).run_validators(_BlobValue(filename, blob.size))
+
+
+def attach_blob(
+    instance,
+    field_name: str,
+    blob: UploadBlob | None,
+    *,
+    blob_field: str,
+    filename: str = "",
+    name_field: str | None = None,
+) -> None:
+    """
+    Point ``instance.<field_name>`` at ``blob`` (or clear it), set the
+    ``blob_field`` foreign key and move the reference from the previously
+    attached blob. The stored file is named by its hash, so the name it was
+    uploaded under (``filename``, from ``resolve_blob``) goes to
+    ``name_field`` when the model has one. The caller saves ``instance``.
+    """
+    if name_field is not None:
+        setattr(instance, name_field, filename if blob is not None else "")
+    previous_id = getattr(instance, f"{blob_field}_id")
+    if blob is not None and previous_id == blob.id:
+        return
+    setattr(instance, field_name, blob.file.name if blob is not None else None)
+    setattr(instance, blob_field, blob)
+    if blob is not None:
+        UploadBlob.objects.filter(id=blob.id).update(ref_count=F("ref_count") + 1)
+    release_blob(previous_id)
+
+
+def release_blob(blob_id) -> None:
+    if blob_id:
+        UploadBlob.objects.filter(id=blob_id, ref_count__gt=0).update(ref_count=F("ref_count") - 1)
+
+
+def reconcile_ref_counts() -> int:
+    """Recount references from every model pointing at UploadBlob; returns blobs fixed."""
+    relations = [
+        relation
+        for relation in UploadBlob._meta.related_objects
+        if relation.related_model is not UploadSession
+    ]
+    counts: dict[int, int] = {}
+    for relation in relations:
+        field = relation.field
+        ids = relation.related_model._base_manager.filter(**{f"{field.name}__isnull": False}).values_list(
+            field.attname, flat=True
+        )
+        for blob_id in ids.iterator():
+            counts[blob_id] = counts.get(blob_id, 0) + 1
+
+    fixed = []
+    for blob in UploadBlob.objects.only("id", "ref_count").iterator():
+        expected = counts.get(blob.id, 0)
+        if blob.ref_count != expected:
+            blob.ref_count = expected
+            fixed.append(blob)
+    UploadBlob.objects.bulk_update(fixed, ["ref_count"], batch_size=500)
+    return len(fixed)
+
+
+def purge(*, now=None) -> dict:
+    """
+    Drop stale sessions (and their temp files) and unreferenced blobs older
+    than the grace period, which gives a fresh upload time to be attached.
+    """
+    now = now or timezone.now()
+    session_ttl = timedelta(hours=int(getattr(settings, "UPLOAD_SESSION_TTL_HOURS", 24)))
+    blob_grace = timedelta(hours=int(getattr(settings, "UPLOAD_BLOB_GRACE_HOURS", 24)))
+
+    stale = UploadSession.objects.filter(status=UploadSession.Status.ACTIVE, updated_at__lt=now - session_ttl)
+    sessions_aborted = 0
+    for session in stale.iterator():
+        temp_path(session).unlink(missing_ok=True)
+        sessions_aborted += 1
+    stale.update(status=UploadSession.Status.ABORTED)
+
+    reconciled = reconcile_ref_counts()
+    blobs_deleted = 0
+    candidates = UploadBlob.objects.filter(ref_count=0, created_at__lt=now - blob_grace)
+    for blob_id in list(candidates.values_list("id", flat=True)):
+        # attach_blob bumps ref_count on the same row, so under the lock a
+        # blob that got attached after the reconcile is seen and kept.
+        with transaction.atomic():
+            blob = UploadBlob.objects.select_for_update().filter(id=blob_id, ref_count=0).first()
+            if blob is None:
+                continue
+            name = blob.file.name
+            try:
+                blob.delete()
+            except ProtectedError:
+                continue
+            transaction.on_commit(lambda name=name: default_storage.delete(name))
+        blobs_deleted += 1
+    return {"sessions_aborted": sessions_aborted, "reconciled": reconciled, "blobs_deleted": blobs_deleted}
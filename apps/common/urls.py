@@ -3,6 +3,10 @@ from .views import (
     MarkAllNotificationsReadAPIView,
     MarkNotificationReadAPIView,
     NotificationsAPIView,
+    UploadChunkAPIView,
+    UploadCompleteAPIView,
+    UploadSessionCreateAPIView,
+    UploadSessionDetailAPIView,
 )
 
 
@@ -11,4 +15,8 @@ urlpatterns = [
     path("notifications/", NotificationsAPIView.as_view()),
     path("notifications/<int:pk>/read/", MarkNotificationReadAPIView.as_view()),
     path("notifications/read-all/", MarkAllNotificationsReadAPIView.as_view()),
+    path("uploads/", UploadSessionCreateAPIView.as_view()),
+    path("uploads/<uuid:session_id>/", UploadSessionDetailAPIView.as_view()),
+    path("uploads/<uuid:session_id>/chunk/", UploadChunkAPIView.as_view()),
+    path("uploads/<uuid:session_id>/complete/", UploadCompleteAPIView.as_view()),
 ]
@@ -1,9 +1,11 @@
+from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from apps.common.models import Notification
-from apps.common.serializers import NotificationSerializer
+from apps.common import uploads
+from apps.common.models import Notification, UploadSession
+from apps.common.serializers import NotificationSerializer, UploadSessionCreateSerializer, UploadSessionSerializer
 from apps.common.audit import CommonAuditService
 
 
@@ -95,3 +97,88 @@ class MarkAllNotificationsReadAPIView(APIView):
         CommonAuditService.log_notifications_marked_read_all(request, updated_count)
 
         return Response({"status": "all marked as read", "updated_count": int(updated_count), "unread_count": 0})
+
+
+def _upload_response(session, status_code=status.HTTP_200_OK):
+    return Response(
+        UploadSessionSerializer(session, context={"chunk_size": uploads.chunk_size()}).data,
+        status=status_code,
+    )
+
+
+def _upload_error(exc: uploads.UploadError):
+    return Response({"detail": exc.detail, **exc.extra}, status=exc.status_code)
+
+
+class UploadSessionCreateAPIView(APIView):
+    """Open a resumable upload; chunks are then PUT to ``uploads/<id>/chunk/?offset=N``."""
+
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = UploadSessionCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            session = uploads.start_session(owner=request.user, **serializer.validated_data)
+        except uploads.UploadError as exc:
+            return _upload_error(exc)
+        return _upload_response(session, status.HTTP_201_CREATED)
+
+
+class UploadSessionDetailAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, session_id):
+        session = UploadSession.objects.select_related("blob").filter(id=session_id, owner=request.user).first()
+        if session is None:
+            return Response({"detail": "Upload not found."}, status=status.HTTP_404_NOT_FOUND)
+        return _upload_response(session)
+
+    def delete(self, request, session_id):
+        try:
+            uploads.abort_session(session_id, owner=request.user)
+        except uploads.UploadError as exc:
+            return _upload_error(exc)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class UploadChunkAPIView(APIView):
+    """
+    Raw request body (any content type) appended at ``?offset=``; the body is
+    streamed to disk and never parsed or buffered by DRF.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def put(self, request, session_id):
+        try:
+            offset = int(request.query_params.get("offset", ""))
+            length = int(request.META.get("CONTENT_LENGTH") or 0)
+        except ValueError:
+            return Response({"detail": "offset must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+        if length <= 0:
+            return Response({"detail": "Content-Length is required."}, status=status.HTTP_411_LENGTH_REQUIRED)
+        if length > uploads.max_upload_size():
+            return Response({"detail": "Chunk is too large."}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        try:
+            session = uploads.append_chunk(
+                session_id,
+                owner=request.user,
+                offset=offset,
+                stream=request.stream,
+                length=length,
+            )
+        except uploads.UploadError as exc:
+            return _upload_error(exc)
+        return _upload_response(session)
+
+
+class UploadCompleteAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, session_id):
+        try:
+            session = uploads.complete_session(session_id, owner=request.user)
+        except uploads.UploadError as exc:
+            return _upload_error(exc)
+        return _upload_response(session)
@@ -0,0 +1,53 @@
+"""
+Cache keys for knowledge-base reads.
+
+Article lists are cached per visibility class (admins, or a department and
+role pair) and per state of the listed scope (newest ``updated_at`` and row
+count), so one entry serves every user who sees the same articles and a
+changed scope never hits an old entry.
+Article bodies are cached per article version (id and ``updated_at``) and
+are shared by everyone allowed to open the article; access is still checked
+on every request. The category tree is a single entry.
+
+Any article or category save/delete bumps the global version
+(``apps.common.cache.VersionedCache``), which orphans every cached entry at
+once. ``QuerySet.update`` bypasses this, so callers doing bulk updates must
+call ``invalidate_all`` themselves.
+"""
+
+import hashlib
+
+from django.conf import settings
+
+from apps.accounts.access_policy import AccessPolicy
+from apps.common.cache import VersionedCache
+
+versions = VersionedCache("kb")
+cache = versions.cache
+current_version = versions.current_version
+invalidate_all = versions.invalidate_all
+
+
+def timeout() -> int:
+    return int(getattr(settings, "KB_CACHE_TIMEOUT", 300))
+
+
+def visibility_class(user) -> str:
+    if AccessPolicy.is_admin_like(user):
+        return "admin"
+    role_name = user.role.name if getattr(user, "role_id", None) else ""
+    return f"d{user.department_id or 0}:r{role_name}"
+
+
+def list_key(user, params, last_updated, count, version=None) -> str:
+    state = f"{last_updated.timestamp() if last_updated else 0}:{count}"
+    digest = hashlib.sha1(repr((sorted(params.lists()), state)).encode("utf-8")).hexdigest()
+    return versions.key("list", visibility_class(user), digest, version=version)
+
+
+def tree_key(version=None) -> str:
+    return versions.key("categories", version=version)
+
+
+def article_key(article_id, updated_at, version=None) -> str:
+    return versions.key("article", article_id, updated_at.timestamp(), version=version)
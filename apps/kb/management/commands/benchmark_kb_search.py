@@ -0,0 +1,105 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from apps.accounts.models import Department, Role, User
+from apps.kb.models import KBArticle, KBCategory
+from apps.kb.search import search_articles
+from apps.kb.views import _visible_articles_for
+
+
+VOCABULARY = (
+    "onboarding vacation payroll security policy laptop access office schedule benefits "
+    "password incident expense travel insurance handbook training mentor review contract "
+    "отпуск зарплата безопасность пароль доступ офис график обучение договор командировка "
+    "эмгек өргүү айлык коопсуздук сырсөз окуу келишим"
+).split()
+TYPOS = ("onbording", "pasword", "secuirty", "vacaton", "зарплта", "безопастность")
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark knowledge-base search latency (admin and employee visibility) on a large "
+        "synthetic article table. Runs inside a rolled-back transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--articles", type=int, default=100_000)
+        parser.add_argument("--departments", type=int, default=20)
+        parser.add_argument("--queries", type=int, default=50)
+        parser.add_argument("--batch-size", type=int, default=2000)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._run(options)
+                raise _Rollback()
+        except _Rollback:
+            pass
+
+    def _sentence(self, rng, words):
+        return " ".join(rng.choice(VOCABULARY) for _ in range(words))
+
+    def _run(self, options):
+        rng = random.Random(options["seed"])
+        role, _ = Role.objects.get_or_create(name=Role.Name.EMPLOYEE, defaults={"level": Role.Level.EMPLOYEE})
+        admin_role, _ = Role.objects.get_or_create(name=Role.Name.ADMINISTRATOR, defaults={"level": Role.Level.ADMINISTRATOR})
+        departments = Department.objects.bulk_create(
+            [Department(name=f"bench_kb_department_{idx}") for idx in range(options["departments"])]
+        )
+        admin = User.objects.create(username="bench_kb_admin", role=admin_role)
+        employee = User.objects.create(username="bench_kb_employee", role=role, department=departments[0])
+        categories = KBCategory.objects.bulk_create([KBCategory(name=f"bench_kb_category_{idx}") for idx in range(50)])
+
+        total = options["articles"]
+        started = time.perf_counter()
+        for offset in range(0, total, options["batch_size"]):
+            batch = []
+            for _ in range(offset, min(offset + options["batch_size"], total)):
+                visibility = rng.choices(list(KBArticle.Visibility.values), weights=(6, 3, 1))[0]
+                batch.append(
+                    KBArticle(
+                        title=self._sentence(rng, 5),
+                        content=self._sentence(rng, 200),
+                        tags=rng.sample(VOCABULARY, 3),
+                        category=rng.choice(categories),
+                        visibility=visibility,
+                        department=rng.choice(departments) if visibility == KBArticle.Visibility.DEPARTMENT else None,
+                        role_name=Role.Name.INTERN if visibility == KBArticle.Visibility.ROLE else None,
+                        is_published=rng.random() < 0.9,
+                    )
+                )
+            KBArticle.objects.bulk_create(batch)
+        self.stdout.write(f"seeded articles={total} vendor={connection.vendor} time={time.perf_counter() - started:.1f}s")
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE kb_kbarticle")
+
+        workloads = {
+            "admin": (admin, lambda: " ".join(rng.sample(VOCABULARY, 2))),
+            "employee": (employee, lambda: " ".join(rng.sample(VOCABULARY, 2))),
+            "employee_typo": (employee, lambda: rng.choice(TYPOS)),
+        }
+        for label, (user, make_query) in workloads.items():
+            timings = []
+            for _ in range(options["queries"]):
+                text = make_query()
+                began = time.perf_counter()
+                hits = search_articles(_visible_articles_for(user), text, limit=20)
+                timings.append((time.perf_counter() - began) * 1000)
+            timings.sort()
+            p95 = timings[max(0, int(len(timings) * 0.95) - 1)]
+            self.stdout.write(
+                f"{label}: queries={len(timings)} last_hits={len(hits)} "
+                f"p50={statistics.median(timings):.1f}ms p95={p95:.1f}ms max={timings[-1]:.1f}ms"
+            )
+
+        self.stdout.write(self.style.SUCCESS("benchmark finished, data rolled back"))
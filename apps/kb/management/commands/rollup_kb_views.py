@@ -0,0 +1,32 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.kb.services import flush_views, prune_view_logs, rollup_changed_days, rollup_views
+
+
+class Command(BaseCommand):
+    help = (
+        "Rolls raw KB article views up into daily per-article/per-viewer rows read by the KB report "
+        "(plus any earlier day that got views after its rollup) and deletes raw views older than "
+        "KB_VIEW_LOG_RETENTION_DAYS. Defaults to today and yesterday."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--date", type=date.fromisoformat, help="Last day to roll up (YYYY-MM-DD).")
+        parser.add_argument("--days", type=int, default=2, help="Number of days ending at --date.")
+        parser.add_argument("--no-prune", action="store_true", help="Keep raw views past the retention window.")
+
+    def handle(self, *args, **options):
+        flush_views()
+        last = options["date"] or timezone.localdate()
+        for offset in range(max(options["days"], 1)):
+            day = last - timedelta(days=offset)
+            self.stdout.write(f"kb_views_rollup: day={day.isoformat()} rows={rollup_views(day)}")
+        for day in rollup_changed_days():
+            self.stdout.write(f"kb_views_rollup: late views day={day.isoformat()}")
+        if not options["no_prune"]:
+            rolled_up, deleted = prune_view_logs()
+            self.stdout.write(f"kb_views_prune: days_rolled_up={rolled_up} raw_deleted={deleted}")
+        self.stdout.write(self.style.SUCCESS("kb views rollup finished"))
@@ -0,0 +1,75 @@
+# Generated by Django 4.2.30 on 2026-10-19 10:20
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+# Title (A) and content (C) are indexed with the russian and english
+# configurations plus "simple", which also covers Kyrgyz (no stemmer);
+# tags (B) are indexed as-is with "simple".
+FORWARD_SQL = """
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE OR REPLACE FUNCTION kb_kbarticle_search_vector_update() RETURNS trigger AS $$
+DECLARE
+    tag_text text;
+BEGIN
+    SELECT coalesce(string_agg(value, ' '), '') INTO tag_text
+    FROM jsonb_array_elements_text(
+        CASE WHEN jsonb_typeof(NEW.tags) = 'array' THEN NEW.tags ELSE '[]'::jsonb END
+    );
+    NEW.search_vector :=
+        setweight(to_tsvector('russian', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('simple', tag_text), 'B') ||
+        setweight(to_tsvector('russian', coalesce(NEW.content, '')), 'C') ||
+        setweight(to_tsvector('english', coalesce(NEW.content, '')), 'C') ||
+        setweight(to_tsvector('simple', coalesce(NEW.content, '')), 'C');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER kb_kbarticle_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, content, tags, search_vector ON kb_kbarticle
+    FOR EACH ROW EXECUTE FUNCTION kb_kbarticle_search_vector_update();
+
+CREATE INDEX kb_kbarticle_search_vector_gin ON kb_kbarticle USING gin (search_vector);
+-- Typo-tolerant fallback on titles (word_similarity, the %> operator).
+CREATE INDEX kb_kbarticle_title_trgm ON kb_kbarticle USING gin (title gin_trgm_ops);
+
+UPDATE kb_kbarticle SET search_vector = NULL;
+"""
+
+REVERSE_SQL = """
+DROP INDEX IF EXISTS kb_kbarticle_title_trgm;
+DROP INDEX IF EXISTS kb_kbarticle_search_vector_gin;
+DROP TRIGGER IF EXISTS kb_kbarticle_search_vector_trigger ON kb_kbarticle;
+DROP FUNCTION IF EXISTS kb_kbarticle_search_vector_update();
+"""
+
+
+def forwards(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(FORWARD_SQL)
+
+
+def backwards(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(REVERSE_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kb', '0002_alter_kbarticle_role_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='kbarticle',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(forwards, backwards),
+    ]
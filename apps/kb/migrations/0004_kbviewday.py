@@ -0,0 +1,40 @@
+# Generated by Django 4.2.30 on 2026-10-19 10:09
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('kb', '0003_kbarticle_search_vector'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='kbviewlog',
+            name='viewed_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.CreateModel(
+            name='KBViewDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('article', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='view_days', to='kb.kbarticle')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='kb_view_days', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-day', 'article_id'],
+                'indexes': [models.Index(fields=['day', 'article'], name='kb_kbviewda_day_220db6_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='kbviewday',
+            constraint=models.UniqueConstraint(fields=('article', 'user', 'day'), name='kb_view_day_unique_article_user_day'),
+        ),
+    ]
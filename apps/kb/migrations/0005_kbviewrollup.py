@@ -0,0 +1,25 @@
+# Generated by Django 4.2.30 on 2026-10-19 10:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kb', '0004_kbviewday'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='KBViewRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(unique=True)),
+                ('changed_at', models.DateTimeField(blank=True, null=True)),
+                ('rolled_up_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-day'],
+            },
+        ),
+    ]
@@ -1,9 +1,13 @@
 from django.conf import settings
+from django.contrib.postgres.search import SearchVectorField
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.utils import timezone
 
 from apps.accounts.models import Department, Role
 
+from . import cache as kb_cache
+
 
 class KBCategory(models.Model):
     name = models.CharField(max_length=150)
@@ -19,10 +23,25 @@ class KBCategory(models.Model):
         unique_together = ("name", "parent")
         ordering = ["name", "id"]
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        kb_cache.invalidate_all()
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        kb_cache.invalidate_all()
+        return result
+
     def __str__(self):
         return self.name
 
 
+class KBArticleManager(models.Manager):
+    def get_queryset(self):
+        # The tsvector is only ever read by search queries.
+        return super().get_queryset().defer("search_vector")
+
+
 class KBArticle(models.Model):
     class Visibility(models.TextChoices):
         ALL = "all", "All"
@@ -62,6 +81,10 @@ class KBArticle(models.Model):
     )
     updated_at = models.DateTimeField(auto_now=True)
     is_published = models.BooleanField(default=False)
+    # Maintained by a database trigger on PostgreSQL (see migration 0003).
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = KBArticleManager()
 
     class Meta:
         ordering = ["-updated_at", "-id"]
@@ -82,6 +105,15 @@ class KBArticle(models.Model):
         if self.visibility != self.Visibility.ROLE:
             self.role_name = None
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        kb_cache.invalidate_all()
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        kb_cache.invalidate_all()
+        return result
+
     def __str__(self):
         return self.title
 
@@ -97,7 +129,8 @@ class KBViewLog(models.Model):
         on_delete=models.CASCADE,
         related_name="view_logs",
     )
-    viewed_at = models.DateTimeField(auto_now_add=True)
+    # Set when the view happens, not when the buffered batch is written.
+    viewed_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
         ordering = ["-viewed_at", "-id"]
@@ -105,3 +138,44 @@ class KBViewLog(models.Model):
             models.Index(fields=["article", "viewed_at"]),
             models.Index(fields=["user", "viewed_at"]),
         ]
+
+
+class KBViewDay(models.Model):
+    """Daily rollup of ``KBViewLog``: one row per article, viewer and day."""
+
+    article = models.ForeignKey(
+        KBArticle,
+        on_delete=models.CASCADE,
+        related_name="view_days",
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="kb_view_days",
+    )
+    day = models.DateField()
+    views = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["-day", "article_id"]
+        constraints = [
+            models.UniqueConstraint(fields=["article", "user", "day"], name="kb_view_day_unique_article_user_day"),
+        ]
+        indexes = [
+            models.Index(fields=["day", "article"]),
+        ]
+
+
+class KBViewRollup(models.Model):
+    """
+    Rollup state of a day: ``changed_at`` is set after views of the day are
+    written, ``rolled_up_at`` when its ``KBViewDay`` rows were last rebuilt.
+    A day changed after its rollup started is rolled up again.
+    """
+
+    day = models.DateField(unique=True)
+    changed_at = models.DateTimeField(null=True, blank=True)
+    rolled_up_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-day"]
@@ -0,0 +1,127 @@
+"""
+Knowledge-base search.
+
+On PostgreSQL ``KBArticle.search_vector`` (title, tags and content, kept
+current by a trigger) is matched with a websearch query, ranked with
+``ts_rank`` and highlighted with ``ts_headline``. Russian and english use
+their stemming configurations; Kyrgyz, which has none, is matched through
+the ``simple`` configuration. When nothing matches (typically a typo) the
+titles are searched by trigram word similarity instead. Both paths are
+served by GIN indexes and run against the caller's visibility-filtered
+queryset, so access rules are part of the same SQL statement.
+
+Other backends (tests, local SQLite) fall back to ``icontains`` matching
+with the same response shape. Snippets are cut from the content with its
+HTML tags removed, and titles and snippets are HTML-escaped apart from
+their ``<mark>`` markers (``apps.common.search``).
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank, TrigramWordSimilarity
+from django.db import connection
+from django.db.models import Case, F, FloatField, Func, Q, Value, When
+from django.utils.html import strip_tags
+
+from apps.common.search import HEADLINE_OPTIONS, headline_html, highlight, search_terms, snippet, terms_pattern
+
+
+SEARCH_CONFIGS = {
+    "ru": ("russian", "simple"),
+    "en": ("english", "simple"),
+    "kg": ("simple",),
+}
+DEFAULT_CONFIGS = ("russian", "english", "simple")
+SNIPPET_WORDS = 35
+
+
+@dataclass(frozen=True)
+class SearchHit:
+    article: object
+    score: float
+    title: str
+    snippet: str
+    fuzzy: bool = False
+
+
+def search_articles(qs, text: str, *, lang: str | None = None, limit: int = 20) -> list[SearchHit]:
+    """``qs`` must already be restricted to the articles the caller may see."""
+    if connection.vendor == "postgresql":
+        configs = SEARCH_CONFIGS.get(lang, DEFAULT_CONFIGS)
+        return _search_postgres(qs, text, configs=configs, limit=limit) or _search_trigram(qs, text, limit=limit)
+    return _search_fallback(qs, text, limit=limit)
+
+
+def _search_postgres(qs, text: str, *, configs, limit: int) -> list[SearchHit]:
+    query = None
+    for config in configs:
+        part = SearchQuery(text, config=config, search_type="websearch")
+        query = part if query is None else query | part
+    headline = {"config": configs[0], **HEADLINE_OPTIONS}
+    content_text = Func(F("content"), Value("<[^>]*>"), Value(" "), Value("g"), function="regexp_replace")
+    rows = (
+        qs.filter(search_vector=query)
+        .defer("content")
+        .annotate(
+            score=SearchRank(F("search_vector"), query),
+            title_highlight=SearchHeadline("title", query, highlight_all=True, **headline),
+            snippet=SearchHeadline(content_text, query, max_words=SNIPPET_WORDS, min_words=15, **headline),
+        )
+        .order_by("-score", "-id")[:limit]
+    )
+    return [
+        SearchHit(
+            article=row,
+            score=float(row.score),
+            title=headline_html(row.title_highlight),
+            snippet=headline_html(row.snippet),
+        )
+        for row in rows
+    ]
+
+
+def _search_trigram(qs, text: str, *, limit: int) -> list[SearchHit]:
+    rows = (
+        qs.filter(title__trigram_word_similar=text)
+        .annotate(score=TrigramWordSimilarity(text, "title"))
+        .order_by("-score", "-id")[:limit]
+    )
+    return [
+        SearchHit(
+            article=row,
+            score=float(row.score),
+            title=highlight(row.title, None),
+            snippet=snippet(strip_tags(row.content), None, words=SNIPPET_WORDS),
+            fuzzy=True,
+        )
+        for row in rows
+    ]
+
+
+def _search_fallback(qs, text: str, *, limit: int) -> list[SearchHit]:
+    terms = search_terms(text)
+    if not terms:
+        return []
+    score = Value(0.0, output_field=FloatField())
+    for term in terms:
+        qs = qs.filter(Q(title__icontains=term) | Q(tags__icontains=term) | Q(content__icontains=term))
+        score = score + Case(
+            When(title__icontains=term, then=Value(1.0)),
+            When(tags__icontains=term, then=Value(0.6)),
+            default=Value(0.2),
+            output_field=FloatField(),
+        )
+    rows = qs.annotate(score=score).order_by("-score", "-id")[:limit]
+    pattern = terms_pattern(terms)
+    return [
+        SearchHit(
+            article=row,
+            score=row.score / len(terms),
+            title=highlight(row.title, pattern),
+            snippet=snippet(strip_tags(row.content), pattern, words=SNIPPET_WORDS),
+        )
+        for row in rows
+    ]
+
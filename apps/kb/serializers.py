@@ -9,6 +9,35 @@ class KBCategorySerializer(serializers.ModelSerializer):
         fields = ("id", "name", "parent")
 
 
+class KBArticleSummarySerializer(serializers.ModelSerializer):
+    """List/search representation: everything but the article body."""
+
+    category_name = serializers.CharField(source="category.name", read_only=True)
+
+    class Meta:
+        model = KBArticle
+        fields = (
+            "id",
+            "title",
+            "category",
+            "category_name",
+            "tags",
+            "visibility",
+            "updated_at",
+        )
+
+
+class KBSearchQuerySerializer(serializers.Serializer):
+    q = serializers.CharField(max_length=200, trim_whitespace=True)
+    lang = serializers.ChoiceField(choices=("ru", "en", "kg"), required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=20)
+
+
+class KBReportQuerySerializer(serializers.Serializer):
+    offset = serializers.IntegerField(min_value=0, default=0)
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=20)
+
+
 class KBArticleSerializer(serializers.ModelSerializer):
     category_name = serializers.CharField(source="category.name", read_only=True)
     created_by_username = serializers.CharField(source="created_by.username", read_only=True)
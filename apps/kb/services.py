@@ -0,0 +1,187 @@
+"""
+Article view tracking.
+
+Opening an article records a view in an in-process buffer that is written
+with one ``bulk_create`` once it holds ``KB_VIEW_BUFFER_SIZE`` views, by a
+timer ``KB_VIEW_FLUSH_SECONDS`` after the first buffered view (so an idle
+worker does not sit on its views), and at interpreter exit. A view costs no
+query of its own; a crashed worker loses at most its unflushed buffer.
+
+Every flush stamps ``KBViewRollup.changed_at`` of the days it wrote to.
+``rollup_views`` folds a day of raw ``KBViewLog`` rows into ``KBViewDay``
+(per article, viewer and day), which the report reads, and stamps
+``rolled_up_at``; ``rollup_changed_days`` rolls up again every day written
+to after its rollup started, so late flushes are counted.
+``prune_view_logs`` drops raw rows older than ``KB_VIEW_LOG_RETENTION_DAYS``
+after making sure their days are rolled up. All run from
+``manage.py rollup_kb_views``.
+"""
+
+from __future__ import annotations
+
+import atexit
+import logging
+import threading
+from datetime import date, datetime, timedelta
+from datetime import time as dt_time
+
+from django.conf import settings
+from django.db import IntegrityError, connections, transaction
+from django.db.models import Count, F, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from apps.accounts.models import User
+
+from .models import KBArticle, KBViewDay, KBViewLog, KBViewRollup
+
+
+logger = logging.getLogger(__name__)
+
+_buffer: list[KBViewLog] = []
+_buffer_lock = threading.Lock()
+_flush_timer: threading.Timer | None = None
+
+
+def buffer_size() -> int:
+    return max(1, int(getattr(settings, "KB_VIEW_BUFFER_SIZE", 100)))
+
+
+def flush_seconds() -> int:
+    return int(getattr(settings, "KB_VIEW_FLUSH_SECONDS", 10))
+
+
+def retention_days() -> int:
+    return int(getattr(settings, "KB_VIEW_LOG_RETENTION_DAYS", 90))
+
+
+def record_view(user_id: int, article_id: int) -> None:
+    global _flush_timer
+    entry = KBViewLog(user_id=user_id, article_id=article_id, viewed_at=timezone.now())
+    with _buffer_lock:
+        _buffer.append(entry)
+        due = len(_buffer) >= buffer_size()
+        if not due and _flush_timer is None:
+            _flush_timer = threading.Timer(flush_seconds(), _flush_on_timer)
+            _flush_timer.daemon = True
+            _flush_timer.start()
+    if due:
+        flush_views()
+
+
+def flush_views() -> int:
+    global _flush_timer
+    with _buffer_lock:
+        pending = _buffer[:]
+        _buffer.clear()
+        if _flush_timer is not None:
+            _flush_timer.cancel()
+            _flush_timer = None
+    if not pending:
+        return 0
+    try:
+        with transaction.atomic():
+            KBViewLog.objects.bulk_create(pending, batch_size=500)
+    except IntegrityError:
+        # An article or user was deleted while its view sat in the buffer.
+        article_ids = set(KBArticle.objects.filter(id__in={e.article_id for e in pending}).values_list("id", flat=True))
+        user_ids = set(User.objects.filter(id__in={e.user_id for e in pending}).values_list("id", flat=True))
+        pending = [e for e in pending if e.article_id in article_ids and e.user_id in user_ids]
+        KBViewLog.objects.bulk_create(pending, batch_size=500)
+    _mark_changed({timezone.localdate(e.viewed_at) for e in pending})
+    return len(pending)
+
+
+def _mark_changed(days) -> None:
+    # Stamped after the views are committed, so a rollup that started before
+    # they were visible always has rolled_up_at < changed_at.
+    now = timezone.now()
+    KBViewRollup.objects.bulk_create(
+        [KBViewRollup(day=day, changed_at=now) for day in days],
+        update_conflicts=True,
+        unique_fields=["day"],
+        update_fields=["changed_at"],
+    )
+
+
+def _flush_on_timer() -> None:
+    try:
+        flush_views()
+    except Exception:
+        logger.exception("Failed to flush buffered KB views")
+    finally:
+        connections.close_all()
+
+
+def _flush_at_exit() -> None:
+    try:
+        flush_views()
+    except Exception:  # the database may already be gone at shutdown
+        logger.exception("Failed to flush buffered KB views at exit")
+
+
+atexit.register(_flush_at_exit)
+
+
+def _day_bounds(day: date) -> tuple[datetime, datetime]:
+    start = timezone.make_aware(datetime.combine(day, dt_time.min))
+    return start, start + timedelta(days=1)
+
+
+@transaction.atomic
+def rollup_views(day: date) -> int:
+    """
+    Rebuild the ``KBViewDay`` rows of ``day`` from the raw log; returns rows
+    written. A day whose raw views were already pruned keeps its rollup.
+    """
+    started = timezone.now()
+    start, end = _day_bounds(day)
+    rows = list(
+        KBViewLog.objects.filter(viewed_at__gte=start, viewed_at__lt=end)
+        .values("article_id", "user_id")
+        .annotate(views=Count("id"))
+        .order_by()
+    )
+    KBViewRollup.objects.update_or_create(day=day, defaults={"rolled_up_at": started})
+    if not rows:
+        return 0
+    KBViewDay.objects.filter(day=day).delete()
+    created = KBViewDay.objects.bulk_create(
+        [KBViewDay(article_id=row["article_id"], user_id=row["user_id"], day=day, views=row["views"]) for row in rows],
+        batch_size=1000,
+    )
+    return len(created)
+
+
+def rollup_changed_days() -> list[date]:
+    """Roll up again every day that got views after its last rollup started; returns those days."""
+    days = list(
+        KBViewRollup.objects.filter(changed_at__isnull=False)
+        .filter(Q(rolled_up_at__isnull=True) | Q(changed_at__gt=F("rolled_up_at")))
+        .order_by("day")
+        .values_list("day", flat=True)
+    )
+    for day in days:
+        rollup_views(day)
+    return days
+
+
+def prune_view_logs(*, today: date | None = None) -> tuple[int, int]:
+    """
+    Delete raw views older than the retention window. Days in that range
+    without a rollup yet are rolled up first. Returns (days rolled up, rows deleted).
+    """
+    today = today or timezone.localdate()
+    cutoff_start, _ = _day_bounds(today - timedelta(days=retention_days()))
+    expiring = KBViewLog.objects.filter(viewed_at__lt=cutoff_start)
+    days = set(
+        expiring.annotate(day=TruncDate("viewed_at", tzinfo=timezone.get_current_timezone()))
+        .values_list("day", flat=True)
+        .distinct()
+        .order_by()
+    )
+    days -= set(KBViewDay.objects.filter(day__in=days).values_list("day", flat=True).distinct().order_by())
+    for day in sorted(days):
+        rollup_views(day)
+    deleted, _ = expiring.delete()
+    return len(days), deleted
@@ -1,9 +1,16 @@
-from django.test import TestCase
+from datetime import datetime, timedelta
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from rest_framework.test import APIClient
 
-from apps.accounts.models import Role, User
+from apps.accounts.models import Department, Role, User
 
-from .models import KBArticle, KBCategory
+from . import services
+from .models import KBArticle, KBCategory, KBViewDay, KBViewLog, KBViewRollup
+from .services import flush_views, prune_view_logs, record_view, rollup_changed_days, rollup_views
 
 
 class KbApiTests(TestCase):
@@ -34,10 +41,264 @@ class KbApiTests(TestCase):
         self.client.force_authenticate(self.employee)
         response = self.client.get("/api/v1/kb/")
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data["results"]), 1)
 
     def test_article_detail_creates_view_log(self):
         self.client.force_authenticate(self.employee)
         response = self.client.get(f"/api/v1/kb/{self.article.id}/")
         self.assertEqual(response.status_code, 200)
         self.assertEqual(self.article.view_logs.count(), 1)
+
+    def test_search_returns_ranked_snippets_within_visibility(self):
+        department = Department.objects.create(name="KB search dept")
+        KBArticle.objects.create(
+            title="Vacation policy",
+            content="How to request vacation days. " * 20,
+            tags=["hr"],
+            visibility=KBArticle.Visibility.ALL,
+            is_published=True,
+        )
+        KBArticle.objects.create(
+            title="Laptop handbook",
+            content="Return the laptop before vacation.",
+            tags=["vacation"],
+            visibility=KBArticle.Visibility.ALL,
+            is_published=True,
+        )
+        KBArticle.objects.create(
+            title="Vacation for finance",
+            content="Department only",
+            visibility=KBArticle.Visibility.DEPARTMENT,
+            department=department,
+            is_published=True,
+        )
+        KBArticle.objects.create(title="Vacation draft", content="Not published", is_published=False)
+
+        self.client.force_authenticate(self.employee)
+        response = self.client.get("/api/v1/kb/search/", {"q": "vacation"})
+        self.assertEqual(response.status_code, 200)
+        results = response.data["results"]
+        self.assertEqual([item["title"] for item in results], ["Vacation policy", "Laptop handbook"])
+        self.assertNotIn("content", results[0])
+        self.assertIn("<mark>Vacation</mark>", results[0]["search"]["title"])
+        self.assertLess(len(results[0]["search"]["snippet"].split()), 40)
+
+        self.client.force_authenticate(self.admin)
+        response = self.client.get("/api/v1/kb/search/", {"q": "vacation", "lang": "en"})
+        self.assertEqual(len(response.data["results"]), 3)
+        self.assertEqual(self.client.get("/api/v1/kb/search/").status_code, 400)
+        self.assertEqual(self.client.get("/api/v1/kb/search/", {"q": "x", "lang": "de"}).status_code, 400)
+
+    def test_search_highlights_are_escaped_and_snippets_drop_tags(self):
+        KBArticle.objects.create(
+            title='<img src=x onerror="alert(1)"> Vacation',
+            content='<p>Request <a href="/hr" onclick="x()">vacation</a> early.</p>',
+            visibility=KBArticle.Visibility.ALL,
+            is_published=True,
+        )
+        self.client.force_authenticate(self.employee)
+        search = self.client.get("/api/v1/kb/search/", {"q": "vacation"}).data["results"][0]["search"]
+        self.assertEqual(search["title"], "&lt;img src=x onerror=&quot;alert(1)&quot;&gt; <mark>Vacation</mark>")
+        self.assertEqual(search["snippet"], "Request <mark>vacation</mark> early.")
+
+    @override_settings(KB_VIEW_BUFFER_SIZE=3, KB_VIEW_FLUSH_SECONDS=3600)
+    def test_article_views_are_buffered_and_written_in_batches(self):
+        self.addCleanup(flush_views)
+        self.client.force_authenticate(self.employee)
+        self.client.get(f"/api/v1/kb/{self.article.id}/")
+        flush_views()
+        KBViewLog.objects.all().delete()
+        with self.assertNumQueries(1):
+            self.client.get(f"/api/v1/kb/{self.article.id}/")
+        self.client.get(f"/api/v1/kb/{self.article.id}/")
+        self.assertEqual(self.article.view_logs.count(), 0)
+        self.client.get(f"/api/v1/kb/{self.article.id}/")
+        self.assertEqual(self.article.view_logs.count(), 3)
+
+    @override_settings(KB_VIEW_BUFFER_SIZE=100, KB_VIEW_FLUSH_SECONDS=3600)
+    def test_buffered_views_arm_a_flush_timer(self):
+        self.addCleanup(flush_views)
+        record_view(self.employee.id, self.article.id)
+        timer = services._flush_timer
+        self.assertTrue(timer.is_alive())
+        self.assertEqual(timer.interval, 3600)
+        record_view(self.employee.id, self.article.id)
+        self.assertIs(services._flush_timer, timer)
+
+        self.assertEqual(flush_views(), 2)
+        self.assertIsNone(services._flush_timer)
+        timer.join(timeout=1)
+        self.assertFalse(timer.is_alive())
+
+    def test_days_written_after_their_rollup_are_rolled_up_again(self):
+        today = timezone.localdate()
+        KBViewLog.objects.create(user=self.employee, article=self.article)
+        rollup_views(today)
+        self.assertEqual(rollup_changed_days(), [])
+
+        record_view(self.employee.id, self.article.id)  # flushed at once: KB_VIEW_BUFFER_SIZE=1 in tests
+        self.assertEqual(KBViewDay.objects.get(day=today).views, 1)
+        self.assertEqual(rollup_changed_days(), [today])
+        self.assertEqual(KBViewDay.objects.get(day=today).views, 2)
+        self.assertEqual(rollup_changed_days(), [])
+        self.assertIsNotNone(KBViewRollup.objects.get(day=today).rolled_up_at)
+
+    def test_report_reads_daily_rollups_and_old_logs_are_pruned(self):
+        today = timezone.localdate()
+        old_day = today - timedelta(days=120)
+        other = User.objects.create_user(username="kb_other", password="StrongPass123!", role=self.employee_role)
+        KBViewLog.objects.bulk_create(
+            [
+                KBViewLog(user=self.employee, article=self.article),
+                KBViewLog(user=self.employee, article=self.article),
+                KBViewLog(user=other, article=self.article),
+                KBViewLog(
+                    user=other,
+                    article=self.article,
+                    viewed_at=timezone.make_aware(datetime.combine(old_day, datetime.min.time())) + timedelta(hours=12),
+                ),
+            ]
+        )
+        self.assertEqual(rollup_views(today), 2)
+
+        self.client.force_authenticate(self.admin)
+        response = self.client.get("/api/v1/kb/report/")
+        self.assertEqual(response.status_code, 200)
+        row = response.data["top_30_days"][0]
+        self.assertEqual((row["views"], row["unique_views"]), (3, 2))
+
+        with override_settings(KB_VIEW_LOG_RETENTION_DAYS=90):
+            rolled_up, deleted = prune_view_logs(today=today)
+        self.assertEqual((rolled_up, deleted), (1, 1))
+        self.assertTrue(KBViewDay.objects.filter(day=old_day, user=other, views=1).exists())
+        response = self.client.get("/api/v1/kb/report/")
+        row = response.data["top_all_time"][0]
+        self.assertEqual((row["views"], row["unique_views"]), (4, 2))
+
+    def test_report_paginates_all_articles_with_one_audience_query(self):
+        department = Department.objects.create(name="KB report dept")
+        self.employee.department = department
+        self.employee.save(update_fields=["department"])
+        dept_article = KBArticle.objects.create(
+            title="Dept only",
+            content="x",
+            visibility=KBArticle.Visibility.DEPARTMENT,
+            department=department,
+            is_published=True,
+        )
+        for idx in range(3):
+            KBArticle.objects.create(title=f"Unread {idx}", content="x", is_published=True)
+        today = timezone.localdate()
+        KBViewDay.objects.create(article=dept_article, user=self.employee, day=today, views=5)
+        KBViewDay.objects.create(article=self.article, user=self.employee, day=today - timedelta(days=45), views=2)
+
+        self.client.force_authenticate(self.admin)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/v1/kb/report/", {"limit": 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sum(1 for query in queries if 'FROM "accounts_user"' in query["sql"]), 1)
+
+        page = response.data["articles"]
+        self.assertEqual(page["total_count"], 5)
+        self.assertEqual([row["article_id"] for row in page["results"]], [dept_article.id, self.article.id])
+        first, second = page["results"]
+        self.assertEqual((first["views"], first["views_30d"], first["audience_count"]), (5, 5, 1))
+        self.assertEqual(first["view_percent"], 100.0)
+        self.assertEqual((second["views"], second["views_30d"], second["audience_count"]), (2, 0, 2))
+
+        response = self.client.get("/api/v1/kb/report/", {"offset": 4, "limit": 2})
+        self.assertEqual(len(response.data["articles"]["results"]), 1)
+        self.assertEqual(self.client.get("/api/v1/kb/report/", {"limit": 0}).status_code, 400)
+
+    def test_list_is_paginated_summaries_cached_per_visibility_class(self):
+        department = Department.objects.create(name="KB cache dept")
+        KBArticle.objects.create(
+            title="Dept only",
+            content="secret body",
+            visibility=KBArticle.Visibility.DEPARTMENT,
+            department=department,
+            is_published=True,
+        )
+        colleague = User.objects.create_user(username="kb_colleague", password="StrongPass123!", role=self.employee_role)
+        self.employee.department = colleague.department = department
+        self.employee.save(update_fields=["department"])
+        colleague.save(update_fields=["department"])
+
+        self.client.force_authenticate(self.employee)
+        response = self.client.get("/api/v1/kb/", {"page_size": 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["results"][0]["title"], "Dept only")
+        self.assertNotIn("content", response.data["results"][0])
+        self.assertIsNotNone(response.data["next"])
+        etag = response["ETag"]
+
+        self.client.force_authenticate(colleague)
+        # One aggregate query fingerprints the scope; the page comes from the cache.
+        with self.assertNumQueries(1):
+            cached = self.client.get("/api/v1/kb/", {"page_size": 1})
+        self.assertEqual(cached.data, response.data)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get("/api/v1/kb/", {"page_size": 1}, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # A bulk update skips save() and the version bump, but still changes the ETag.
+        KBArticle.objects.filter(title="Dept only").update(title="Dept only v2", updated_at=timezone.now())
+        response = self.client.get("/api/v1/kb/", {"page_size": 1}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["results"][0]["title"], "Dept only v2")
+        etag = response["ETag"]
+
+        self.client.force_authenticate(self.admin)
+        self.assertNotEqual(self.client.get("/api/v1/kb/", {"page_size": 1})["ETag"], etag)
+        self.article.title = "Safety v2"
+        self.article.save()
+        self.client.force_authenticate(colleague)
+        self.assertEqual(self.client.get("/api/v1/kb/", {"page_size": 1}, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_category_tree_is_nested(self):
+        child = KBCategory.objects.create(name="Fire", parent=self.category)
+        KBCategory.objects.create(name="Drills", parent=child)
+        KBCategory.objects.create(name="Another root")
+
+        self.client.force_authenticate(self.employee)
+        response = self.client.get("/api/v1/kb/categories/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([node["name"] for node in response.data["results"]], ["Another root", "Rules"])
+        rules = response.data["results"][1]
+        self.assertEqual(rules["children"][0]["name"], "Fire")
+        self.assertEqual(rules["children"][0]["children"][0]["name"], "Drills")
+        with self.assertNumQueries(0):
+            self.client.get("/api/v1/kb/categories/")
+
+        child.name = "Fire safety"
+        child.save()
+        response = self.client.get("/api/v1/kb/categories/")
+        self.assertEqual(response.data["results"][1]["children"][0]["name"], "Fire safety")
+
+    def test_article_detail_uses_strong_etag_and_answers_304(self):
+        self.addCleanup(flush_views)
+        self.client.force_authenticate(self.employee)
+        response = self.client.get(f"/api/v1/kb/{self.article.id}/")
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+        self.assertFalse(etag.startswith("W/"))
+        self.assertIn("no-cache", response["Cache-Control"])
+
+        not_modified = self.client.get(f"/api/v1/kb/{self.article.id}/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(self.article.view_logs.count(), 2)
+
+        self.article.content = "Use helmet and gloves"
+        self.article.save()
+        response = self.client.get(f"/api/v1/kb/{self.article.id}/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["content"], "Use helmet and gloves")
+        self.assertNotEqual(response["ETag"], etag)
+
+        hidden = KBArticle.objects.create(
+            title="Admins",
+            content="x",
+            visibility=KBArticle.Visibility.ROLE,
+            role_name=Role.Name.ADMIN,
+            is_published=True,
+        )
+        self.assertEqual(self.client.get(f"/api/v1/kb/{hidden.id}/").status_code, 404)
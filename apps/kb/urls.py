@@ -5,7 +5,9 @@ from .views import (
     KBArticleAdminViewSet,
     KBArticleDetailAPIView,
     KBArticleListAPIView,
+    KBArticleSearchAPIView,
     KBCategoryAdminViewSet,
+    KBCategoryTreeAPIView,
     KBReportAPIView,
 )
 
@@ -18,6 +20,8 @@ router.register(r"admin/categories", KBCategoryAdminViewSet, basename="kb-admin-
 urlpatterns = [
     path("", KBArticleListAPIView.as_view(), name="kb-list"),
     path("report/", KBReportAPIView.as_view(), name="kb-report"),
+    path("categories/", KBCategoryTreeAPIView.as_view(), name="kb-category-tree"),
+    path("search/", KBArticleSearchAPIView.as_view(), name="kb-search"),
     path("<int:pk>/", KBArticleDetailAPIView.as_view(), name="kb-detail"),
     path("", include(router.urls)),
 ]
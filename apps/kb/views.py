@@ -1,9 +1,14 @@
+import hashlib
 from datetime import timedelta
 
 from django.contrib.auth import get_user_model
-from django.db.models import Count, Q
-from django.shortcuts import get_object_or_404
+from django.db.models import Count, Max, Q, Sum
+from django.db.models.functions import Coalesce
+from django.http import Http404
 from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
@@ -11,17 +16,28 @@ from rest_framework.views import APIView
 
 from apps.accounts.access_policy import AccessPolicy
 from apps.accounts.models import Role
+from apps.common.pagination import CreatedAtCursorPagination
 
-from .models import KBArticle, KBCategory, KBViewLog
+from . import cache as kb_cache
+from .cache import cache
+from .models import KBArticle, KBCategory, KBViewDay
 from .permissions import CanManageKb
-from .serializers import KBArticleSerializer, KBCategorySerializer
+from .search import search_articles
+from .services import record_view
+from .serializers import (
+    KBArticleSerializer,
+    KBArticleSummarySerializer,
+    KBCategorySerializer,
+    KBReportQuerySerializer,
+    KBSearchQuerySerializer,
+)
 
 
 User = get_user_model()
 
 
 def _visible_articles_for(user):
-    qs = KBArticle.objects.filter(is_published=True).select_related("category", "department", "created_by")
+    qs = KBArticle.objects.filter(is_published=True).select_related("category")
     if AccessPolicy.is_admin_like(user):
         return qs
     role_name = user.role.name if getattr(user, "role_id", None) else ""
@@ -32,80 +48,249 @@ def _visible_articles_for(user):
     )
 
 
+def _strong_etag(raw: str) -> str:
+    return quote_etag(hashlib.sha1(raw.encode("utf-8")).hexdigest())
+
+
+def _not_modified(request, etag: str):
+    if etag not in parse_etags(request.headers.get("If-None-Match", "")):
+        return None
+    response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    response["ETag"] = etag
+    return response
+
+
+def _cached_response(payload, etag: str) -> Response:
+    response = Response(payload)
+    response["ETag"] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+class KBArticleCursorPagination(CreatedAtCursorPagination):
+    ordering = ("-updated_at", "-id")
+
+
 class KBArticleListAPIView(APIView):
+    """
+    Keyset-paginated article summaries (no body). The ETag and the cache key
+    carry the newest ``updated_at`` and the row count of the filtered scope,
+    read with one aggregate query, so any change to the articles a user can
+    see changes both; the page itself is cached per visibility class and
+    query string.
+    """
+
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        qs = _visible_articles_for(request.user)
+        qs = _visible_articles_for(request.user).defer("content")
         category_id = request.query_params.get("category_id")
         tag = request.query_params.get("tag")
         if category_id:
             qs = qs.filter(category_id=category_id)
         if tag:
             qs = qs.filter(tags__contains=[tag])
-        return Response(KBArticleSerializer(qs, many=True).data)
+
+        state = qs.order_by().aggregate(last=Max("updated_at"), count=Count("id"))
+        key = kb_cache.list_key(request.user, request.query_params, state["last"], state["count"])
+        etag = _strong_etag(key)
+        not_modified = _not_modified(request, etag)
+        if not_modified:
+            return not_modified
+
+        payload = cache.get(key)
+        if payload is None:
+            paginator = KBArticleCursorPagination()
+            page = paginator.paginate_queryset(qs, request, view=self)
+            payload = paginator.get_paginated_response(KBArticleSummarySerializer(page, many=True).data).data
+            cache.set(key, payload, kb_cache.timeout())
+        return _cached_response(payload, etag)
+
+
+def _category_tree() -> list[dict]:
+    nodes = {}
+    roots = []
+    rows = list(KBCategory.objects.values("id", "name", "parent_id"))
+    for row in rows:
+        nodes[row["id"]] = {"id": row["id"], "name": row["name"], "children": []}
+    for row in rows:
+        parent = nodes.get(row["parent_id"])
+        (parent["children"] if parent else roots).append(nodes[row["id"]])
+    return roots
+
+
+class KBCategoryTreeAPIView(APIView):
+    """The ETag is a hash of the tree itself, so it changes with the categories."""
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        key = kb_cache.tree_key()
+        payload = cache.get(key)
+        if payload is None:
+            payload = {"results": _category_tree()}
+            cache.set(key, payload, kb_cache.timeout())
+        etag = _strong_etag(repr(payload))
+        return _not_modified(request, etag) or _cached_response(payload, etag)
+
+
+class KBArticleSearchAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        query = KBSearchQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        hits = search_articles(
+            _visible_articles_for(request.user),
+            query.validated_data["q"],
+            lang=query.validated_data.get("lang"),
+            limit=query.validated_data["limit"],
+        )
+        articles = KBArticleSummarySerializer([hit.article for hit in hits], many=True).data
+        results = [
+            {
+                **article,
+                "search": {
+                    "score": round(hit.score, 6),
+                    "title": hit.title,
+                    "snippet": hit.snippet,
+                    "fuzzy": hit.fuzzy,
+                },
+            }
+            for article, hit in zip(articles, hits)
+        ]
+        return Response({"results": results})
 
 
 class KBArticleDetailAPIView(APIView):
+    """
+    Access is checked with a query that does not load the body; the body is
+    served from the per-version cache, and a matching If-None-Match gets 304.
+    Both still count as a view.
+    """
+
     permission_classes = [IsAuthenticated]
 
     def get(self, request, pk: int):
-        article = get_object_or_404(_visible_articles_for(request.user), pk=pk)
-        KBViewLog.objects.create(user=request.user, article=article)
-        return Response(KBArticleSerializer(article).data)
+        updated_at = _visible_articles_for(request.user).filter(pk=pk).values_list("updated_at", flat=True).first()
+        if updated_at is None:
+            raise Http404
+        version = kb_cache.current_version()
+        key = kb_cache.article_key(pk, updated_at, version)
+        etag = _strong_etag(key)
+        record_view(request.user.id, pk)
+        not_modified = _not_modified(request, etag)
+        if not_modified:
+            return not_modified
 
+        payload = cache.get(key)
+        if payload is None:
+            article = KBArticle.objects.select_related("category", "created_by").filter(pk=pk).first()
+            if article is None:
+                raise Http404
+            payload = KBArticleSerializer(article).data
+            cache.set(key, payload, kb_cache.timeout())
+        return _cached_response(payload, etag)
 
-class KBReportAPIView(APIView):
-    permission_classes = [IsAuthenticated]
 
-    def _audience_count(self, article: KBArticle) -> int:
-        users = User.objects.filter(is_active=True)
+class _AudienceSizes:
+    """Active users per visibility target, from one grouped query."""
+
+    def __init__(self):
+        self.total = 0
+        self.by_department: dict[int, int] = {}
+        self.by_role: dict[str, int] = {}
+        rows = User.objects.filter(is_active=True).values("department_id", "role__name").annotate(count=Count("id"))
+        for row in rows.order_by():
+            self.total += row["count"]
+            department_id, role_name = row["department_id"], row["role__name"]
+            self.by_department[department_id] = self.by_department.get(department_id, 0) + row["count"]
+            self.by_role[role_name] = self.by_role.get(role_name, 0) + row["count"]
+
+    def for_article(self, article: KBArticle) -> int:
         if article.visibility == KBArticle.Visibility.ALL:
-            return users.count()
+            return self.total
         if article.visibility == KBArticle.Visibility.DEPARTMENT:
-            return users.filter(department_id=article.department_id).count()
+            return self.by_department.get(article.department_id, 0)
         if article.visibility == KBArticle.Visibility.ROLE:
-            return users.filter(role__name=article.role_name).count()
+            return self.by_role.get(article.role_name, 0)
         return 0
 
-    def _serialize_row(self, row, window_start=None):
+
+class KBReportAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def _serialize_row(self, row, audience: _AudienceSizes, window_start=None):
         article = row["article"]
         unique_views = row["unique_views"]
         views = row["views"]
-        audience = self._audience_count(article)
-        percent = round((unique_views / audience) * 100, 2) if audience else 0.0
+        audience_count = audience.for_article(article)
+        percent = round((unique_views / audience_count) * 100, 2) if audience_count else 0.0
         payload = {
             "article_id": article.id,
             "title": article.title,
             "views": views,
             "unique_views": unique_views,
-            "audience_count": audience,
+            "audience_count": audience_count,
             "view_percent": percent,
         }
         if window_start:
             payload["window_start"] = window_start.date().isoformat()
         return payload
 
+    def _articles_page(self, viewers: Q | None, since, audience: _AudienceSizes, *, offset: int, limit: int) -> dict:
+        """Every published article with both windows, most viewed first."""
+        recent = Q(view_days__day__gte=since.date())
+        if viewers is not None:
+            recent &= viewers
+        articles = (
+            KBArticle.objects.filter(is_published=True)
+            .only("id", "title", "visibility", "department_id", "role_name")
+            .annotate(
+                views=Coalesce(Sum("view_days__views", filter=viewers), 0),
+                unique_views=Count("view_days__user", filter=viewers, distinct=True),
+                views_30d=Coalesce(Sum("view_days__views", filter=recent), 0),
+                unique_views_30d=Count("view_days__user", filter=recent, distinct=True),
+            )
+            .order_by("-views", "-id")
+        )
+        results = []
+        for article in articles[offset : offset + limit]:
+            row = self._serialize_row(
+                {"article": article, "views": article.views, "unique_views": article.unique_views}, audience
+            )
+            row["views_30d"] = article.views_30d
+            row["unique_views_30d"] = article.unique_views_30d
+            results.append(row)
+        return {
+            "total_count": KBArticle.objects.filter(is_published=True).count(),
+            "offset": offset,
+            "limit": limit,
+            "results": results,
+        }
+
     def get(self, request):
         if not (AccessPolicy.is_admin_like(request.user) or AccessPolicy.is_teamlead(request.user)):
             return Response({"detail": "Access denied."}, status=403)
+        query = KBReportQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
 
-        base_qs = KBViewLog.objects.select_related("article")
+        base_qs = KBViewDay.objects.all()
+        viewers = None
         if AccessPolicy.is_teamlead(request.user):
-            subordinate_ids = list(request.user.team_members.values_list("id", flat=True))
-            allowed_ids = subordinate_ids + [request.user.id]
-            base_qs = base_qs.filter(user_id__in=allowed_ids)
+            base_qs = base_qs.filter(Q(user__manager=request.user) | Q(user=request.user))
+            viewers = Q(view_days__user__manager=request.user) | Q(view_days__user=request.user)
 
         thirty_days_ago = timezone.now() - timedelta(days=30)
         rows_30 = (
-            base_qs.filter(viewed_at__gte=thirty_days_ago)
+            base_qs.filter(day__gte=thirty_days_ago.date())
             .values("article_id")
-            .annotate(views=Count("id"), unique_views=Count("user_id", distinct=True))
+            .annotate(views=Sum("views"), unique_views=Count("user_id", distinct=True))
             .order_by("-views")[:20]
         )
         rows_all = (
             base_qs.values("article_id")
-            .annotate(views=Count("id"), unique_views=Count("user_id", distinct=True))
+            .annotate(views=Sum("views"), unique_views=Count("user_id", distinct=True))
             .order_by("-views")[:20]
         )
 
@@ -115,17 +300,21 @@ class KBReportAPIView(APIView):
                 id__in={r["article_id"] for r in rows_30} | {r["article_id"] for r in rows_all}
             )
         }
+        audience = _AudienceSizes()
         top_30 = [
-            self._serialize_row({**row, "article": article_map[row["article_id"]]}, window_start=thirty_days_ago)
+            self._serialize_row(
+                {**row, "article": article_map[row["article_id"]]}, audience, window_start=thirty_days_ago
+            )
             for row in rows_30
             if row["article_id"] in article_map
         ]
         top_all = [
-            self._serialize_row({**row, "article": article_map[row["article_id"]]})
+            self._serialize_row({**row, "article": article_map[row["article_id"]]}, audience)
             for row in rows_all
             if row["article_id"] in article_map
         ]
-        return Response({"top_30_days": top_30, "top_all_time": top_all})
+        articles = self._articles_page(viewers, thirty_days_ago, audience, **query.validated_data)
+        return Response({"top_30_days": top_30, "top_all_time": top_all, "articles": articles})
 
 
 class KBCategoryAdminViewSet(ModelViewSet):
@@ -0,0 +1,32 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.metrics.services import take_daily_snapshot
+
+
+class Command(BaseCommand):
+    help = (
+        "Writes the daily metrics snapshot (per user, per team and company-wide). "
+        "Run nightly; defaults to yesterday."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--date", type=date.fromisoformat, help="Day to snapshot (YYYY-MM-DD).")
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=1,
+            help="Snapshot this many days ending at --date (backfill from the current task state).",
+        )
+
+    def handle(self, *args, **options):
+        last = options["date"] or timezone.localdate() - timedelta(days=1)
+        for offset in range(max(options["days"], 1)):
+            result = take_daily_snapshot(last - timedelta(days=offset))
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"metrics_snapshot: date={result.date.isoformat()} users={result.users} teams={result.teams}"
+                )
+            )
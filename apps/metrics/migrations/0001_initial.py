@@ -0,0 +1,45 @@
+# Generated by Django 4.2.30 on 2026-10-19 10:01
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MetricsSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(choices=[('user', 'User'), ('team', 'Team'), ('company', 'Company')], max_length=16)),
+                ('date', models.DateField()),
+                ('team_size', models.PositiveIntegerField(default=1)),
+                ('tasks_created', models.PositiveIntegerField(default=0)),
+                ('tasks_closed', models.PositiveIntegerField(default=0)),
+                ('tasks_overdue', models.PositiveIntegerField(default=0)),
+                ('attendance_percent', models.FloatField(default=0.0)),
+                ('kb_views', models.PositiveIntegerField(default=0)),
+                ('onboarding_percent', models.FloatField(default=0.0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('subject', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='metrics_snapshots', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['date', 'id'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='metricssnapshot',
+            constraint=models.UniqueConstraint(fields=('scope', 'subject', 'date'), name='metrics_snapshot_unique_subject_date'),
+        ),
+        migrations.AddConstraint(
+            model_name='metricssnapshot',
+            constraint=models.UniqueConstraint(condition=models.Q(('subject__isnull', True)), fields=('scope', 'date'), name='metrics_snapshot_unique_company_date'),
+        ),
+    ]
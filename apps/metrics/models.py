@@ -0,0 +1,53 @@
+from django.conf import settings
+from django.db import models
+from django.db.models import Q
+
+
+class MetricsSnapshot(models.Model):
+    """
+    One day of metrics for a user, a manager's direct reports (``team``) or
+    the whole company (``company``, no subject).
+
+    Task counts are per day: created and closed (moved to a done column) on
+    ``date``, and overdue as of that day. Attendance is month-to-date for the
+    month of ``date``; KB views are the day's views; onboarding is the share
+    of active onboarding days completed by interns in scope.
+    """
+
+    class Scope(models.TextChoices):
+        USER = "user", "User"
+        TEAM = "team", "Team"
+        COMPANY = "company", "Company"
+
+    scope = models.CharField(max_length=16, choices=Scope.choices)
+    subject = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="metrics_snapshots",
+    )
+    date = models.DateField()
+    team_size = models.PositiveIntegerField(default=1)
+    tasks_created = models.PositiveIntegerField(default=0)
+    tasks_closed = models.PositiveIntegerField(default=0)
+    tasks_overdue = models.PositiveIntegerField(default=0)
+    attendance_percent = models.FloatField(default=0.0)
+    kb_views = models.PositiveIntegerField(default=0)
+    onboarding_percent = models.FloatField(default=0.0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["date", "id"]
+        constraints = [
+            # Also the index behind range reads: (scope, subject, date BETWEEN ...).
+            models.UniqueConstraint(fields=["scope", "subject", "date"], name="metrics_snapshot_unique_subject_date"),
+            models.UniqueConstraint(
+                fields=["scope", "date"],
+                condition=Q(subject__isnull=True),
+                name="metrics_snapshot_unique_company_date",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.scope}:{self.subject_id or '-'}:{self.date}"
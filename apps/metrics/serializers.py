@@ -0,0 +1,27 @@
+from rest_framework import serializers
+
+from .models import MetricsSnapshot
+from .services import HISTORY_RANGES
+
+
+class MetricsHistoryQuerySerializer(serializers.Serializer):
+    days = serializers.ChoiceField(choices=HISTORY_RANGES, default=30)
+
+
+class MetricsSnapshotTriggerSerializer(serializers.Serializer):
+    date = serializers.DateField(required=False)
+
+
+class MetricsSnapshotSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = MetricsSnapshot
+        fields = (
+            "date",
+            "team_size",
+            "tasks_created",
+            "tasks_closed",
+            "tasks_overdue",
+            "attendance_percent",
+            "kb_views",
+            "onboarding_percent",
+        )
@@ -0,0 +1,276 @@
+from __future__ import annotations
+
+from calendar import monthrange
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Count, IntegerField, Q, Subquery
+from django.utils import timezone
+
+from apps.accounts.models import Role, User
+from apps.attendance.models import AttendanceMark, WorkCalendarDay
+from apps.kb.models import KBViewLog
+from apps.onboarding_core.models import OnboardingDay, OnboardingProgress
+from apps.tasks.models import Task
+
+from .models import MetricsSnapshot
+
+
+HISTORY_RANGES = (7, 30, 90)
+WORKED_STATUSES = (AttendanceMark.Status.PRESENT, AttendanceMark.Status.REMOTE)
+
+
+def _weekdays(year: int, month: int) -> int:
+    return sum(1 for day in range(1, monthrange(year, month)[1] + 1) if date(year, month, day).weekday() < 5)
+
+
+def planned_days(year: int, month: int) -> int:
+    count = WorkCalendarDay.objects.filter(date__year=year, date__month=month, is_working_day=True).count()
+    return count or _weekdays(year, month)
+
+
+class SubqueryCount(Subquery):
+    """``COUNT(*)`` of a queryset as a scalar subquery, so several counts share one round trip."""
+
+    template = "(SELECT COUNT(*) FROM (%(subquery)s) _count)"
+    output_field = IntegerField()
+
+    def __init__(self, queryset, **extra):
+        super().__init__(queryset.order_by().values("pk"), **extra)
+
+
+def _percent(part: int, whole: int) -> float:
+    return round((part / whole) * 100, 2) if whole else 0.0
+
+
+def live_metrics(scope, *, anchor_id: int, now=None) -> dict:
+    """
+    Current metrics for the users in ``scope`` (a User queryset), computed in
+    a single query: every source is filtered by ``scope`` as a subquery, so
+    the SQL does not grow with headcount. ``anchor_id`` is any existing user
+    row (normally the requester) that the scalar subqueries hang off.
+    """
+    now = now or timezone.now()
+    since = now - timedelta(days=7)
+    members = scope.order_by().values("id")
+    interns = scope.filter(role__name=Role.Name.INTERN).order_by().values("id")
+    tasks = Task.objects.filter(assignee_id__in=members)
+    counts = (
+        User.objects.filter(pk=anchor_id)
+        .annotate(
+            m_team_size=SubqueryCount(scope),
+            m_created=SubqueryCount(tasks.filter(created_at__gte=since)),
+            m_closed=SubqueryCount(tasks.filter(updated_at__gte=since, column__is_done=True)),
+            m_overdue=SubqueryCount(tasks.filter(due_date__lt=now.date(), column__is_done=False)),
+            m_worked=SubqueryCount(
+                AttendanceMark.objects.filter(
+                    user_id__in=members,
+                    date__year=now.year,
+                    date__month=now.month,
+                    status__in=WORKED_STATUSES,
+                )
+            ),
+            m_working_days=SubqueryCount(
+                WorkCalendarDay.objects.filter(date__year=now.year, date__month=now.month, is_working_day=True)
+            ),
+            m_kb_views=SubqueryCount(
+                KBViewLog.objects.filter(user_id__in=members, viewed_at__year=now.year, viewed_at__month=now.month)
+            ),
+            m_interns=SubqueryCount(scope.filter(role__name=Role.Name.INTERN)),
+            m_onboarding_days=SubqueryCount(OnboardingDay.objects.filter(is_active=True)),
+            m_onboarding_done=SubqueryCount(
+                OnboardingProgress.objects.filter(
+                    user_id__in=interns,
+                    status=OnboardingProgress.Status.DONE,
+                    day__is_active=True,
+                )
+            ),
+        )
+        .values(
+            "m_team_size",
+            "m_created",
+            "m_closed",
+            "m_overdue",
+            "m_worked",
+            "m_working_days",
+            "m_kb_views",
+            "m_interns",
+            "m_onboarding_days",
+            "m_onboarding_done",
+        )
+        .get()
+    )
+    team_size = counts["m_team_size"]
+    working_days = counts["m_working_days"] or _weekdays(now.year, now.month)
+    return {
+        "team_size": team_size,
+        "tasks_created_7d": counts["m_created"],
+        "tasks_closed_7d": counts["m_closed"],
+        "tasks_overdue": counts["m_overdue"],
+        "attendance_percent_month": _percent(counts["m_worked"], working_days * team_size),
+        "kb_views_month": counts["m_kb_views"],
+        "onboarding_progress_percent": _percent(
+            counts["m_onboarding_done"], counts["m_interns"] * counts["m_onboarding_days"]
+        ),
+    }
+
+
+@dataclass
+class _UserDay:
+    """Raw per-user numbers; percentages are derived per scope from the sums."""
+
+    created: int = 0
+    closed: int = 0
+    overdue: int = 0
+    worked_days: int = 0
+    kb_views: int = 0
+    is_intern: bool = False
+    onboarding_done: int = 0
+
+
+@dataclass(frozen=True)
+class SnapshotResult:
+    date: date
+    users: int
+    teams: int
+
+
+def _day_bounds(day: date) -> tuple[datetime, datetime]:
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return start, start + timedelta(days=1)
+
+
+def _collect(day: date, user_ids: list[int], intern_ids: set[int]) -> dict[int, _UserDay]:
+    """All per-user numbers for ``day`` in one grouped query per source."""
+    start, end = _day_bounds(day)
+    rows = {user_id: _UserDay(is_intern=user_id in intern_ids) for user_id in user_ids}
+
+    created = Q(created_at__gte=start, created_at__lt=end)
+    closed = Q(updated_at__gte=start, updated_at__lt=end, column__is_done=True)
+    overdue = Q(due_date__lt=day, column__is_done=False)
+    task_counts = (
+        Task.objects.filter(assignee_id__isnull=False)
+        .filter(created | closed | overdue)
+        .values("assignee_id")
+        .annotate(
+            created=Count("id", filter=created),
+            closed=Count("id", filter=closed),
+            overdue=Count("id", filter=overdue),
+        )
+        .order_by()
+    )
+    for item in task_counts:
+        row = rows.get(item["assignee_id"])
+        if row is not None:
+            row.created, row.closed, row.overdue = item["created"], item["closed"], item["overdue"]
+
+    worked = (
+        AttendanceMark.objects.filter(
+            date__range=(day.replace(day=1), day.replace(day=monthrange(day.year, day.month)[1])),
+            status__in=WORKED_STATUSES,
+        )
+        .values("user_id")
+        .annotate(total=Count("id"))
+        .order_by()
+    )
+    for item in worked:
+        if item["user_id"] in rows:
+            rows[item["user_id"]].worked_days = item["total"]
+
+    views = (
+        KBViewLog.objects.filter(viewed_at__gte=start, viewed_at__lt=end)
+        .values("user_id")
+        .annotate(total=Count("id"))
+        .order_by()
+    )
+    for item in views:
+        if item["user_id"] in rows:
+            rows[item["user_id"]].kb_views = item["total"]
+
+    if intern_ids:
+        done = (
+            OnboardingProgress.objects.filter(
+                user_id__in=intern_ids,
+                status=OnboardingProgress.Status.DONE,
+                day__is_active=True,
+            )
+            .values("user_id")
+            .annotate(total=Count("id"))
+            .order_by()
+        )
+        for item in done:
+            rows[item["user_id"]].onboarding_done = item["total"]
+    return rows
+
+
+def _snapshot(scope, subject_id, day, members: list[_UserDay], *, planned: int, onboarding_days: int) -> MetricsSnapshot:
+    size = len(members)
+    interns = sum(1 for member in members if member.is_intern)
+    attendance_base = planned * size
+    onboarding_base = interns * onboarding_days
+    return MetricsSnapshot(
+        scope=scope,
+        subject_id=subject_id,
+        date=day,
+        team_size=size,
+        tasks_created=sum(member.created for member in members),
+        tasks_closed=sum(member.closed for member in members),
+        tasks_overdue=sum(member.overdue for member in members),
+        attendance_percent=(
+            round(sum(member.worked_days for member in members) / attendance_base * 100, 2) if attendance_base else 0.0
+        ),
+        kb_views=sum(member.kb_views for member in members),
+        onboarding_percent=(
+            round(sum(member.onboarding_done for member in members) / onboarding_base * 100, 2)
+            if onboarding_base
+            else 0.0
+        ),
+    )
+
+
+@transaction.atomic
+def take_daily_snapshot(day: date | None = None) -> SnapshotResult:
+    """
+    Write user, team and company rows for ``day`` (default: yesterday).
+    Re-running for the same day replaces its rows.
+    """
+    day = day or timezone.localdate() - timedelta(days=1)
+    users = list(
+        User.objects.filter(is_active=True)
+        .exclude(role__name=Role.Name.SUPER_ADMIN)
+        .values_list("id", "manager_id", "role__name")
+    )
+    intern_ids = {user_id for user_id, _, role_name in users if role_name == Role.Name.INTERN}
+    rows = _collect(day, [user_id for user_id, _, _ in users], intern_ids)
+    totals = {
+        "planned": planned_days(day.year, day.month),
+        "onboarding_days": OnboardingDay.objects.filter(is_active=True).count(),
+    }
+
+    teams: dict[int, list[_UserDay]] = {}
+    for user_id, manager_id, _ in users:
+        if manager_id:
+            teams.setdefault(manager_id, []).append(rows[user_id])
+
+    snapshots = [
+        _snapshot(MetricsSnapshot.Scope.USER, user_id, day, [row], **totals) for user_id, row in rows.items()
+    ]
+    snapshots += [
+        _snapshot(MetricsSnapshot.Scope.TEAM, manager_id, day, members, **totals) for manager_id, members in teams.items()
+    ]
+    snapshots.append(_snapshot(MetricsSnapshot.Scope.COMPANY, None, day, list(rows.values()), **totals))
+
+    MetricsSnapshot.objects.filter(date=day).delete()
+    MetricsSnapshot.objects.bulk_create(snapshots, batch_size=1000)
+    return SnapshotResult(date=day, users=len(rows), teams=len(teams))
+
+
+def snapshot_history(scope: str, subject_id: int | None, days: int, *, until: date | None = None):
+    """Rows for the last ``days`` days up to ``until`` (default: yesterday), oldest first."""
+    until = until or timezone.localdate() - timedelta(days=1)
+    return MetricsSnapshot.objects.filter(
+        scope=scope,
+        subject_id=subject_id,
+        date__range=(until - timedelta(days=days - 1), until),
+    ).order_by("date")
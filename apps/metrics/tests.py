@@ -1,7 +1,16 @@
+from datetime import timedelta
+
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from rest_framework.test import APIClient
 
-from apps.accounts.models import Role, User
+from apps.accounts.models import Permission, Role, User
+from apps.tasks.models import Board, Column, Task
+
+from .models import MetricsSnapshot
+from .services import take_daily_snapshot
 
 
 class MetricsApiTests(TestCase):
@@ -38,3 +47,94 @@ class MetricsApiTests(TestCase):
         response = self.client.get("/api/v1/metrics/team/")
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.data["team_size"], 1)
+
+    def test_task_counts_use_done_columns_in_one_query(self):
+        board = Board.objects.create(name="metrics", is_personal=True, created_by=self.member)
+        todo = Column.objects.create(board=board, name="Новые", order=1)
+        done = Column.objects.create(board=board, name="Готово", order=2, is_done=True)
+        yesterday = timezone.localdate() - timedelta(days=1)
+        common = {"board": board, "assignee": self.member, "reporter": self.teamlead}
+        Task.objects.create(column=todo, title="Overdue", due_date=yesterday, **common)
+        Task.objects.create(column=done, title="Closed late", due_date=yesterday, **common)
+        Task.objects.create(column=done, title="Closed", **common)
+        Task.objects.create(column=todo, title="Open", **common)
+
+        self.client.force_authenticate(self.member)
+        response = self.client.get("/api/v1/metrics/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["tasks_created_7d"], 4)
+        self.assertEqual(response.data["tasks_closed_7d"], 2)
+        self.assertEqual(response.data["tasks_overdue"], 1)
+
+        permission, _ = Permission.objects.get_or_create(
+            codename="metrics.view_team",
+            defaults={"module": "metrics", "description": "View team performance metrics"},
+        )
+        self.teamlead_role.permissions.add(permission)
+        self.client.force_authenticate(self.teamlead)
+        response = self.client.get("/api/v1/metrics/team/")
+        self.assertEqual(response.data["tasks_closed_7d"], 2)
+        self.assertEqual(response.data["tasks_overdue"], 1)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get("/api/v1/metrics/team/")
+        metric_queries = [query["sql"] for query in queries if '"tasks_task"' in query["sql"]]
+        self.assertEqual(len(metric_queries), 1)
+        self.assertIn('"kb_kbviewlog"', metric_queries[0])
+
+        User.objects.bulk_create(
+            [User(username=f"metrics_extra_{idx}", role=self.employee_role, manager=self.teamlead) for idx in range(25)]
+        )
+        with CaptureQueriesContext(connection) as larger:
+            response = self.client.get("/api/v1/metrics/team/")
+        self.assertEqual(response.data["team_size"], 26)
+        self.assertEqual(len(larger), len(queries))
+        # The member scope is a subquery, not an id list that grows with headcount.
+        self.assertEqual(
+            [len(query["sql"]) for query in larger if '"tasks_task"' in query["sql"]],
+            [len(sql) for sql in metric_queries],
+        )
+
+    def test_daily_snapshot_writes_user_team_and_company_rows(self):
+        board = Board.objects.create(name="snap", is_personal=True, created_by=self.member)
+        done = Column.objects.create(board=board, name="Готово", order=1, is_done=True)
+        todo = Column.objects.create(board=board, name="Новые", order=2)
+        today = timezone.localdate()
+        common = {"board": board, "assignee": self.member, "reporter": self.teamlead}
+        Task.objects.create(column=todo, title="Late", due_date=today - timedelta(days=3), **common)
+        Task.objects.create(column=done, title="Closed", **common)
+
+        with self.assertNumQueries(10):
+            result = take_daily_snapshot(today)
+        self.assertEqual((result.users, result.teams), (2, 1))
+
+        member_row = MetricsSnapshot.objects.get(scope=MetricsSnapshot.Scope.USER, subject=self.member, date=today)
+        self.assertEqual((member_row.tasks_created, member_row.tasks_closed, member_row.tasks_overdue), (2, 1, 1))
+        team_row = MetricsSnapshot.objects.get(scope=MetricsSnapshot.Scope.TEAM, subject=self.teamlead, date=today)
+        self.assertEqual((team_row.team_size, team_row.tasks_created), (1, 2))
+        company_row = MetricsSnapshot.objects.get(scope=MetricsSnapshot.Scope.COMPANY, subject=None, date=today)
+        self.assertEqual(company_row.team_size, 2)
+
+        take_daily_snapshot(today)
+        self.assertEqual(MetricsSnapshot.objects.filter(date=today).count(), 4)
+
+    def test_history_returns_requested_range(self):
+        yesterday = timezone.localdate() - timedelta(days=1)
+        for offset in (0, 6, 7, 40):
+            MetricsSnapshot.objects.create(
+                scope=MetricsSnapshot.Scope.USER,
+                subject=self.member,
+                date=yesterday - timedelta(days=offset),
+                tasks_created=offset,
+            )
+        self.client.force_authenticate(self.member)
+
+        response = self.client.get("/api/v1/metrics/history/", {"days": 7})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row["tasks_created"] for row in response.data["results"]], [6, 0])
+        response = self.client.get("/api/v1/metrics/history/", {"days": 90})
+        self.assertEqual(len(response.data["results"]), 4)
+        self.assertEqual(self.client.get("/api/v1/metrics/history/", {"days": 8}).status_code, 400)
+
+        self.assertEqual(self.client.get("/api/v1/metrics/team/history/").status_code, 403)
+        self.assertEqual(self.client.post("/api/v1/metrics/snapshots/", {}, format="json").status_code, 403)
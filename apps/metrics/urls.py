@@ -1,9 +1,18 @@
 from django.urls import path
 
-from .views import MetricsMyAPIView, MetricsTeamAPIView
+from .views import (
+    MetricsMyAPIView,
+    MetricsMyHistoryAPIView,
+    MetricsSnapshotAPIView,
+    MetricsTeamAPIView,
+    MetricsTeamHistoryAPIView,
+)
 
 
 urlpatterns = [
     path("", MetricsMyAPIView.as_view(), name="metrics-my"),
+    path("history/", MetricsMyHistoryAPIView.as_view(), name="metrics-my-history"),
     path("team/", MetricsTeamAPIView.as_view(), name="metrics-team"),
+    path("team/history/", MetricsTeamHistoryAPIView.as_view(), name="metrics-team-history"),
+    path("snapshots/", MetricsSnapshotAPIView.as_view(), name="metrics-snapshots"),
 ]
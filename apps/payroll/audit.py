@@ -42,6 +42,35 @@ class PayrollAuditService:
             },
         )
 
+    @classmethod
+    def log_run_started(cls, request, run) -> None:
+        log_event(
+            action=AuditEvents.PAYROLL_RUN_STARTED,
+            actor=request.user,
+            object_type="payroll_run",
+            object_id=str(run.id),
+            category="content",
+            ip_address=cls._ip(request),
+            metadata={"month": run.month.isoformat(), "hours_source": run.hours_source},
+        )
+
+    @staticmethod
+    def log_run_completed(run) -> None:
+        log_event(
+            action=AuditEvents.PAYROLL_PERIOD_GENERATED,
+            actor=run.requested_by,
+            object_type="payroll_month",
+            object_id=f"{run.month.year}-{run.month.month:02d}",
+            category="content",
+            metadata={
+                "year": run.month.year,
+                "month": run.month.month,
+                "run_id": run.id,
+                "entries_created": run.entries_created,
+                "entries_updated": run.entries_updated,
+            },
+        )
+
     @classmethod
     def log_period_status_changed(cls, request, record, previous_status: str) -> None:
         log_event(
@@ -0,0 +1,311 @@
+"""
+Streaming payroll register (CSV/XLSX) and payslip archive.
+
+Everything is produced as a generator of byte chunks: rows come from
+``.iterator()``, XLSX and ZIP archives are written through a non-seekable
+buffer that is drained after every member write, and payslips are rendered
+one bounded batch at a time, inline or in a shared process pool.
+"""
+
+from __future__ import annotations
+
+import csv
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal
+from html import escape
+from itertools import islice
+from xml.sax.saxutils import escape as xml_escape
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+
+from .models import PayrollCompensation
+from .services import PayrollService, month_bounds
+
+
+User = get_user_model()
+EXPORT_CHUNK_SIZE = 2000
+
+REGISTER_FIELDS = (
+    "user_id",
+    "username",
+    "full_name",
+    "department",
+    "month",
+    "pay_type",
+    "hourly_rate",
+    "minute_rate",
+    "fixed_salary",
+    "total_hours",
+    "bonus",
+    "total_salary",
+    "status",
+    "paid_at",
+)
+_NUMERIC_FIELDS = {"user_id", "hourly_rate", "minute_rate", "fixed_salary", "total_hours", "bonus", "total_salary"}
+
+
+def register_rows(records_qs):
+    """Yield register rows as dicts; one streamed query, no model instances."""
+    rows = records_qs.order_by("user_id").values_list(
+        "user_id",
+        "user__username",
+        "user__first_name",
+        "user__last_name",
+        "user__department__name",
+        "month",
+        "user__payroll_compensation__pay_type",
+        "user__payroll_compensation__hourly_rate",
+        "user__payroll_compensation__minute_rate",
+        "user__payroll_compensation__fixed_salary",
+        "user__current_hourly_rate",
+        "total_hours",
+        "bonus",
+        "total_salary",
+        "status",
+        "paid_at",
+    )
+    for (
+        user_id,
+        username,
+        first_name,
+        last_name,
+        department,
+        month,
+        pay_type,
+        hourly_rate,
+        minute_rate,
+        fixed_salary,
+        current_hourly_rate,
+        total_hours,
+        bonus,
+        total_salary,
+        status,
+        paid_at,
+    ) in rows.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield {
+            "user_id": user_id,
+            "username": username,
+            "full_name": f"{first_name} {last_name}".strip(),
+            "department": department or "",
+            "month": month.isoformat(),
+            "pay_type": pay_type or PayrollCompensation.PayType.HOURLY,
+            "hourly_rate": hourly_rate if pay_type else current_hourly_rate,
+            "minute_rate": minute_rate or Decimal("0.00"),
+            "fixed_salary": fixed_salary or Decimal("0.00"),
+            "total_hours": total_hours,
+            "bonus": bonus,
+            "total_salary": total_salary,
+            "status": status,
+            "paid_at": paid_at.isoformat() if paid_at else "",
+        }
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def iter_register_csv(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(REGISTER_FIELDS).encode("utf-8-sig")
+    for row in rows:
+        yield writer.writerow([row[name] for name in REGISTER_FIELDS]).encode("utf-8")
+
+
+class _ZipStream:
+    """Write-only, non-seekable sink for ZipFile; ``drain`` hands out what was written so far."""
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+        self._position = 0
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+_XLSX_STATIC = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        "</Types>"
+    ),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        "</Relationships>"
+    ),
+    "xl/workbook.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Payroll" sheetId="1" r:id="rId1"/></sheets>'
+        "</workbook>"
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        "</Relationships>"
+    ),
+}
+
+
+def _xlsx_cell(value, numeric: bool) -> str:
+    if numeric and value not in (None, ""):
+        return f"<c><v>{value}</v></c>"
+    return f'<c t="inlineStr"><is><t>{xml_escape(str(value if value is not None else ""))}</t></is></c>'
+
+
+def iter_register_xlsx(rows, *, rows_per_flush: int = 500):
+    """Minimal single-sheet XLSX with inline strings, streamed row by row."""
+    stream = _ZipStream()
+    with zipfile.ZipFile(stream, mode="w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, content in _XLSX_STATIC.items():
+            archive.writestr(name, content)
+        yield stream.drain()
+
+        with archive.open("xl/worksheets/sheet1.xml", mode="w") as sheet:
+            sheet.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+            )
+            header = "".join(_xlsx_cell(name, False) for name in REGISTER_FIELDS)
+            sheet.write(f"<row>{header}</row>".encode("utf-8"))
+            pending = []
+            for row in rows:
+                cells = "".join(_xlsx_cell(row[name], name in _NUMERIC_FIELDS) for name in REGISTER_FIELDS)
+                pending.append(f"<row>{cells}</row>")
+                if len(pending) >= rows_per_flush:
+                    sheet.write("".join(pending).encode("utf-8"))
+                    pending = []
+                    yield stream.drain()
+            if pending:
+                sheet.write("".join(pending).encode("utf-8"))
+            sheet.write(b"</sheetData></worksheet>")
+        yield stream.drain()
+    yield stream.drain()
+
+
+def payslip_contexts(records_qs, *, year: int, month: int):
+    """
+    Plain-dict payslip inputs (picklable for the process pool). Rate history
+    for all exported users comes from one query and is split per user.
+    """
+    period_start, period_end = month_bounds(year, month)
+    user_ids = records_qs.values("user_id")
+    rate_points = PayrollService.load_rate_points(User.objects.filter(id__in=user_ids), period_end=period_end)
+    for row in register_rows(records_qs):
+        segments = PayrollService._segments_from_points(
+            rate_points.get(row["user_id"], []),
+            period_start=period_start,
+            period_end=period_end,
+            base_hourly_rate=row["hourly_rate"] or Decimal("0.00"),
+        )
+        yield {
+            **{key: str(value) for key, value in row.items()},
+            "rate_segments": [(start.isoformat(), end.isoformat(), str(rate)) for start, end, rate in segments],
+        }
+
+
+def render_payslip(context: dict) -> tuple[str, bytes]:
+    """Render one payslip as a self-contained printable HTML document."""
+    segments = "".join(
+        f"<tr><td>{escape(start)}</td><td>{escape(end)}</td><td>{escape(rate)}</td></tr>"
+        for start, end, rate in context["rate_segments"]
+    )
+    lines = "".join(
+        f"<tr><th>{escape(label)}</th><td>{escape(context[key])}</td></tr>"
+        for label, key in (
+            ("Employee", "full_name"),
+            ("Username", "username"),
+            ("Department", "department"),
+            ("Month", "month"),
+            ("Pay type", "pay_type"),
+            ("Hours", "total_hours"),
+            ("Bonus", "bonus"),
+            ("Total", "total_salary"),
+            ("Status", "status"),
+        )
+    )
+    html = (
+        '<!DOCTYPE html><html><head><meta charset="utf-8">'
+        f"<title>Payslip {escape(context['username'])} {escape(context['month'])}</title></head><body>"
+        f"<h1>Payslip {escape(context['month'][:7])}</h1><table>{lines}</table>"
+        f"<h2>Rates</h2><table><tr><th>From</th><th>To</th><th>Rate</th></tr>{segments}</table>"
+        "</body></html>"
+    )
+    filename = f"payslip-{context['month'][:7]}-{context['user_id']}-{context['username']}.html"
+    return filename, html.encode("utf-8")
+
+
+def _workers() -> int:
+    return max(0, int(getattr(settings, "PAYROLL_EXPORT_WORKERS", 0)))
+
+
+_pool: ProcessPoolExecutor | None = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def _shared_pool(workers: int) -> ProcessPoolExecutor:
+    """One process pool per worker process, shared by every export request."""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers or getattr(_pool, "_broken", False):
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(max_workers=workers)
+            _pool_workers = workers
+        return _pool
+
+
+def iter_payslips_zip(contexts, *, batch_size: int = 200):
+    """
+    Render payslips in bounded batches (in the request worker, or in the shared
+    process pool when PAYROLL_EXPORT_WORKERS > 0) and stream the ZIP; only one
+    batch of documents is held in memory.
+    """
+    workers = _workers()
+    pool = _shared_pool(workers) if workers else None
+    stream = _ZipStream()
+    with zipfile.ZipFile(stream, mode="w", compression=zipfile.ZIP_DEFLATED) as archive:
+        contexts = iter(contexts)
+        while True:
+            batch = list(islice(contexts, batch_size))
+            if not batch:
+                break
+            if pool:
+                rendered = pool.map(render_payslip, batch, chunksize=max(1, len(batch) // (workers * 4)))
+            else:
+                rendered = map(render_payslip, batch)
+            for filename, content in rendered:
+                archive.writestr(filename, content)
+            yield stream.drain()
+    yield stream.drain()
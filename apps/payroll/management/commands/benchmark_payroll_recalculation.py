@@ -0,0 +1,101 @@
+import math
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from apps.accounts.models import Role, User
+from apps.payroll.models import PayrollCompensation, PayrollRecord
+from apps.payroll.services import RECALCULATE_CHUNK_SIZE, PayrollService
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark set-based payroll recalculation and assert the query count does not "
+        "depend on headcount. Runs inside a rolled-back transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--employees", type=int, default=10_000)
+        parser.add_argument("--chunk-size", type=int, default=RECALCULATE_CHUNK_SIZE)
+        parser.add_argument("--year", type=int, default=2030)
+        parser.add_argument("--month", type=int, default=1)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._run(options)
+                raise _Rollback()
+        except _Rollback:
+            pass
+
+    @staticmethod
+    def _batches(model, fields, count, chunk_size):
+        objs = [model()] if count else []
+        max_batch = max(connection.ops.bulk_batch_size(fields, objs), 1)
+        return math.ceil(count / min(chunk_size, max_batch)) if count else 0
+
+    def _run(self, options):
+        employees = options["employees"]
+        chunk_size = options["chunk_size"]
+        role, _ = Role.objects.get_or_create(name=Role.Name.EMPLOYEE, defaults={"level": Role.Level.EMPLOYEE})
+        users = User.objects.bulk_create(
+            [
+                User(username=f"bench_payroll_{idx}", role=role, current_hourly_rate=Decimal("100.00") + idx % 50)
+                for idx in range(employees)
+            ],
+            batch_size=1000,
+        )
+        # Half of the staff already has compensation, the rest gets defaults inside the run.
+        fixed, hourly = PayrollCompensation.PayType.FIXED_SALARY, PayrollCompensation.PayType.HOURLY
+        PayrollCompensation.objects.bulk_create(
+            [
+                PayrollCompensation(
+                    user=user,
+                    pay_type=fixed if idx % 3 == 0 else hourly,
+                    hourly_rate=user.current_hourly_rate,
+                    fixed_salary=Decimal("50000.00"),
+                )
+                for idx, user in enumerate(users)
+                if idx % 2 == 0
+            ],
+            batch_size=1000,
+        )
+        total_users = PayrollService.payroll_users().count()
+        missing_comps = total_users - PayrollCompensation.objects.filter(user__in=PayrollService.payroll_users()).count()
+
+        for label in ("first_run", "second_run"):
+            with CaptureQueriesContext(connection) as ctx:
+                started = time.perf_counter()
+                result = PayrollService.recalculate_month(
+                    year=options["year"],
+                    month=options["month"],
+                    chunk_size=chunk_size,
+                )
+                elapsed = time.perf_counter() - started
+
+            comp_fields = [f for f in PayrollCompensation._meta.concrete_fields if not f.primary_key]
+            record_fields = [f for f in PayrollRecord._meta.concrete_fields if not f.primary_key]
+            expected = (
+                3  # users, compensations, existing bonuses
+                + self._batches(PayrollCompensation, comp_fields, missing_comps, chunk_size)
+                + self._batches(PayrollRecord, record_fields, total_users, chunk_size)
+                + 3  # month summary: grouped aggregate, delete, insert
+            )
+            # SAVEPOINT / RELEASE around the atomic block.
+            queries = len([q for q in ctx.captured_queries if "SAVEPOINT" not in q["sql"].upper()])
+            self.stdout.write(
+                f"{label}: employees={total_users} created={result.created} updated={result.updated} "
+                f"time={elapsed:.2f}s queries={queries} expected={expected}"
+            )
+            if queries != expected:
+                raise CommandError(f"Query count {queries} differs from expected {expected}.")
+            missing_comps = 0
+
+        self.stdout.write(self.style.SUCCESS("benchmark finished, data rolled back"))
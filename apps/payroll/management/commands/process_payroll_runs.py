@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.payroll.runs import process_run, resumable_runs
+
+
+class Command(BaseCommand):
+    help = (
+        "Processes pending payroll runs and resumes runs whose worker died "
+        "(stale heartbeat) from their last checkpoint."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--run-id", type=int, help="Process only this run.")
+        parser.add_argument("--retry-failed", action="store_true", help="Also resume failed runs.")
+        parser.add_argument("--loop", action="store_true", help="Keep polling for new runs.")
+        parser.add_argument("--interval", type=float, default=5.0, help="Polling interval in seconds for --loop.")
+
+    def handle(self, *args, **options):
+        while True:
+            processed = self._process_once(options)
+            if not options["loop"]:
+                break
+            if not processed:
+                time.sleep(options["interval"])
+
+    def _process_once(self, options) -> int:
+        include_failed = options["retry_failed"]
+        run_ids = list(resumable_runs(include_failed=include_failed).values_list("id", flat=True))
+        if options["run_id"]:
+            run_ids = [run_id for run_id in run_ids if run_id == options["run_id"]]
+
+        processed = 0
+        for run_id in run_ids:
+            run = process_run(run_id, include_failed=include_failed)
+            if run is None:
+                continue
+            processed += 1
+            self.stdout.write(
+                f"payroll_run id={run.id} month={run.month.isoformat()} status={run.status} "
+                f"processed={run.processed_users}/{run.total_users} chunks={len(run.chunks)}"
+            )
+        if not options["loop"]:
+            self.stdout.write(self.style.SUCCESS(f"payroll_runs_processed={processed}"))
+        return processed
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.payroll.services import PayrollService
+
+
+class Command(BaseCommand):
+    help = "Pre-creates empty payroll records for every payroll user in a month (defaults to the current month)."
+
+    def add_arguments(self, parser):
+        today = timezone.localdate()
+        parser.add_argument("--year", type=int, default=today.year)
+        parser.add_argument("--month", type=int, default=today.month)
+        parser.add_argument("--chunk-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        created = PayrollService.warm_up_month(
+            year=options["year"],
+            month=options["month"],
+            chunk_size=options["chunk_size"],
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f"payroll_warm_up: month={options['year']}-{options['month']:02d} created={created}")
+        )
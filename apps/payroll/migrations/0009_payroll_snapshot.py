@@ -0,0 +1,34 @@
+# Generated by Django 4.2.30 on 2026-10-19 09:25
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payroll', '0008_payroll_run'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PayrollSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of payroll month')),
+                ('row_count', models.PositiveIntegerField(default=0)),
+                ('user_ids', models.BinaryField()),
+                ('total_salary', models.BinaryField()),
+                ('bonus', models.BinaryField()),
+                ('total_hours', models.BinaryField()),
+                ('pay_types', models.BinaryField()),
+                ('rates', models.BinaryField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('run', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='snapshot', to='payroll.payrollrun')),
+            ],
+            options={
+                'ordering': ['-created_at', '-id'],
+                'indexes': [models.Index(fields=['month', '-created_at'], name='payroll_pay_month_ef70d9_idx')],
+            },
+        ),
+    ]
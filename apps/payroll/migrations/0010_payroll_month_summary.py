@@ -0,0 +1,74 @@
+# Generated by Django 4.2.30 on 2026-10-19 09:27
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+import django.db.models.deletion
+
+
+def forwards(apps, schema_editor):
+    PayrollRecord = apps.get_model("payroll", "PayrollRecord")
+    PayrollMonthSummary = apps.get_model("payroll", "PayrollMonthSummary")
+    rows = (
+        PayrollRecord.objects.exclude(user__role__name="INTERN")
+        .order_by()
+        .values("month", "user__department_id")
+        .annotate(
+            employees=Count("id"),
+            paid_employees=Count("id", filter=Q(status="paid")),
+            payroll_fund=Sum("total_salary"),
+            total_bonus=Sum("bonus"),
+            total_hours=Sum("total_hours"),
+        )
+    )
+    PayrollMonthSummary.objects.bulk_create(
+        [
+            PayrollMonthSummary(
+                month=row["month"],
+                department_id=row["user__department_id"],
+                employees=row["employees"],
+                paid_employees=row["paid_employees"],
+                payroll_fund=row["payroll_fund"] or 0,
+                total_bonus=row["total_bonus"] or 0,
+                total_hours=row["total_hours"] or 0,
+            )
+            for row in rows
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0012_user_notes'),
+        ('payroll', '0009_payroll_snapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PayrollMonthSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of payroll month')),
+                ('employees', models.PositiveIntegerField(default=0)),
+                ('paid_employees', models.PositiveIntegerField(default=0)),
+                ('payroll_fund', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_bonus', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_hours', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('department', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='payroll_month_summaries', to='accounts.department')),
+            ],
+            options={
+                'ordering': ['month', 'department_id'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='payrollmonthsummary',
+            constraint=models.UniqueConstraint(fields=('month', 'department'), name='payroll_unique_summary_month_department'),
+        ),
+        migrations.AddConstraint(
+            model_name='payrollmonthsummary',
+            constraint=models.UniqueConstraint(condition=models.Q(('department__isnull', True)), fields=('month',), name='payroll_unique_summary_month_no_department'),
+        ),
+        migrations.RunPython(forwards, migrations.RunPython.noop),
+    ]
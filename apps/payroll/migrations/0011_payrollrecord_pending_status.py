@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 10:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payroll', '0010_payroll_month_summary'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='payrollrecord',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('calculated', 'Calculated'), ('paid', 'Paid')], default='calculated', max_length=20),
+        ),
+    ]
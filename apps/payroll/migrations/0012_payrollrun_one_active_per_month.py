@@ -0,0 +1,35 @@
+# Generated by Django 4.2.30 on 2026-10-19 11:17
+
+from django.db import migrations, models
+
+
+def fail_duplicate_active_runs(apps, schema_editor):
+    # Keep the newest pending/running run of each month; older ones were
+    # duplicates the recalculate endpoint could start concurrently.
+    PayrollRun = apps.get_model("payroll", "PayrollRun")
+    seen = set()
+    duplicates = []
+    for run_id, month in (
+        PayrollRun.objects.filter(status__in=["pending", "running"])
+        .order_by("month", "-created_at", "-id")
+        .values_list("id", "month")
+    ):
+        if month in seen:
+            duplicates.append(run_id)
+        seen.add(month)
+    PayrollRun.objects.filter(id__in=duplicates).update(status="failed", error="Superseded by a newer run.")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payroll', '0011_payrollrecord_pending_status'),
+    ]
+
+    operations = [
+        migrations.RunPython(fail_duplicate_active_runs, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='payrollrun',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['pending', 'running'])), fields=('month',), name='payroll_run_one_active_per_month'),
+        ),
+    ]
@@ -1,6 +1,15 @@
 from django.conf import settings
 from django.core.validators import MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, Q, Sum
+
+from apps.accounts.models import Role, User
+
+
+class HoursSource(models.TextChoices):
+    NORM = "norm", "Fixed monthly norm"
+    ATTENDANCE = "attendance", "Attendance marks"
+    CALENDAR = "calendar", "Work calendar"
 
 
 class PayrollCompensation(models.Model):
@@ -55,6 +64,8 @@ class HourlyRateHistory(models.Model):
 
 class PayrollRecord(models.Model):
     class Status(models.TextChoices):
+        # Placeholder created by warm-up; the next calculation replaces it.
+        PENDING = "pending", "Pending"
         CALCULATED = "calculated", "Calculated"
         PAID = "paid", "Paid"
 
@@ -84,5 +95,222 @@ class PayrollRecord(models.Model):
             models.UniqueConstraint(fields=["user", "month"], name="payroll_unique_record_user_month"),
         ]
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        PayrollMonthSummary.refresh_for_user(self.month, self.user_id)
+
+    def delete(self, *args, **kwargs):
+        month, user_id = self.month, self.user_id
+        result = super().delete(*args, **kwargs)
+        PayrollMonthSummary.refresh_for_user(month, user_id)
+        return result
+
     def __str__(self):
         return f"{self.user_id}:{self.month}:{self.total_salary}"
+
+
+class PayrollMonthSummary(models.Model):
+    """
+    Payroll fund per month and department (NULL = no department), interns
+    and not yet calculated (pending) records excluded. Rebuilt after recalculation, on single-record changes and when
+    a user's department or role changes; bulk writes must call ``refresh``
+    themselves.
+    """
+
+    month = models.DateField(help_text="First day of payroll month")
+    department = models.ForeignKey(
+        "accounts.Department",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="payroll_month_summaries",
+    )
+    employees = models.PositiveIntegerField(default=0)
+    paid_employees = models.PositiveIntegerField(default=0)
+    payroll_fund = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_bonus = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_hours = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["month", "department_id"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["month", "department"],
+                name="payroll_unique_summary_month_department",
+            ),
+            models.UniqueConstraint(
+                fields=["month"],
+                condition=Q(department__isnull=True),
+                name="payroll_unique_summary_month_no_department",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.month}:{self.department_id}:{self.payroll_fund}"
+
+    @staticmethod
+    def _scopes(department_ids) -> tuple[Q, Q]:
+        """(summary filter, record filter) for ``department_ids``; None inside means no department."""
+        ids = {department_id for department_id in department_ids if department_id is not None}
+        scope = Q(department_id__in=ids)
+        record_scope = Q(user__department_id__in=ids)
+        if None in department_ids:
+            scope |= Q(department__isnull=True)
+            record_scope |= Q(user__department__isnull=True)
+        return scope, record_scope
+
+    @classmethod
+    def compute(cls, month, *, department_ids=None) -> list["PayrollMonthSummary"]:
+        """
+        Unsaved summaries of the month (or only ``department_ids``; None
+        inside the list means users without a department) from one grouped
+        aggregate.
+        """
+        records = (
+            PayrollRecord.objects.filter(month=month)
+            .exclude(user__role__name=Role.Name.INTERN)
+            .exclude(status=PayrollRecord.Status.PENDING)
+        )
+        if department_ids is not None:
+            records = records.filter(cls._scopes(department_ids)[1])
+        rows = (
+            records.order_by()
+            .values("user__department_id")
+            .annotate(
+                employees=Count("id"),
+                paid_employees=Count("id", filter=Q(status=PayrollRecord.Status.PAID)),
+                payroll_fund=Sum("total_salary"),
+                total_bonus=Sum("bonus"),
+                total_hours=Sum("total_hours"),
+            )
+        )
+        return [
+            cls(
+                month=month,
+                department_id=row["user__department_id"],
+                employees=row["employees"],
+                paid_employees=row["paid_employees"],
+                payroll_fund=row["payroll_fund"] or 0,
+                total_bonus=row["total_bonus"] or 0,
+                total_hours=row["total_hours"] or 0,
+            )
+            for row in rows
+        ]
+
+    @classmethod
+    def refresh(cls, month, *, department_ids=None) -> list["PayrollMonthSummary"]:
+        """Recompute and store the month (or only ``department_ids``, as in ``compute``)."""
+        existing = cls.objects.filter(month=month)
+        if department_ids is not None:
+            existing = existing.filter(cls._scopes(department_ids)[0])
+        summaries = cls.compute(month, department_ids=department_ids)
+        with transaction.atomic():
+            existing.delete()
+            cls.objects.bulk_create(summaries)
+        return summaries
+
+    @classmethod
+    def refresh_for_user(cls, month, user_id) -> None:
+        department_id = User.objects.filter(id=user_id).values_list("department_id", flat=True).first()
+        cls.refresh(month, department_ids=[department_id])
+
+    @classmethod
+    def refresh_for_user_change(cls, user_id, department_ids) -> None:
+        """Rebuild ``department_ids`` (old and new) in every month the user has a record."""
+        months = PayrollRecord.objects.filter(user_id=user_id).values_list("month", flat=True).order_by("month")
+        for month in months:
+            cls.refresh(month, department_ids=list(department_ids))
+
+
+class PayrollRun(models.Model):
+    """
+    Background recalculation of one payroll month. Users are processed in
+    id order; ``last_user_id`` is the checkpoint a resumed run continues from.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        RUNNING = "running", "Running"
+        COMPLETED = "completed", "Completed"
+        FAILED = "failed", "Failed"
+
+    month = models.DateField(help_text="First day of payroll month")
+    hours_source = models.CharField(max_length=20, choices=HoursSource.choices, default=HoursSource.NORM)
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="payroll_runs",
+    )
+    chunk_size = models.PositiveIntegerField(default=1000)
+    total_users = models.PositiveIntegerField(default=0)
+    processed_users = models.PositiveIntegerField(default=0)
+    entries_created = models.PositiveIntegerField(default=0)
+    entries_updated = models.PositiveIntegerField(default=0)
+    last_user_id = models.PositiveBigIntegerField(default=0)
+    chunks = models.JSONField(default=list, blank=True)
+    error = models.TextField(blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-created_at", "-id"]
+        indexes = [
+            models.Index(fields=["status", "heartbeat_at"]),
+            models.Index(fields=["month", "-created_at"]),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["month"],
+                condition=Q(status__in=["pending", "running"]),
+                name="payroll_run_one_active_per_month",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.month}:{self.status}"
+
+
+class PayrollSnapshot(models.Model):
+    """
+    Immutable result of a payroll run in columnar form: each column is a
+    packed little-endian int64 array (amounts in cents), aligned by position
+    and sorted by user id. See ``apps.payroll.snapshots``.
+    """
+
+    run = models.OneToOneField(
+        PayrollRun,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="snapshot",
+    )
+    month = models.DateField(help_text="First day of payroll month")
+    row_count = models.PositiveIntegerField(default=0)
+    user_ids = models.BinaryField()
+    total_salary = models.BinaryField()
+    bonus = models.BinaryField()
+    total_hours = models.BinaryField()
+    pay_types = models.BinaryField()
+    rates = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-created_at", "-id"]
+        indexes = [
+            models.Index(fields=["month", "-created_at"]),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Payroll snapshots are immutable.")
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.month}:{self.row_count}"
@@ -0,0 +1,252 @@
+"""
+Background payroll runs.
+
+A run is claimed by one worker at a time (conditional UPDATE), processes
+users in id order and commits each chunk together with its checkpoint, so
+a crashed run resumes from the last committed chunk instead of starting over.
+A month has at most one pending or running run (partial unique constraint);
+``start_or_resume_run`` re-dispatches it when its worker is gone.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .audit import PayrollAuditService
+from .models import PayrollMonthSummary, PayrollRun
+from .snapshots import create_snapshot
+from .services import RECALCULATE_CHUNK_SIZE, PayrollService, default_hours_source, month_start
+
+
+logger = logging.getLogger(__name__)
+
+EXECUTOR_THREAD = "thread"
+EXECUTOR_INLINE = "inline"
+EXECUTOR_WORKER = "worker"
+ACTIVE_STATUSES = (PayrollRun.Status.PENDING, PayrollRun.Status.RUNNING)
+
+
+def _executor() -> str:
+    return getattr(settings, "PAYROLL_RUN_EXECUTOR", EXECUTOR_THREAD)
+
+
+def _stale_after() -> timedelta:
+    return timedelta(seconds=int(getattr(settings, "PAYROLL_RUN_STALE_SECONDS", 300)))
+
+
+class RunInProgress(Exception):
+    """The month already has a run whose worker is alive."""
+
+    def __init__(self, run: PayrollRun):
+        super().__init__(run.id)
+        self.run = run
+
+
+def start_run(
+    *,
+    year: int,
+    month: int,
+    requested_by=None,
+    hours_source: str | None = None,
+    chunk_size: int | None = None,
+) -> PayrollRun:
+    """Create and dispatch a run; IntegrityError if the month already has an active one."""
+    with transaction.atomic():
+        run = PayrollRun.objects.create(
+            month=month_start(year, month),
+            hours_source=hours_source or default_hours_source(),
+            requested_by=requested_by,
+            chunk_size=chunk_size or int(getattr(settings, "PAYROLL_RUN_CHUNK_SIZE", RECALCULATE_CHUNK_SIZE)),
+        )
+    dispatch(run.id)
+    return run
+
+
+def start_or_resume_run(*, year: int, month: int, **kwargs) -> tuple[PayrollRun, bool]:
+    """
+    Start a run for the month, or resume its active run if that one is stale
+    (see ``stale_runs``). Returns (run, resumed); raises RunInProgress while
+    the active run's worker is alive.
+    """
+    try:
+        return start_run(year=year, month=month, **kwargs), False
+    except IntegrityError:
+        pass
+    active = PayrollRun.objects.filter(month=month_start(year, month), status__in=ACTIVE_STATUSES).first()
+    if active is None:  # finished in the meantime
+        return start_run(year=year, month=month, **kwargs), False
+    if not resume_run(active.id):
+        raise RunInProgress(active)
+    active.refresh_from_db()
+    return active, True
+
+
+def dispatch(run_id: int, *, claimed: bool = False) -> None:
+    executor = _executor()
+    if executor == EXECUTOR_INLINE:
+        process_run(run_id, claimed=claimed)
+    elif executor == EXECUTOR_THREAD:
+        transaction.on_commit(
+            lambda: threading.Thread(target=_process_in_thread, args=(run_id, claimed), daemon=True).start()
+        )
+    # EXECUTOR_WORKER: picked up by `manage.py process_payroll_runs`.
+
+
+def resume_run(run_id: int) -> bool:
+    """Re-dispatch a stale run; False if its worker is alive (or another request took it over)."""
+    if not stale_runs().filter(id=run_id).exists():
+        return False
+    if _executor() == EXECUTOR_WORKER:
+        return True  # `process_payroll_runs` picks stale runs up itself
+    if not claim_run(run_id):
+        return False
+    dispatch(run_id, claimed=True)
+    return True
+
+
+def _process_in_thread(run_id: int, claimed: bool = False) -> None:
+    close_old_connections()
+    try:
+        process_run(run_id, claimed=claimed)
+    finally:
+        close_old_connections()
+
+
+def stale_runs():
+    """
+    Active runs nobody is working on: running ones whose heartbeat stopped
+    and pending ones no worker picked up (e.g. the thread died with its web
+    worker) within ``PAYROLL_RUN_STALE_SECONDS``.
+    """
+    cutoff = timezone.now() - _stale_after()
+    return PayrollRun.objects.filter(
+        Q(status=PayrollRun.Status.PENDING, created_at__lt=cutoff)
+        | Q(status=PayrollRun.Status.RUNNING, heartbeat_at__lt=cutoff)
+    )
+
+
+def resumable_runs(*, include_failed: bool = False):
+    """Pending runs and running ones whose worker stopped sending heartbeats."""
+    condition = Q(status=PayrollRun.Status.PENDING) | Q(
+        status=PayrollRun.Status.RUNNING,
+        heartbeat_at__lt=timezone.now() - _stale_after(),
+    )
+    if include_failed:
+        condition |= Q(status=PayrollRun.Status.FAILED)
+    return PayrollRun.objects.filter(condition).order_by("created_at", "id")
+
+
+def claim_run(run_id: int, *, include_failed: bool = False) -> bool:
+    now = timezone.now()
+    try:
+        with transaction.atomic():
+            claimed = resumable_runs(include_failed=include_failed).filter(id=run_id).update(
+                status=PayrollRun.Status.RUNNING,
+                heartbeat_at=now,
+                error="",
+                attempts=F("attempts") + 1,
+            )
+    except IntegrityError:
+        # A failed run cannot be retried while its month has another active run.
+        return False
+    if claimed:
+        PayrollRun.objects.filter(id=run_id, started_at__isnull=True).update(started_at=now)
+    return bool(claimed)
+
+
+def process_run(run_id: int, *, include_failed: bool = False, claimed: bool = False) -> PayrollRun | None:
+    """
+    Process a run to completion. Returns None if another worker owns it
+    or it is already finished. ``claimed`` skips the claim for a run the
+    caller has just claimed.
+    """
+    if not claimed and not claim_run(run_id, include_failed=include_failed):
+        return None
+
+    run = PayrollRun.objects.get(id=run_id)
+    users_qs = PayrollService.payroll_users()
+    if not run.total_users:
+        # The whole month exists (as pending) while the chunks are processed.
+        PayrollService.warm_up_month(year=run.month.year, month=run.month.month, chunk_size=run.chunk_size)
+        run.total_users = users_qs.count()
+        run.save(update_fields=["total_users"])
+
+    try:
+        while _process_chunk(run, users_qs):
+            pass
+    except Exception as exc:
+        logger.exception("Payroll run %s failed", run_id)
+        PayrollRun.objects.filter(id=run_id).update(
+            status=PayrollRun.Status.FAILED,
+            error=str(exc)[:2000],
+            heartbeat_at=timezone.now(),
+        )
+        run.refresh_from_db()
+        return run
+
+    run.status = PayrollRun.Status.COMPLETED
+    run.finished_at = timezone.now()
+    run.heartbeat_at = run.finished_at
+    with transaction.atomic():
+        run.save(update_fields=["status", "finished_at", "heartbeat_at"])
+        create_snapshot(month=run.month, run=run)
+        PayrollMonthSummary.refresh(run.month)
+    PayrollAuditService.log_run_completed(run)
+    return run
+
+
+def _process_chunk(run: PayrollRun, users_qs) -> bool:
+    """
+    Recalculate the next chunk after the checkpoint. Records and checkpoint
+    are committed together, so every (run, user) is applied exactly once.
+    """
+    started = time.perf_counter()
+    with transaction.atomic():
+        locked = PayrollRun.objects.select_for_update().get(id=run.id)
+        users = list(
+            users_qs.filter(id__gt=locked.last_user_id).only("id", "current_hourly_rate").order_by("id")[: locked.chunk_size]
+        )
+        if not users:
+            return False
+
+        chunk_qs = users_qs.filter(id__in=[user.id for user in users])
+        result = PayrollService.recalculate_users(
+            users,
+            users_qs=chunk_qs,
+            year=locked.month.year,
+            month=locked.month.month,
+            chunk_size=locked.chunk_size,
+            hours_source=locked.hours_source,
+        )
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 2)
+        locked.last_user_id = users[-1].id
+        locked.processed_users += len(users)
+        locked.entries_created += result.created
+        locked.entries_updated += result.updated
+        locked.heartbeat_at = timezone.now()
+        locked.chunks = [
+            *locked.chunks,
+            {"index": len(locked.chunks), "users": len(users), "last_user_id": users[-1].id, "ms": elapsed_ms},
+        ]
+        locked.save(
+            update_fields=[
+                "last_user_id",
+                "processed_users",
+                "entries_created",
+                "entries_updated",
+                "heartbeat_at",
+                "chunks",
+            ]
+        )
+
+    for field in ("last_user_id", "processed_users", "entries_created", "entries_updated", "heartbeat_at", "chunks"):
+        setattr(run, field, getattr(locked, field))
+    return True
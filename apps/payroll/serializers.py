@@ -5,7 +5,7 @@ from django.contrib.auth import get_user_model
 from rest_framework import serializers
 
 from apps.common.i18n import role_label, status_label
-from .models import HourlyRateHistory, PayrollCompensation, PayrollRecord
+from .models import HourlyRateHistory, HoursSource, PayrollCompensation, PayrollRecord, PayrollRun
 
 
 User = get_user_model()
@@ -17,7 +17,7 @@ class MonthQuerySerializer(serializers.Serializer):
 
 
 class PayrollRecalculateSerializer(MonthQuerySerializer):
-    pass
+    hours_source = serializers.ChoiceField(choices=HoursSource.choices, required=False)
 
 
 class PayrollRecordSerializer(serializers.ModelSerializer):
@@ -85,6 +85,94 @@ class PayrollRecordSerializer(serializers.ModelSerializer):
         return Decimal("0.00")
 
 
+class PayrollRecordListSerializer(PayrollRecordSerializer):
+    """Reads compensation columns annotated on the queryset (comp_*) instead of related objects."""
+
+    def get_pay_type(self, obj):
+        if obj.comp_pay_type:
+            return "fixed" if obj.comp_pay_type == PayrollCompensation.PayType.FIXED_SALARY else obj.comp_pay_type
+        return "hourly"
+
+    def get_hourly_rate(self, obj):
+        if obj.comp_pay_type:
+            return obj.comp_hourly_rate
+        return getattr(obj.user, "current_hourly_rate", Decimal("0.00"))
+
+    def get_minute_rate(self, obj):
+        return obj.comp_minute_rate if obj.comp_pay_type else Decimal("0.00")
+
+    def get_fixed_salary(self, obj):
+        return obj.comp_fixed_salary if obj.comp_pay_type else Decimal("0.00")
+
+
+class PayrollRunSerializer(serializers.ModelSerializer):
+    year = serializers.IntegerField(source="month.year", read_only=True)
+    month_number = serializers.IntegerField(source="month.month", read_only=True)
+    progress = serializers.SerializerMethodField()
+
+    class Meta:
+        model = PayrollRun
+        fields = (
+            "id",
+            "year",
+            "month_number",
+            "month",
+            "hours_source",
+            "status",
+            "requested_by",
+            "chunk_size",
+            "total_users",
+            "processed_users",
+            "progress",
+            "entries_created",
+            "entries_updated",
+            "chunks",
+            "error",
+            "attempts",
+            "started_at",
+            "heartbeat_at",
+            "finished_at",
+            "created_at",
+        )
+        read_only_fields = fields
+
+    def get_progress(self, obj):
+        if obj.status == PayrollRun.Status.COMPLETED:
+            return 100
+        if not obj.total_users:
+            return 0
+        return min(99, int(obj.processed_users * 100 / obj.total_users))
+
+
+class PayrollExportQuerySerializer(MonthQuerySerializer):
+    file_format = serializers.ChoiceField(choices=("csv", "xlsx"), default="csv")
+    user_ids = serializers.CharField(required=False)
+
+    def validate_user_ids(self, value: str):
+        try:
+            return [int(item) for item in value.split(",") if item.strip()]
+        except ValueError as exc:
+            raise serializers.ValidationError("Use comma-separated user ids.") from exc
+
+
+class PayrollDiffQuerySerializer(serializers.Serializer):
+    """Compare two runs (base_run/run) or the latest snapshots of two months."""
+
+    base_run = serializers.IntegerField(min_value=1, required=False)
+    run = serializers.IntegerField(min_value=1, required=False)
+    base_year = serializers.IntegerField(min_value=2000, max_value=2100, required=False)
+    base_month = serializers.IntegerField(min_value=1, max_value=12, required=False)
+    year = serializers.IntegerField(min_value=2000, max_value=2100, required=False)
+    month = serializers.IntegerField(min_value=1, max_value=12, required=False)
+
+    def validate(self, attrs):
+        by_run = "base_run" in attrs and "run" in attrs
+        by_month = all(key in attrs for key in ("base_year", "base_month", "year", "month"))
+        if not by_run and not by_month:
+            raise serializers.ValidationError("Pass base_run and run, or base_year, base_month, year and month.")
+        return attrs
+
+
 class PayrollRecordStatusSerializer(serializers.Serializer):
     status = serializers.CharField()
 
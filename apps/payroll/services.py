@@ -4,19 +4,35 @@ from calendar import monthrange
 from dataclasses import dataclass
 from datetime import date
 from datetime import timedelta
-from decimal import Decimal
+from decimal import ROUND_HALF_UP, Decimal
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
 
 from apps.accounts.models import Role
+from apps.attendance.models import AttendanceMark, WorkCalendarDay
 
-from .models import HourlyRateHistory, PayrollCompensation, PayrollRecord
+from .models import HourlyRateHistory, HoursSource, PayrollCompensation, PayrollMonthSummary, PayrollRecord
 
 
 User = get_user_model()
 ZERO = Decimal("0.00")
+CENT = Decimal("0.01")
 DEFAULT_MONTH_HOURS = Decimal("160.00")
+DEFAULT_DAY_HOURS = Decimal("8.00")
+MINUTES_PER_HOUR = Decimal("60.00")
+RECALCULATE_CHUNK_SIZE = 1000
+
+
+def money(value) -> Decimal:
+    return Decimal(value).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def default_hours_source() -> str:
+    return getattr(settings, "PAYROLL_HOURS_SOURCE", HoursSource.NORM)
 
 
 def month_start(year: int, month: int) -> date:
@@ -85,16 +101,34 @@ class PayrollService:
         points = list(
             HourlyRateHistory.objects.filter(user=user, start_date__lte=period_end)
             .order_by("start_date")
-            .values("start_date", "rate")
+            .values_list("start_date", "rate")
+        )
+        return cls._segments_from_points(
+            points,
+            period_start=period_start,
+            period_end=period_end,
+            base_hourly_rate=base_hourly_rate,
         )
 
+    @staticmethod
+    def _segments_from_points(
+        points: list[tuple[date, Decimal]],
+        *,
+        period_start: date,
+        period_end: date,
+        base_hourly_rate: Decimal,
+    ) -> list[tuple[date, date, Decimal]]:
+        """
+        Split the period by rate changes. ``points`` are (start_date, rate)
+        pairs sorted by start_date, already limited to start_date <= period_end.
+        """
         if not points:
             return [(period_start, period_end, base_hourly_rate)]
 
         base_rate = base_hourly_rate
-        for point in points:
-            if point["start_date"] <= period_start:
-                base_rate = point["rate"]
+        for start_date, rate in points:
+            if start_date <= period_start:
+                base_rate = rate
             else:
                 break
 
@@ -102,8 +136,7 @@ class PayrollService:
         cursor = period_start
         current_rate = base_rate
 
-        for point in points:
-            change_start = point["start_date"]
+        for change_start, rate in points:
             if change_start <= period_start:
                 continue
             if change_start > period_end:
@@ -113,57 +146,291 @@ class PayrollService:
             if cursor <= segment_end:
                 segments.append((cursor, segment_end, current_rate))
             cursor = change_start
-            current_rate = point["rate"]
+            current_rate = rate
 
         if cursor <= period_end:
             segments.append((cursor, period_end, current_rate))
 
         return segments
 
+    @staticmethod
+    def virtual_record(*, user, month: date) -> PayrollRecord:
+        """Unsaved zero record for a month that has not been calculated yet."""
+        return PayrollRecord(
+            user=user,
+            month=month,
+            total_hours=ZERO,
+            total_salary=ZERO,
+            bonus=ZERO,
+            status=PayrollRecord.Status.CALCULATED,
+        )
+
     @classmethod
-    def _salary_for_month(cls, *, user, period_start: date, period_end: date) -> tuple[Decimal, Decimal]:
-        compensation = cls.get_or_create_compensation(user=user)
+    def warm_up_month(cls, *, year: int, month: int, chunk_size: int = RECALCULATE_CHUNK_SIZE) -> int:
+        """
+        Pre-create PENDING zero records for payroll users that have none for
+        the month, in chunks with ignore_conflicts, so the month exists before
+        it is calculated. Pending records read as not calculated and are left
+        out of the month summary. Returns the rows this call inserted.
+        """
+        period_start = month_start(year, month)
+        missing = list(
+            cls.payroll_users()
+            .exclude(payroll_records__month=period_start)
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+        if not missing:
+            return 0
+        started = timezone.now()
+        PayrollRecord.objects.bulk_create(
+            [PayrollRecord(user_id=user_id, month=period_start, status=PayrollRecord.Status.PENDING) for user_id in missing],
+            batch_size=chunk_size,
+            ignore_conflicts=True,
+        )
+        # ignore_conflicts hides which rows were skipped; rows another writer
+        # inserted first are older or already calculated.
+        return PayrollRecord.objects.filter(
+            month=period_start,
+            user_id__in=missing,
+            status=PayrollRecord.Status.PENDING,
+            created_at__gte=started,
+        ).count()
+
+    @staticmethod
+    def payroll_users():
+        return User.objects.filter(is_active=True).exclude(role__name=Role.Name.INTERN)
+
+    @staticmethod
+    def _salary_from_compensation(compensation: PayrollCompensation) -> tuple[Decimal, Decimal]:
         if compensation.pay_type == PayrollCompensation.PayType.FIXED_SALARY:
-            return ZERO, compensation.fixed_salary
+            return ZERO, money(compensation.fixed_salary)
 
         if compensation.pay_type == PayrollCompensation.PayType.MINUTE:
             total_salary = DEFAULT_MONTH_HOURS * Decimal("60.00") * compensation.minute_rate
-            return DEFAULT_MONTH_HOURS, total_salary
+            return DEFAULT_MONTH_HOURS, money(total_salary)
 
         # Hourly model is now decoupled from attendance and uses fixed monthly norm.
-        return DEFAULT_MONTH_HOURS, compensation.hourly_rate * DEFAULT_MONTH_HOURS
+        return DEFAULT_MONTH_HOURS, money(compensation.hourly_rate * DEFAULT_MONTH_HOURS)
 
     @classmethod
-    @transaction.atomic
-    def recalculate_month(cls, *, year: int, month: int) -> RecalculateResult:
-        period_start, period_end = month_bounds(year, month)
-        users = User.objects.filter(is_active=True).exclude(role__name=Role.Name.INTERN).select_related("role")
+    def _salary_from_hours(
+        cls,
+        compensation: PayrollCompensation,
+        *,
+        day_hours: dict[date, Decimal],
+        rate_points: list[tuple[date, Decimal]],
+        period_start: date,
+        period_end: date,
+    ) -> tuple[Decimal, Decimal]:
+        """
+        Hours-based pay: hourly is split by rate-history segments and each
+        segment's hours are paid at that segment's rate.
+        """
+        if compensation.pay_type == PayrollCompensation.PayType.FIXED_SALARY:
+            return ZERO, money(compensation.fixed_salary)
 
-        created = 0
-        updated = 0
+        total_hours = sum(day_hours.values(), ZERO)
+        if compensation.pay_type == PayrollCompensation.PayType.MINUTE:
+            return money(total_hours), money(total_hours * MINUTES_PER_HOUR * compensation.minute_rate)
+
+        total_salary = ZERO
+        segments = cls._segments_from_points(
+            rate_points,
+            period_start=period_start,
+            period_end=period_end,
+            base_hourly_rate=compensation.hourly_rate,
+        )
+        for segment_start, segment_end, rate in segments:
+            hours = sum(
+                (value for day, value in day_hours.items() if segment_start <= day <= segment_end),
+                ZERO,
+            )
+            total_salary += hours * rate
+        return money(total_hours), money(total_salary)
 
-        for user in users:
-            total_hours, rate_salary = cls._salary_for_month(user=user, period_start=period_start, period_end=period_end)
+    @staticmethod
+    def load_rate_points(users_qs, *, period_end: date) -> dict[int, list[tuple[date, Decimal]]]:
+        """Rate history of every payroll user in one query, grouped per user."""
+        points: dict[int, list[tuple[date, Decimal]]] = {}
+        rows = (
+            HourlyRateHistory.objects.filter(user__in=users_qs.values("id"), start_date__lte=period_end)
+            .order_by("user_id", "start_date")
+            .values_list("user_id", "start_date", "rate")
+        )
+        for user_id, start_date, rate in rows.iterator(chunk_size=RECALCULATE_CHUNK_SIZE):
+            points.setdefault(user_id, []).append((start_date, rate))
+        return points
 
-            record, was_created = PayrollRecord.objects.get_or_create(
-                user=user,
-                month=period_start,
-                defaults={
-                    "total_hours": total_hours,
-                    "total_salary": rate_salary,
-                    "bonus": ZERO,
-                    "status": PayrollRecord.Status.CALCULATED,
-                },
+    @staticmethod
+    def load_attendance_hours(users_qs, *, period_start: date, period_end: date) -> dict[int, dict[date, Decimal]]:
+        """Actual hours per user and day from one aggregate query."""
+        hours: dict[int, dict[date, Decimal]] = {}
+        rows = (
+            AttendanceMark.objects.filter(user__in=users_qs.values("id"), date__range=(period_start, period_end))
+            .order_by()
+            .values("user_id", "date")
+            .annotate(hours=Sum("actual_hours"))
+            .values_list("user_id", "date", "hours")
+        )
+        for user_id, day, value in rows.iterator(chunk_size=RECALCULATE_CHUNK_SIZE):
+            if value:
+                hours.setdefault(user_id, {})[day] = Decimal(value)
+        return hours
+
+    @staticmethod
+    def load_calendar_hours(*, period_start: date, period_end: date) -> dict[date, Decimal]:
+        """
+        Norm hours per working day of the work calendar. Days missing from
+        the calendar fall back to the Mon-Fri rule of generate_work_calendar_month.
+        """
+        working = dict(
+            WorkCalendarDay.objects.filter(date__range=(period_start, period_end)).values_list("date", "is_working_day")
+        )
+        hours: dict[date, Decimal] = {}
+        day = period_start
+        while day <= period_end:
+            if working.get(day, day.weekday() < 5):
+                hours[day] = DEFAULT_DAY_HOURS
+            day += timedelta(days=1)
+        return hours
+
+    @staticmethod
+    def load_compensations(
+        users,
+        *,
+        users_qs=None,
+        chunk_size: int = RECALCULATE_CHUNK_SIZE,
+    ) -> dict[int, PayrollCompensation]:
+        """
+        One query for existing compensations; missing ones get the same defaults
+        as get_or_create_compensation and are inserted in chunks.
+        Pass ``users_qs`` to filter through a subquery instead of an id list.
+        """
+        if users_qs is not None:
+            existing = PayrollCompensation.objects.filter(user__in=users_qs.values("id"))
+        else:
+            existing = PayrollCompensation.objects.filter(user_id__in=[user.id for user in users])
+        compensations = {comp.user_id: comp for comp in existing}
+        missing = [
+            PayrollCompensation(
+                user_id=user.id,
+                pay_type=PayrollCompensation.PayType.HOURLY,
+                hourly_rate=user.current_hourly_rate,
+                minute_rate=ZERO,
+                fixed_salary=ZERO,
             )
+            for user in users
+            if user.id not in compensations
+        ]
+        if missing:
+            PayrollCompensation.objects.bulk_create(missing, batch_size=chunk_size, ignore_conflicts=True)
+            compensations.update({comp.user_id: comp for comp in missing})
+        return compensations
 
-            if was_created:
-                created += 1
-                continue
+    @staticmethod
+    def upsert_records(records: list[PayrollRecord], *, chunk_size: int = RECALCULATE_CHUNK_SIZE) -> None:
+        PayrollRecord.objects.bulk_create(
+            records,
+            batch_size=chunk_size,
+            update_conflicts=True,
+            unique_fields=["user", "month"],
+            update_fields=["total_hours", "total_salary", "status", "calculated_at", "updated_at"],
+        )
 
-            record.total_hours = total_hours
-            record.total_salary = rate_salary + record.bonus
-            record.status = PayrollRecord.Status.CALCULATED
-            record.save(update_fields=["total_hours", "total_salary", "status", "calculated_at", "updated_at"])
-            updated += 1
+    @classmethod
+    @transaction.atomic
+    def recalculate_month(
+        cls,
+        *,
+        year: int,
+        month: int,
+        chunk_size: int = RECALCULATE_CHUNK_SIZE,
+        hours_source: str | None = None,
+    ) -> RecalculateResult:
+        """
+        Set-based recalculation: a fixed number of reads (users, compensations,
+        existing bonuses and, for hours-based sources, rate history plus
+        attendance or calendar) and chunked inserts/upserts, independent of headcount.
+        """
+        users_qs = cls.payroll_users()
+        users = list(users_qs.only("id", "current_hourly_rate").order_by("id"))
+        result = cls.recalculate_users(
+            users,
+            users_qs=users_qs,
+            year=year,
+            month=month,
+            chunk_size=chunk_size,
+            hours_source=hours_source,
+        )
+        PayrollMonthSummary.refresh(month_start(year, month))
+        return result
 
-        return RecalculateResult(created=created, updated=updated)
+    @classmethod
+    def recalculate_users(
+        cls,
+        users,
+        *,
+        users_qs,
+        year: int,
+        month: int,
+        chunk_size: int = RECALCULATE_CHUNK_SIZE,
+        hours_source: str | None = None,
+    ) -> RecalculateResult:
+        """
+        Recalculate ``users`` for one month; ``users_qs`` is the queryset they
+        were taken from and is used as a subquery for the bulk reads.
+        Re-running it for the same users gives the same records (upsert on
+        (user, month), bonus preserved), so a replayed chunk is harmless.
+        """
+        hours_source = hours_source or default_hours_source()
+        period_start, period_end = month_bounds(year, month)
+        compensations = cls.load_compensations(users, users_qs=users_qs, chunk_size=chunk_size)
+        existing = {
+            user_id: (bonus, record_status)
+            for user_id, bonus, record_status in PayrollRecord.objects.filter(
+                month=period_start, user__in=users_qs.values("id")
+            ).values_list("user_id", "bonus", "status")
+        }
+
+        rate_points: dict[int, list[tuple[date, Decimal]]] = {}
+        attendance_hours: dict[int, dict[date, Decimal]] = {}
+        calendar_hours: dict[date, Decimal] = {}
+        if hours_source != HoursSource.NORM:
+            rate_points = cls.load_rate_points(users_qs, period_end=period_end)
+        if hours_source == HoursSource.ATTENDANCE:
+            attendance_hours = cls.load_attendance_hours(users_qs, period_start=period_start, period_end=period_end)
+        elif hours_source == HoursSource.CALENDAR:
+            calendar_hours = cls.load_calendar_hours(period_start=period_start, period_end=period_end)
+
+        records = []
+        updated = 0
+        for user in users:
+            compensation = compensations[user.id]
+            if hours_source == HoursSource.NORM:
+                total_hours, rate_salary = cls._salary_from_compensation(compensation)
+            else:
+                day_hours = attendance_hours.get(user.id, {}) if hours_source == HoursSource.ATTENDANCE else calendar_hours
+                total_hours, rate_salary = cls._salary_from_hours(
+                    compensation,
+                    day_hours=day_hours,
+                    rate_points=rate_points.get(user.id, []),
+                    period_start=period_start,
+                    period_end=period_end,
+                )
+            bonus, record_status = existing.get(user.id, (ZERO, None))
+            # A warmed-up placeholder counts as created by its first calculation.
+            if record_status not in (None, PayrollRecord.Status.PENDING):
+                updated += 1
+            records.append(
+                PayrollRecord(
+                    user_id=user.id,
+                    month=period_start,
+                    total_hours=total_hours,
+                    total_salary=rate_salary + bonus,
+                    bonus=bonus,
+                    status=PayrollRecord.Status.CALCULATED,
+                )
+            )
+        cls.upsert_records(records, chunk_size=chunk_size)
+        return RecalculateResult(created=len(records) - updated, updated=updated)
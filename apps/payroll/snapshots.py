@@ -0,0 +1,301 @@
+"""
+Per-run payroll snapshots and month-over-month diffs.
+
+A snapshot stores the month's records column by column as packed int64
+arrays sorted by user id, so a 10k-employee month is ~50 bytes per
+employee and two snapshots are diffed with a single merge pass.
+"""
+
+from __future__ import annotations
+
+import sys
+from array import array
+from dataclasses import dataclass, field
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+
+from .models import PayrollCompensation, PayrollRecord, PayrollSnapshot
+from .services import CENT, RECALCULATE_CHUNK_SIZE, ZERO, PayrollService, month_bounds
+
+
+PAY_TYPE_CODES = {
+    PayrollCompensation.PayType.HOURLY: 0,
+    PayrollCompensation.PayType.MINUTE: 1,
+    PayrollCompensation.PayType.FIXED_SALARY: 2,
+}
+PAY_TYPES_BY_CODE = {code: pay_type for pay_type, code in PAY_TYPE_CODES.items()}
+
+User = get_user_model()
+
+REASON_ADDED = "added"
+REASON_REMOVED = "removed"
+REASON_PAY_TYPE = "pay_type_changed"
+REASON_RATE = "rate_changed"
+REASON_BONUS = "bonus_changed"
+REASON_HOURS = "hours_changed"
+REASON_OTHER = "other"
+
+
+def _cents(value) -> int:
+    return int((Decimal(value or 0) / CENT).to_integral_value())
+
+
+def _from_cents(value: int) -> Decimal:
+    return (Decimal(value) * CENT).quantize(CENT)
+
+
+def pack(values) -> bytes:
+    packed = array("q", values)
+    if sys.byteorder == "big":
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def unpack(data) -> array:
+    values = array("q")
+    values.frombytes(bytes(data))
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+@dataclass
+class SnapshotColumns:
+    user_ids: array = field(default_factory=lambda: array("q"))
+    total_salary: array = field(default_factory=lambda: array("q"))
+    bonus: array = field(default_factory=lambda: array("q"))
+    total_hours: array = field(default_factory=lambda: array("q"))
+    pay_types: array = field(default_factory=lambda: array("q"))
+    rates: array = field(default_factory=lambda: array("q"))
+
+    @classmethod
+    def from_snapshot(cls, snapshot: PayrollSnapshot) -> "SnapshotColumns":
+        return cls(
+            user_ids=unpack(snapshot.user_ids),
+            total_salary=unpack(snapshot.total_salary),
+            bonus=unpack(snapshot.bonus),
+            total_hours=unpack(snapshot.total_hours),
+            pay_types=unpack(snapshot.pay_types),
+            rates=unpack(snapshot.rates),
+        )
+
+
+def _rate_for(pay_type, hourly_rate, minute_rate, fixed_salary):
+    if pay_type == PayrollCompensation.PayType.MINUTE:
+        return minute_rate
+    if pay_type == PayrollCompensation.PayType.FIXED_SALARY:
+        return fixed_salary
+    return hourly_rate
+
+
+def _month_end_rate(points, *, period_start, period_end, base_hourly_rate) -> Decimal:
+    """Hourly rate in effect at the end of the month, from the rate history recalculation splits by."""
+    segments = PayrollService._segments_from_points(
+        points,
+        period_start=period_start,
+        period_end=period_end,
+        base_hourly_rate=base_hourly_rate,
+    )
+    return segments[-1][2]
+
+
+def collect_columns(month) -> SnapshotColumns:
+    records = PayrollRecord.objects.filter(month=month)
+    period_start, period_end = month_bounds(month.year, month.month)
+    rate_points = PayrollService.load_rate_points(
+        User.objects.filter(id__in=records.values("user_id")),
+        period_end=period_end,
+    )
+    rows = records.order_by("user_id").values_list(
+        "user_id",
+        "total_salary",
+        "bonus",
+        "total_hours",
+        "user__payroll_compensation__pay_type",
+        "user__payroll_compensation__hourly_rate",
+        "user__payroll_compensation__minute_rate",
+        "user__payroll_compensation__fixed_salary",
+        "user__current_hourly_rate",
+    )
+    columns = SnapshotColumns()
+    for user_id, total_salary, bonus, total_hours, pay_type, hourly, minute, fixed, current_hourly in rows.iterator(
+        chunk_size=RECALCULATE_CHUNK_SIZE
+    ):
+        pay_type = pay_type or PayrollCompensation.PayType.HOURLY
+        if pay_type == PayrollCompensation.PayType.HOURLY:
+            hourly = _month_end_rate(
+                rate_points.get(user_id, []),
+                period_start=period_start,
+                period_end=period_end,
+                base_hourly_rate=hourly if hourly is not None else current_hourly or ZERO,
+            )
+        columns.user_ids.append(user_id)
+        columns.total_salary.append(_cents(total_salary))
+        columns.bonus.append(_cents(bonus))
+        columns.total_hours.append(_cents(total_hours))
+        columns.pay_types.append(PAY_TYPE_CODES.get(pay_type, 0))
+        columns.rates.append(_cents(_rate_for(pay_type, hourly, minute, fixed)))
+    return columns
+
+
+def create_snapshot(*, month, run=None) -> PayrollSnapshot:
+    columns = collect_columns(month)
+    return PayrollSnapshot.objects.create(
+        run=run,
+        month=month,
+        row_count=len(columns.user_ids),
+        user_ids=pack(columns.user_ids),
+        total_salary=pack(columns.total_salary),
+        bonus=pack(columns.bonus),
+        total_hours=pack(columns.total_hours),
+        pay_types=pack(columns.pay_types),
+        rates=pack(columns.rates),
+    )
+
+
+def latest_snapshot(month) -> PayrollSnapshot | None:
+    return PayrollSnapshot.objects.filter(month=month).order_by("-created_at", "-id").first()
+
+
+@dataclass(frozen=True)
+class DiffRow:
+    user_id: int
+    salary_before: Decimal
+    salary_after: Decimal
+    bonus_before: Decimal
+    bonus_after: Decimal
+    hours_before: Decimal
+    hours_after: Decimal
+    rate_before: Decimal
+    rate_after: Decimal
+    pay_type_before: str
+    pay_type_after: str
+    reasons: tuple[str, ...]
+
+    @property
+    def delta(self) -> Decimal:
+        return self.salary_after - self.salary_before
+
+    def as_dict(self) -> dict:
+        return {
+            "user_id": self.user_id,
+            "salary_before": self.salary_before,
+            "salary_after": self.salary_after,
+            "delta": self.delta,
+            "bonus_before": self.bonus_before,
+            "bonus_after": self.bonus_after,
+            "hours_before": self.hours_before,
+            "hours_after": self.hours_after,
+            "rate_before": self.rate_before,
+            "rate_after": self.rate_after,
+            "pay_type_before": self.pay_type_before,
+            "pay_type_after": self.pay_type_after,
+            "reasons": list(self.reasons),
+        }
+
+
+DIFF_FIELDS = (
+    "user_id",
+    "salary_before",
+    "salary_after",
+    "delta",
+    "bonus_before",
+    "bonus_after",
+    "hours_before",
+    "hours_after",
+    "rate_before",
+    "rate_after",
+    "pay_type_before",
+    "pay_type_after",
+    "reasons",
+)
+
+
+def _row(columns: SnapshotColumns | None, index: int | None):
+    if columns is None or index is None:
+        return 0, 0, 0, None, 0
+    return (
+        columns.total_salary[index],
+        columns.bonus[index],
+        columns.total_hours[index],
+        columns.pay_types[index],
+        columns.rates[index],
+    )
+
+
+def _build_row(user_id, before, after) -> DiffRow | None:
+    salary_b, bonus_b, hours_b, type_b, rate_b = before
+    salary_a, bonus_a, hours_a, type_a, rate_a = after
+
+    reasons = []
+    if type_b is None:
+        reasons.append(REASON_ADDED)
+    elif type_a is None:
+        reasons.append(REASON_REMOVED)
+    else:
+        if type_b != type_a:
+            reasons.append(REASON_PAY_TYPE)
+        elif rate_b != rate_a:
+            reasons.append(REASON_RATE)
+        if bonus_b != bonus_a:
+            reasons.append(REASON_BONUS)
+        if hours_b != hours_a:
+            reasons.append(REASON_HOURS)
+        if not reasons and salary_b != salary_a:
+            reasons.append(REASON_OTHER)
+    if not reasons:
+        return None
+
+    return DiffRow(
+        user_id=user_id,
+        salary_before=_from_cents(salary_b),
+        salary_after=_from_cents(salary_a),
+        bonus_before=_from_cents(bonus_b),
+        bonus_after=_from_cents(bonus_a),
+        hours_before=_from_cents(hours_b),
+        hours_after=_from_cents(hours_a),
+        rate_before=_from_cents(rate_b),
+        rate_after=_from_cents(rate_a),
+        pay_type_before=PAY_TYPES_BY_CODE.get(type_b, ""),
+        pay_type_after=PAY_TYPES_BY_CODE.get(type_a, ""),
+        reasons=tuple(reasons),
+    )
+
+
+def iter_diff(base: PayrollSnapshot, target: PayrollSnapshot):
+    """Merge-walk two snapshots (both sorted by user id) and yield changed users."""
+    left = SnapshotColumns.from_snapshot(base)
+    right = SnapshotColumns.from_snapshot(target)
+    i = j = 0
+    left_len, right_len = len(left.user_ids), len(right.user_ids)
+    while i < left_len or j < right_len:
+        left_id = left.user_ids[i] if i < left_len else None
+        right_id = right.user_ids[j] if j < right_len else None
+        if right_id is None or (left_id is not None and left_id < right_id):
+            row = _build_row(left_id, _row(left, i), _row(None, None))
+            i += 1
+        elif left_id is None or right_id < left_id:
+            row = _build_row(right_id, _row(None, None), _row(right, j))
+            j += 1
+        else:
+            row = _build_row(left_id, _row(left, i), _row(right, j))
+            i += 1
+            j += 1
+        if row is not None:
+            yield row
+
+
+def diff_summary(base: PayrollSnapshot, target: PayrollSnapshot, rows: list[DiffRow]) -> dict:
+    reasons: dict[str, int] = {}
+    for row in rows:
+        for reason in row.reasons:
+            reasons[reason] = reasons.get(reason, 0) + 1
+    return {
+        "base": {"snapshot_id": base.id, "run_id": base.run_id, "month": base.month, "employees": base.row_count},
+        "target": {"snapshot_id": target.id, "run_id": target.run_id, "month": target.month, "employees": target.row_count},
+        "fund_before": _from_cents(sum(unpack(base.total_salary))),
+        "fund_after": _from_cents(sum(unpack(target.total_salary))),
+        "changed": len(rows),
+        "reasons": reasons,
+    }
@@ -0,0 +1,92 @@
+import csv
+import io
+import zipfile
+from datetime import date
+from decimal import Decimal
+
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.accounts.models import Department, Role, User
+from apps.payroll import exports
+from apps.payroll.models import HourlyRateHistory
+from apps.payroll.services import PayrollService
+
+
+class PayrollExportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        employee_role, _ = Role.objects.get_or_create(
+            name=Role.Name.EMPLOYEE,
+            defaults={"level": Role.Level.EMPLOYEE},
+        )
+        super_admin_role, _ = Role.objects.get_or_create(
+            name=Role.Name.SUPER_ADMIN,
+            defaults={"level": Role.Level.SUPER_ADMIN},
+        )
+        department = Department.objects.create(name="Export Dept")
+        self.super_admin = User.objects.create_user(
+            username="export_super_admin",
+            password="StrongPass123!",
+            role=super_admin_role,
+            current_hourly_rate=Decimal("200.00"),
+        )
+        self.employee = User.objects.create_user(
+            username="export_employee",
+            password="StrongPass123!",
+            role=employee_role,
+            department=department,
+            first_name="Айбек",
+            last_name="Test",
+            current_hourly_rate=Decimal("100.00"),
+        )
+        HourlyRateHistory.objects.create(user=self.employee, start_date=date(2000, 1, 1), rate=Decimal("90.00"))
+        HourlyRateHistory.objects.create(user=self.employee, start_date=date(2026, 3, 16), rate=Decimal("100.00"))
+        PayrollService.recalculate_month(year=2026, month=3)
+        self.client.force_authenticate(user=self.super_admin)
+
+    def test_register_csv_is_streamed(self):
+        response = self.client.get("/api/v1/payroll/admin/register/export/?year=2026&month=3")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        content = b"".join(response.streaming_content).decode("utf-8-sig")
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual([row["username"] for row in rows], ["export_super_admin", "export_employee"])
+        self.assertEqual(rows[1]["full_name"], "Айбек Test")
+        self.assertEqual(rows[1]["department"], "Export Dept")
+        self.assertEqual(rows[1]["total_salary"], "16000.00")
+
+    def test_register_xlsx_is_a_valid_workbook(self):
+        response = self.client.get("/api/v1/payroll/admin/register/export/?year=2026&month=3&file_format=xlsx")
+        self.assertEqual(response.status_code, 200)
+        archive = zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content)))
+        self.assertIn("xl/workbook.xml", archive.namelist())
+        sheet = archive.read("xl/worksheets/sheet1.xml").decode("utf-8")
+        self.assertIn("<t>export_employee</t>", sheet)
+        self.assertIn("<v>16000.00</v>", sheet)
+
+    @override_settings(PAYROLL_EXPORT_WORKERS=0)
+    def test_payslips_zip_contains_rate_segments(self):
+        response = self.client.get(
+            f"/api/v1/payroll/admin/payslips/export/?year=2026&month=3&user_ids={self.employee.id}"
+        )
+        self.assertEqual(response.status_code, 200)
+        archive = zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content)))
+        self.assertEqual(archive.namelist(), [f"payslip-2026-03-{self.employee.id}-export_employee.html"])
+        html = archive.read(archive.namelist()[0]).decode("utf-8")
+        self.assertIn("Айбек Test", html)
+        self.assertIn("<td>2026-03-01</td><td>2026-03-15</td><td>90.00</td>", html)
+        self.assertIn("<td>2026-03-16</td><td>2026-03-31</td><td>100.00</td>", html)
+
+    @override_settings(PAYROLL_EXPORT_WORKERS=2)
+    def test_payslips_are_rendered_in_shared_process_pool(self):
+        response = self.client.get("/api/v1/payroll/admin/payslips/export/?year=2026&month=3")
+        archive = zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content)))
+        self.assertEqual(len(archive.namelist()), 2)
+        self.assertIsNone(archive.testzip())
+        pool = exports._pool
+        self.assertIsNotNone(pool)
+
+        again = self.client.get("/api/v1/payroll/admin/payslips/export/?year=2026&month=3")
+        self.assertEqual(len(zipfile.ZipFile(io.BytesIO(b"".join(again.streaming_content))).namelist()), 2)
+        self.assertIs(exports._pool, pool)
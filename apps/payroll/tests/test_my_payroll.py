@@ -0,0 +1,138 @@
+import threading
+from datetime import date
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.accounts.models import Role, User
+from apps.payroll.models import PayrollMonthSummary, PayrollRecord
+from apps.payroll.services import PayrollService
+
+WRITE_PREFIXES = ("INSERT", "UPDATE", "DELETE")
+
+
+def _create_employee(username):
+    role, _ = Role.objects.get_or_create(name=Role.Name.EMPLOYEE, defaults={"level": Role.Level.EMPLOYEE})
+    return User.objects.create_user(
+        username=username,
+        password="StrongPass123!",
+        role=role,
+        current_hourly_rate=Decimal("100.00"),
+    )
+
+
+class PayrollMyReadOnlyTests(TestCase):
+    def test_uncalculated_month_returns_virtual_record_without_writes(self):
+        employee = _create_employee("my_virtual")
+        client = APIClient()
+        client.force_authenticate(user=employee)
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get("/api/v1/payroll/?year=2026&month=4")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.data["id"])
+        self.assertEqual(response.data["total_salary"], "0.00")
+        self.assertFalse(response.data["is_calculated"])
+        self.assertFalse(PayrollRecord.objects.exists())
+        self.assertFalse([q for q in ctx.captured_queries if q["sql"].lstrip().upper().startswith(WRITE_PREFIXES)])
+
+    def test_warm_up_creates_missing_records_in_bulk(self):
+        users = [_create_employee(f"my_warm_{idx}") for idx in range(3)]
+        PayrollRecord.objects.create(user=users[0], month=date(2026, 4, 1), total_salary=Decimal("10.00"))
+
+        created = PayrollService.warm_up_month(year=2026, month=4)
+
+        self.assertEqual(created, 2)
+        self.assertEqual(PayrollRecord.objects.filter(month=date(2026, 4, 1)).count(), 3)
+        self.assertEqual(PayrollRecord.objects.get(user=users[0]).total_salary, Decimal("10.00"))
+        self.assertEqual(PayrollRecord.objects.get(user=users[1]).status, PayrollRecord.Status.PENDING)
+        self.assertEqual(PayrollService.warm_up_month(year=2026, month=4), 0)
+        self.assertFalse(PayrollMonthSummary.objects.filter(month=date(2026, 4, 1)).exclude(employees=1).exists())
+
+        client = APIClient()
+        client.force_authenticate(user=users[1])
+        response = client.get("/api/v1/payroll/?year=2026&month=4")
+        self.assertIsNotNone(response.data["id"])
+        self.assertFalse(response.data["is_calculated"])
+
+        result = PayrollService.recalculate_month(year=2026, month=4)
+        self.assertEqual((result.created, result.updated), (2, 1))
+        self.assertTrue(client.get("/api/v1/payroll/?year=2026&month=4").data["is_calculated"])
+
+    def test_pending_rows_stay_out_of_admin_views_and_status_changes(self):
+        users = [_create_employee(f"my_pending_{idx}") for idx in range(2)]
+        PayrollService.warm_up_month(year=2026, month=4)
+        PayrollService.recalculate_users([users[0]], users_qs=User.objects.filter(id=users[0].id), year=2026, month=4)
+        super_admin_role, _ = Role.objects.get_or_create(
+            name=Role.Name.SUPER_ADMIN,
+            defaults={"level": Role.Level.SUPER_ADMIN},
+        )
+        admin = User.objects.create_user(username="my_pending_admin", password="StrongPass123!", role=super_admin_role)
+        client = APIClient()
+        client.force_authenticate(user=admin)
+
+        listed = client.get("/api/v1/payroll/admin/?year=2026&month=4").data
+        self.assertEqual([row["user"] for row in listed], [users[0].id])
+        response = client.get("/api/v1/payroll/admin/register/export/?year=2026&month=4")
+        register = b"".join(response.streaming_content)
+        self.assertIn(b"my_pending_0", register)
+        self.assertNotIn(b"my_pending_1", register)
+
+        pending = PayrollRecord.objects.get(user=users[1], month=date(2026, 4, 1))
+        response = client.patch(
+            f"/api/v1/payroll/admin/records/{pending.id}/status/",
+            {"status": "PAID"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 409)
+        pending.refresh_from_db()
+        self.assertEqual((pending.status, pending.paid_at), (PayrollRecord.Status.PENDING, None))
+
+    def test_payroll_run_warms_up_the_month_first(self):
+        from apps.payroll.runs import start_run
+
+        users = [_create_employee(f"my_run_{idx}") for idx in range(2)]
+        with patch.object(PayrollService, "warm_up_month", wraps=PayrollService.warm_up_month) as warm_up:
+            run = start_run(year=2026, month=6)
+        warm_up.assert_called_once_with(year=2026, month=6, chunk_size=run.chunk_size)
+        run.refresh_from_db()
+        self.assertEqual((run.entries_created, run.entries_updated), (2, 0))
+        self.assertEqual(
+            set(PayrollRecord.objects.filter(user__in=users).values_list("status", flat=True)),
+            {PayrollRecord.Status.CALCULATED},
+        )
+
+
+class PayrollMyConcurrentReadTests(TransactionTestCase):
+    def test_parallel_reads_do_not_write(self):
+        employees = [_create_employee(f"my_parallel_{idx}") for idx in range(4)]
+        writes = []
+        errors = []
+
+        def read(user):
+            client = APIClient()
+            client.force_authenticate(user=user)
+            try:
+                with CaptureQueriesContext(connection) as ctx:
+                    for _ in range(5):
+                        response = client.get("/api/v1/payroll/?year=2026&month=5")
+                        if response.status_code != 200 or response.data["is_calculated"]:
+                            errors.append(response.status_code)
+                writes.extend(q["sql"] for q in ctx.captured_queries if q["sql"].lstrip().upper().startswith(WRITE_PREFIXES))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=read, args=(user,)) for user in employees for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(writes, [])
+        self.assertFalse(PayrollRecord.objects.exists())
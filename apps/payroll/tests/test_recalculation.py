@@ -0,0 +1,164 @@
+from datetime import date
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from apps.accounts.models import Role, User
+from apps.attendance.models import AttendanceMark, WorkCalendarDay
+from apps.payroll.models import HourlyRateHistory, HoursSource, PayrollCompensation, PayrollRecord
+from apps.payroll.services import PayrollService
+
+
+class PayrollBulkRecalculationTests(TestCase):
+    def setUp(self):
+        self.employee_role, _ = Role.objects.get_or_create(
+            name=Role.Name.EMPLOYEE,
+            defaults={"level": Role.Level.EMPLOYEE},
+        )
+
+    def _create_users(self, prefix, count):
+        return [
+            User.objects.create_user(
+                username=f"{prefix}_{idx}",
+                password="StrongPass123!",
+                role=self.employee_role,
+                current_hourly_rate=Decimal("100.00"),
+            )
+            for idx in range(count)
+        ]
+
+    def _recalculate_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            PayrollService.recalculate_month(year=2026, month=3)
+        return len(ctx.captured_queries)
+
+    def test_query_count_does_not_grow_with_headcount(self):
+        self._create_users("bulk_small", 5)
+        small = self._recalculate_queries()
+
+        PayrollRecord.objects.all().delete()
+        PayrollCompensation.objects.all().delete()
+        self._create_users("bulk_large", 40)
+        large = self._recalculate_queries()
+
+        self.assertEqual(small, large)
+        self.assertEqual(PayrollRecord.objects.filter(month=date(2026, 3, 1)).count(), 45)
+
+    def test_recalculation_keeps_bonus_and_creates_missing_compensations(self):
+        fixed_user, hourly_user = self._create_users("bulk_bonus", 2)
+        PayrollCompensation.objects.create(
+            user=fixed_user,
+            pay_type=PayrollCompensation.PayType.FIXED_SALARY,
+            fixed_salary=Decimal("5000.00"),
+        )
+        first = PayrollService.recalculate_month(year=2026, month=3)
+        self.assertEqual((first.created, first.updated), (2, 0))
+        self.assertTrue(PayrollCompensation.objects.filter(user=hourly_user).exists())
+
+        record = PayrollRecord.objects.get(user=fixed_user, month=date(2026, 3, 1))
+        record.bonus = Decimal("700.00")
+        record.status = PayrollRecord.Status.PAID
+        record.save(update_fields=["bonus", "status"])
+
+        second = PayrollService.recalculate_month(year=2026, month=3)
+        self.assertEqual((second.created, second.updated), (0, 2))
+        record.refresh_from_db()
+        self.assertEqual(record.total_salary, Decimal("5700.00"))
+        self.assertEqual(record.bonus, Decimal("700.00"))
+        self.assertEqual(record.status, PayrollRecord.Status.CALCULATED)
+        hourly_record = PayrollRecord.objects.get(user=hourly_user, month=date(2026, 3, 1))
+        self.assertEqual(hourly_record.total_salary, Decimal("16000.00"))
+
+
+class PayrollHoursBasedRecalculationTests(TestCase):
+    def setUp(self):
+        self.employee_role, _ = Role.objects.get_or_create(
+            name=Role.Name.EMPLOYEE,
+            defaults={"level": Role.Level.EMPLOYEE},
+        )
+
+    def _create_user(self, username, rate="100.00"):
+        return User.objects.create_user(
+            username=username,
+            password="StrongPass123!",
+            role=self.employee_role,
+            current_hourly_rate=Decimal(rate),
+        )
+
+    def _mark(self, user, day, hours):
+        return AttendanceMark(
+            user=user,
+            date=day,
+            status=AttendanceMark.Status.PRESENT,
+            planned_hours=Decimal("8.00"),
+            actual_hours=Decimal(hours),
+        )
+
+    def test_attendance_hours_are_paid_per_rate_segment(self):
+        user = self._create_user("hours_segments")
+        HourlyRateHistory.objects.create(user=user, start_date=date(2000, 1, 1), rate=Decimal("100.00"))
+        HourlyRateHistory.objects.create(user=user, start_date=date(2026, 3, 16), rate=Decimal("150.00"))
+        AttendanceMark.objects.bulk_create(
+            [
+                self._mark(user, date(2026, 3, 10), "8.00"),
+                self._mark(user, date(2026, 3, 11), "6.50"),
+                self._mark(user, date(2026, 3, 16), "8.00"),
+                self._mark(user, date(2026, 4, 1), "8.00"),
+            ]
+        )
+
+        PayrollService.recalculate_month(year=2026, month=3, hours_source=HoursSource.ATTENDANCE)
+
+        record = PayrollRecord.objects.get(user=user, month=date(2026, 3, 1))
+        self.assertEqual(record.total_hours, Decimal("22.50"))
+        self.assertEqual(record.total_salary, Decimal("2650.00"))  # 14.5h * 100 + 8h * 150
+
+    def test_attendance_minute_pay_and_missing_marks(self):
+        minute_user = self._create_user("hours_minute")
+        idle_user = self._create_user("hours_idle")
+        PayrollCompensation.objects.create(
+            user=minute_user,
+            pay_type=PayrollCompensation.PayType.MINUTE,
+            minute_rate=Decimal("2.00"),
+        )
+        AttendanceMark.objects.bulk_create([self._mark(minute_user, date(2026, 3, 2), "1.50")])
+
+        PayrollService.recalculate_month(year=2026, month=3, hours_source=HoursSource.ATTENDANCE)
+
+        minute_record = PayrollRecord.objects.get(user=minute_user, month=date(2026, 3, 1))
+        self.assertEqual(minute_record.total_salary, Decimal("180.00"))
+        idle_record = PayrollRecord.objects.get(user=idle_user, month=date(2026, 3, 1))
+        self.assertEqual((idle_record.total_hours, idle_record.total_salary), (Decimal("0.00"), Decimal("0.00")))
+
+    def test_calendar_hours_use_working_days(self):
+        user = self._create_user("hours_calendar")
+        WorkCalendarDay.objects.create(date=date(2026, 3, 9), is_working_day=False, is_holiday=True)
+
+        PayrollService.recalculate_month(year=2026, month=3, hours_source=HoursSource.CALENDAR)
+
+        record = PayrollRecord.objects.get(user=user, month=date(2026, 3, 1))
+        # March 2026 has 22 weekdays, one of them is a holiday.
+        self.assertEqual(record.total_hours, Decimal("168.00"))
+        self.assertEqual(record.total_salary, Decimal("16800.00"))
+
+    def test_attendance_query_count_does_not_grow_with_headcount(self):
+        def run():
+            with CaptureQueriesContext(connection) as ctx:
+                PayrollService.recalculate_month(year=2026, month=3, hours_source=HoursSource.ATTENDANCE)
+            return len(ctx.captured_queries)
+
+        users = [self._create_user(f"hours_small_{idx}") for idx in range(3)]
+        AttendanceMark.objects.bulk_create([self._mark(user, date(2026, 3, 2), "8.00") for user in users])
+        small = run()
+
+        PayrollRecord.objects.all().delete()
+        PayrollCompensation.objects.all().delete()
+        users = [self._create_user(f"hours_large_{idx}") for idx in range(30)]
+        for user in users:
+            HourlyRateHistory.objects.create(user=user, start_date=date(2026, 3, 10), rate=Decimal("120.00"))
+        AttendanceMark.objects.bulk_create([self._mark(user, date(2026, 3, 12), "8.00") for user in users])
+        large = run()
+
+        self.assertEqual(small, large)
@@ -0,0 +1,141 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.db import IntegrityError, transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.accounts.models import Role, User
+from apps.payroll.models import PayrollRecord, PayrollRun
+from apps.payroll.runs import claim_run, process_run, start_run
+from apps.payroll.services import PayrollService
+
+
+@override_settings(PAYROLL_RUN_EXECUTOR="worker")
+class PayrollRunTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.employee_role, _ = Role.objects.get_or_create(
+            name=Role.Name.EMPLOYEE,
+            defaults={"level": Role.Level.EMPLOYEE},
+        )
+        super_admin_role, _ = Role.objects.get_or_create(
+            name=Role.Name.SUPER_ADMIN,
+            defaults={"level": Role.Level.SUPER_ADMIN},
+        )
+        self.super_admin = User.objects.create_user(
+            username="runs_super_admin",
+            password="StrongPass123!",
+            role=super_admin_role,
+        )
+        self.employees = [
+            User.objects.create_user(
+                username=f"runs_employee_{idx}",
+                password="StrongPass123!",
+                role=self.employee_role,
+                current_hourly_rate=Decimal("100.00"),
+            )
+            for idx in range(5)
+        ]
+
+    def test_post_returns_run_id_and_status_endpoint_reports_progress(self):
+        self.client.force_authenticate(user=self.super_admin)
+        response = self.client.post("/api/v1/payroll/admin/recalculate/", {"year": 2026, "month": 3}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["run_status"], PayrollRun.Status.PENDING)
+        self.assertFalse(PayrollRecord.objects.exists())
+
+        duplicate = self.client.post("/api/v1/payroll/admin/recalculate/", {"year": 2026, "month": 3}, format="json")
+        self.assertEqual(duplicate.status_code, 409)
+        self.assertEqual(duplicate.data["errors"]["run_id"], response.data["run_id"])
+
+        process_run(response.data["run_id"])
+
+        detail = self.client.get(f"/api/v1/payroll/admin/runs/{response.data['run_id']}/")
+        self.assertEqual(detail.status_code, 200)
+        self.assertEqual(detail.data["status"], PayrollRun.Status.COMPLETED)
+        self.assertEqual(detail.data["progress"], 100)
+        self.assertEqual(detail.data["processed_users"], 6)
+        self.assertTrue(all("ms" in chunk for chunk in detail.data["chunks"]))
+        self.assertEqual(PayrollRecord.objects.filter(month=date(2026, 3, 1)).count(), 6)
+
+        history = self.client.get("/api/v1/payroll/admin/runs/?year=2026&month=3")
+        self.assertEqual([item["id"] for item in history.data["results"]], [response.data["run_id"]])
+
+    def test_failed_run_resumes_from_checkpoint_without_double_counting(self):
+        run = start_run(year=2026, month=3, chunk_size=2)
+        original = PayrollService.recalculate_users.__func__
+        calls = {"count": 0}
+
+        def flaky(cls, users, **kwargs):
+            calls["count"] += 1
+            if calls["count"] == 2:
+                raise RuntimeError("worker crashed")
+            return original(cls, users, **kwargs)
+
+        with mock.patch.object(PayrollService, "recalculate_users", classmethod(flaky)):
+            failed = process_run(run.id)
+        self.assertEqual(failed.status, PayrollRun.Status.FAILED)
+        self.assertEqual(failed.processed_users, 2)
+        # The run warmed the month up first; only the first chunk is calculated.
+        self.assertEqual(PayrollRecord.objects.count(), 6)
+        self.assertEqual(PayrollRecord.objects.exclude(status=PayrollRecord.Status.PENDING).count(), 2)
+
+        self.assertIsNone(process_run(run.id))
+        resumed = process_run(run.id, include_failed=True)
+        self.assertEqual(resumed.status, PayrollRun.Status.COMPLETED)
+        self.assertEqual(resumed.attempts, 2)
+        self.assertEqual((resumed.processed_users, resumed.total_users), (6, 6))
+        self.assertEqual((resumed.entries_created, resumed.entries_updated), (6, 0))
+        self.assertEqual(len(resumed.chunks), 3)
+        self.assertEqual(PayrollRecord.objects.count(), 6)
+
+    def test_only_stale_running_runs_are_reclaimed(self):
+        run = start_run(year=2026, month=3)
+        PayrollRun.objects.filter(id=run.id).update(status=PayrollRun.Status.RUNNING, heartbeat_at=timezone.now())
+        self.assertIsNone(process_run(run.id))
+
+        PayrollRun.objects.filter(id=run.id).update(heartbeat_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(process_run(run.id).status, PayrollRun.Status.COMPLETED)
+
+    @override_settings(PAYROLL_RUN_EXECUTOR="inline")
+    def test_recalculate_resumes_stale_run_instead_of_conflicting(self):
+        self.client.force_authenticate(user=self.super_admin)
+        with override_settings(PAYROLL_RUN_EXECUTOR="worker"):
+            run = start_run(year=2026, month=3)
+        # Fresh pending run: its thread or worker may still pick it up.
+        response = self.client.post("/api/v1/payroll/admin/recalculate/", {"year": 2026, "month": 3}, format="json")
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data["errors"]["run_id"], run.id)
+
+        # The thread died with its web worker: the run is reclaimed and finished.
+        PayrollRun.objects.filter(id=run.id).update(created_at=timezone.now() - timedelta(hours=1))
+        response = self.client.post("/api/v1/payroll/admin/recalculate/", {"year": 2026, "month": 3}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data["run_id"], response.data["resumed"]), (run.id, True))
+        self.assertEqual(response.data["run_status"], PayrollRun.Status.COMPLETED)
+
+        # A running run resumes once its heartbeat is stale.
+        with override_settings(PAYROLL_RUN_EXECUTOR="worker"):
+            crashed = start_run(year=2026, month=4)
+        PayrollRun.objects.filter(id=crashed.id).update(status=PayrollRun.Status.RUNNING, heartbeat_at=timezone.now())
+        response = self.client.post("/api/v1/payroll/admin/recalculate/", {"year": 2026, "month": 4}, format="json")
+        self.assertEqual(response.status_code, 409)
+        PayrollRun.objects.filter(id=crashed.id).update(heartbeat_at=timezone.now() - timedelta(hours=1))
+        response = self.client.post("/api/v1/payroll/admin/recalculate/", {"year": 2026, "month": 4}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data["run_id"], response.data["resumed"]), (crashed.id, True))
+        self.assertEqual(PayrollRun.objects.get(id=crashed.id).status, PayrollRun.Status.COMPLETED)
+        self.assertEqual(PayrollRun.objects.count(), 2)
+
+    def test_month_has_at_most_one_active_run(self):
+        failed = start_run(year=2026, month=3)
+        PayrollRun.objects.filter(id=failed.id).update(status=PayrollRun.Status.FAILED)
+        active = start_run(year=2026, month=3)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            start_run(year=2026, month=3)
+        self.assertFalse(claim_run(failed.id, include_failed=True))
+        self.assertEqual(PayrollRun.objects.get(id=failed.id).status, PayrollRun.Status.FAILED)
+        self.assertTrue(claim_run(active.id))
@@ -0,0 +1,102 @@
+from datetime import date
+from decimal import Decimal
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.accounts.models import Role, User
+from apps.payroll.models import HourlyRateHistory, PayrollCompensation, PayrollRecord, PayrollSnapshot
+from apps.payroll.runs import start_run
+from apps.payroll.services import PayrollService
+from apps.payroll.snapshots import collect_columns, unpack
+
+
+class PayrollSnapshotDiffTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        employee_role, _ = Role.objects.get_or_create(
+            name=Role.Name.EMPLOYEE,
+            defaults={"level": Role.Level.EMPLOYEE},
+        )
+        super_admin_role, _ = Role.objects.get_or_create(
+            name=Role.Name.SUPER_ADMIN,
+            defaults={"level": Role.Level.SUPER_ADMIN},
+        )
+        self.super_admin = User.objects.create_user(
+            username="snap_super_admin",
+            password="StrongPass123!",
+            role=super_admin_role,
+            current_hourly_rate=Decimal("200.00"),
+        )
+        self.rate_user, self.bonus_user, self.type_user, self.same_user = [
+            User.objects.create_user(
+                username=f"snap_employee_{idx}",
+                password="StrongPass123!",
+                role=employee_role,
+                current_hourly_rate=Decimal("100.00"),
+            )
+            for idx in range(4)
+        ]
+        self.client.force_authenticate(user=self.super_admin)
+
+    def _change_inputs(self):
+        PayrollCompensation.objects.filter(user=self.rate_user).update(hourly_rate=Decimal("110.00"))
+        PayrollCompensation.objects.filter(user=self.type_user).update(
+            pay_type=PayrollCompensation.PayType.FIXED_SALARY,
+            fixed_salary=Decimal("9000.00"),
+        )
+        PayrollRecord.objects.filter(user=self.bonus_user).update(bonus=Decimal("500.00"))
+
+    def test_run_stores_columnar_snapshot_and_diff_explains_changes(self):
+        first = start_run(year=2026, month=3)
+        snapshot = PayrollSnapshot.objects.get(run=first)
+        self.assertEqual(snapshot.row_count, 5)
+        self.assertEqual(len(bytes(snapshot.user_ids)), 5 * 8)
+        self.assertEqual(list(unpack(snapshot.user_ids)), sorted(unpack(snapshot.user_ids)))
+        with self.assertRaises(ValueError):
+            snapshot.save()
+
+        self._change_inputs()
+        second = start_run(year=2026, month=3)
+
+        response = self.client.get(f"/api/v1/payroll/admin/diff/?base_run={first.id}&run={second.id}")
+        self.assertEqual(response.status_code, 200)
+        rows = {row["user_id"]: row for row in response.data["rows"]}
+        self.assertEqual(set(rows), {self.rate_user.id, self.bonus_user.id, self.type_user.id})
+        self.assertEqual(rows[self.rate_user.id]["reasons"], ["rate_changed"])
+        self.assertEqual(rows[self.rate_user.id]["delta"], Decimal("1600.00"))
+        self.assertEqual(rows[self.bonus_user.id]["reasons"], ["bonus_changed"])
+        self.assertEqual(rows[self.type_user.id]["reasons"], ["pay_type_changed", "hours_changed"])
+        self.assertEqual(response.data["changed"], 3)
+
+    def test_snapshot_of_past_month_uses_rate_in_effect_then(self):
+        HourlyRateHistory.objects.create(user=self.rate_user, start_date=date(2000, 1, 1), rate=Decimal("90.00"))
+        HourlyRateHistory.objects.create(user=self.rate_user, start_date=date(2026, 3, 16), rate=Decimal("95.00"))
+        HourlyRateHistory.objects.create(user=self.rate_user, start_date=date(2026, 5, 1), rate=Decimal("130.00"))
+        PayrollService.recalculate_month(year=2026, month=3)
+        PayrollCompensation.objects.filter(user=self.rate_user).update(hourly_rate=Decimal("130.00"))
+
+        columns = collect_columns(date(2026, 3, 1))
+        rates = dict(zip(columns.user_ids, columns.rates))
+        self.assertEqual(rates[self.rate_user.id], 9500)
+        self.assertEqual(rates[self.same_user.id], 10000)
+
+    def test_month_diff_and_csv_export(self):
+        start_run(year=2026, month=2)
+        User.objects.filter(id=self.same_user.id).update(is_active=False)
+        start_run(year=2026, month=3)
+
+        response = self.client.get("/api/v1/payroll/admin/diff/?base_year=2026&base_month=2&year=2026&month=3")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["rows"][0]["user_id"], self.same_user.id)
+        self.assertEqual(response.data["rows"][0]["reasons"], ["removed"])
+
+        export = self.client.get("/api/v1/payroll/admin/diff/export/?base_year=2026&base_month=2&year=2026&month=3")
+        self.assertEqual(export.status_code, 200)
+        self.assertTrue(export.streaming)
+        lines = b"".join(export.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0].split(",")[:4], ["user_id", "salary_before", "salary_after", "delta"])
+        self.assertTrue(lines[1].startswith(f"{self.same_user.id},16000.00,0.00,-16000.00"))
+
+        missing = self.client.get("/api/v1/payroll/admin/diff/?base_year=2025&base_month=1&year=2026&month=3")
+        self.assertEqual(missing.status_code, 404)
@@ -0,0 +1,136 @@
+from datetime import date
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.accounts.models import Department, Role, User
+from apps.payroll.models import PayrollMonthSummary, PayrollRecord
+from apps.payroll.services import PayrollService
+
+
+class PayrollMonthSummaryTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        employee_role, _ = Role.objects.get_or_create(
+            name=Role.Name.EMPLOYEE,
+            defaults={"level": Role.Level.EMPLOYEE},
+        )
+        intern_role, _ = Role.objects.get_or_create(
+            name=Role.Name.INTERN,
+            defaults={"level": Role.Level.INTERN},
+        )
+        super_admin_role, _ = Role.objects.get_or_create(
+            name=Role.Name.SUPER_ADMIN,
+            defaults={"level": Role.Level.SUPER_ADMIN},
+        )
+        self.sales = Department.objects.create(name="Summary Sales")
+        self.support = Department.objects.create(name="Summary Support")
+        self.super_admin = User.objects.create_user(
+            username="summary_super_admin",
+            password="StrongPass123!",
+            role=super_admin_role,
+            current_hourly_rate=Decimal("200.00"),
+        )
+        self.sales_users = [
+            User.objects.create_user(
+                username=f"summary_sales_{idx}",
+                password="StrongPass123!",
+                role=employee_role,
+                department=self.sales,
+                current_hourly_rate=Decimal("100.00"),
+            )
+            for idx in range(2)
+        ]
+        self.support_user = User.objects.create_user(
+            username="summary_support",
+            password="StrongPass123!",
+            role=employee_role,
+            department=self.support,
+            current_hourly_rate=Decimal("50.00"),
+        )
+        User.objects.create_user(
+            username="summary_intern",
+            password="StrongPass123!",
+            role=intern_role,
+            department=self.sales,
+        )
+        self.period = date(2026, 3, 1)
+        PayrollService.recalculate_month(year=2026, month=3)
+        self.client.force_authenticate(user=self.super_admin)
+
+    def test_recalculation_builds_rows_per_department(self):
+        rows = {row.department_id: row for row in PayrollMonthSummary.objects.filter(month=self.period)}
+        self.assertEqual(set(rows), {None, self.sales.id, self.support.id})
+        self.assertEqual(rows[self.sales.id].employees, 2)
+        self.assertEqual(rows[self.sales.id].payroll_fund, Decimal("32000.00"))
+        self.assertEqual(rows[self.support.id].payroll_fund, Decimal("8000.00"))
+
+    def test_summary_reads_precomputed_rows_with_department_breakdown(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/api/v1/payroll/admin/summary/?year=2026&month=3")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["payroll_fund"], Decimal("72000.00"))
+        self.assertEqual(response.data["total_employees"], 4)
+        self.assertEqual(response.data["average_salary"], Decimal("18000.00"))
+        self.assertEqual(len(response.data["departments"]), 3)
+        self.assertFalse(any("payroll_payrollrecord" in query["sql"] for query in ctx.captured_queries))
+
+    def test_summary_without_stored_rows_is_computed_without_writing(self):
+        PayrollMonthSummary.objects.filter(month=self.period).delete()
+        response = self.client.get("/api/v1/payroll/admin/summary/?year=2026&month=3")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["payroll_fund"], Decimal("72000.00"))
+        self.assertEqual(len(response.data["departments"]), 3)
+        self.assertFalse(PayrollMonthSummary.objects.filter(month=self.period).exists())
+
+    def test_department_and_role_changes_move_the_user_between_rows(self):
+        user = self.sales_users[0]
+        user.department = self.support
+        user.save()
+        rows = {row.department_id: row for row in PayrollMonthSummary.objects.filter(month=self.period)}
+        self.assertEqual((rows[self.sales.id].employees, rows[self.sales.id].payroll_fund), (1, Decimal("16000.00")))
+        self.assertEqual((rows[self.support.id].employees, rows[self.support.id].payroll_fund), (2, Decimal("24000.00")))
+
+        user.role = Role.objects.get(name=Role.Name.INTERN)
+        user.save()
+        support = PayrollMonthSummary.objects.get(month=self.period, department=self.support)
+        self.assertEqual((support.employees, support.payroll_fund), (1, Decimal("8000.00")))
+
+    def test_status_and_bonus_changes_refresh_the_department_row(self):
+        record = PayrollRecord.objects.get(user=self.sales_users[0], month=self.period)
+        response = self.client.patch(f"/api/v1/payroll/admin/records/{record.id}/status/", {"status": "PAID"}, format="json")
+        self.assertEqual(response.status_code, 200)
+
+        record.refresh_from_db()
+        record.bonus = Decimal("1000.00")
+        record.total_salary += record.bonus
+        record.save(update_fields=["bonus", "total_salary"])
+
+        sales = PayrollMonthSummary.objects.get(month=self.period, department=self.sales)
+        self.assertEqual(sales.paid_employees, 1)
+        self.assertEqual(sales.total_bonus, Decimal("1000.00"))
+        self.assertEqual(sales.payroll_fund, Decimal("33000.00"))
+
+    def test_admin_list_query_count_does_not_depend_on_rows(self):
+        def run():
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get("/api/v1/payroll/admin/?year=2026&month=3")
+            self.assertEqual(response.status_code, 200)
+            return len(ctx.captured_queries), response.data
+
+        few, _ = run()
+        for idx in range(5):
+            User.objects.create_user(
+                username=f"summary_extra_{idx}",
+                password="StrongPass123!",
+                role=self.support_user.role,
+                current_hourly_rate=Decimal("10.00"),
+            )
+        PayrollService.recalculate_month(year=2026, month=3)
+        many, data = run()
+        self.assertEqual(few, many)
+        self.assertEqual(len(data), 9)
+        self.assertEqual(data[0]["pay_type"], "hourly")
@@ -4,10 +4,16 @@ from .views import (
     HourlyRateAdminAPIView,
     HourlyRateHistoryAdminAPIView,
     PayrollAdminAPIView,
+    PayrollDiffAPIView,
+    PayrollDiffExportAPIView,
     PayrollFundSummaryAPIView,
+    PayrollPayslipsExportAPIView,
     PayrollMyAPIView,
     PayrollRecalculateAPIView,
     PayrollRecordStatusAPIView,
+    PayrollRegisterExportAPIView,
+    PayrollRunDetailAPIView,
+    PayrollRunListAPIView,
 )
 
 
@@ -16,6 +22,12 @@ urlpatterns = [
     path("admin/", PayrollAdminAPIView.as_view(), name="payroll-admin"),
     path("admin/summary/", PayrollFundSummaryAPIView.as_view(), name="payroll-admin-summary"),
     path("admin/recalculate/", PayrollRecalculateAPIView.as_view(), name="payroll-recalculate"),
+    path("admin/runs/", PayrollRunListAPIView.as_view(), name="payroll-runs"),
+    path("admin/runs/<int:run_id>/", PayrollRunDetailAPIView.as_view(), name="payroll-run-detail"),
+    path("admin/register/export/", PayrollRegisterExportAPIView.as_view(), name="payroll-register-export"),
+    path("admin/payslips/export/", PayrollPayslipsExportAPIView.as_view(), name="payroll-payslips-export"),
+    path("admin/diff/", PayrollDiffAPIView.as_view(), name="payroll-diff"),
+    path("admin/diff/export/", PayrollDiffExportAPIView.as_view(), name="payroll-diff-export"),
     path("admin/records/<int:record_id>/status/", PayrollRecordStatusAPIView.as_view(), name="payroll-record-status"),
     path("admin/hourly-rates/", HourlyRateAdminAPIView.as_view(), name="payroll-hourly-rates"),
     path("admin/hourly-rates/<int:user_id>/history/", HourlyRateHistoryAdminAPIView.as_view(), name="payroll-hourly-rates-history"),
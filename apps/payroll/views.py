@@ -1,30 +1,47 @@
+import csv
 from datetime import date
+from decimal import Decimal
 
 from django.contrib.auth import get_user_model
-from django.db.models import Avg, Count, DecimalField, Sum, Value
-from django.db.models.functions import Coalesce
+from django.db.models import F
+from django.http import StreamingHttpResponse
 from django.utils import timezone
 from apps.accounts.models import Role
+from apps.common.pagination import CreatedAtCursorPagination
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from .audit import PayrollAuditService
-from .models import HourlyRateHistory, PayrollCompensation, PayrollRecord
+from .models import (
+    HourlyRateHistory,
+    PayrollCompensation,
+    PayrollMonthSummary,
+    PayrollRecord,
+    PayrollRun,
+    PayrollSnapshot,
+)
 from .permissions import IsPayrollAuthenticated, IsPayrollCompensationEditor, IsPayrollSuperAdmin, IsPayrollViewer
 from .policies import PayrollPolicy
 from .serializers import (
     HourlyRateHistorySerializer,
     HourlyRateUpdateSerializer,
     MonthQuerySerializer,
+    PayrollDiffQuerySerializer,
+    PayrollExportQuerySerializer,
     PayrollCompensationSerializer,
     PayrollCompensationUpdateSerializer,
     PayrollRecalculateSerializer,
+    PayrollRecordListSerializer,
     PayrollRecordSerializer,
     PayrollRecordStatusSerializer,
+    PayrollRunSerializer,
 )
-from .services import PayrollService
+from .exports import _Echo, iter_payslips_zip, iter_register_csv, iter_register_xlsx, payslip_contexts, register_rows
+from .runs import RunInProgress, start_or_resume_run
+from .services import PayrollService, default_hours_source, money
+from .snapshots import DIFF_FIELDS, diff_summary, iter_diff, latest_snapshot
 
 
 User = get_user_model()
@@ -38,21 +55,32 @@ class PayrollMyAPIView(APIView):
         query.is_valid(raise_exception=True)
         period = date(query.validated_data["year"], query.validated_data["month"], 1)
 
-        record, was_created = PayrollRecord.objects.select_related("user", "user__payroll_compensation").get_or_create(
-            user=request.user,
-            month=period,
-            defaults={
-                "total_hours": 0,
-                "total_salary": 0,
-                "bonus": 0,
-                "status": PayrollRecord.Status.CALCULATED,
-            },
+        # Read-only: an uncalculated month is served as an unsaved zero record.
+        record = (
+            PayrollRecord.objects.select_related("user", "user__payroll_compensation")
+            .filter(user=request.user, month=period)
+            .first()
         )
+        is_calculated = record is not None and record.status != PayrollRecord.Status.PENDING
+        if record is None:
+            record = PayrollService.virtual_record(user=request.user, month=period)
         payload = PayrollRecordSerializer(record, context={"request": request}).data
-        payload["is_calculated"] = not was_created
+        payload["is_calculated"] = is_calculated
         return Response(payload, status=status.HTTP_200_OK)
 
 
+def _visible_records(request, period):
+    # Pending rows are warm-up placeholders, not calculated pay.
+    qs = (
+        PayrollRecord.objects.filter(month=period)
+        .exclude(user__role__name=Role.Name.INTERN)
+        .exclude(status=PayrollRecord.Status.PENDING)
+    )
+    if PayrollPolicy.can_manage_payroll(request.user):
+        return qs
+    return qs.filter(user__department_id=request.user.department_id).exclude(user=request.user)
+
+
 class PayrollAdminAPIView(APIView):
     permission_classes = [IsAuthenticated, IsPayrollViewer]
 
@@ -60,18 +88,35 @@ class PayrollAdminAPIView(APIView):
         query = MonthQuerySerializer(data=request.query_params)
         query.is_valid(raise_exception=True)
         period = date(query.validated_data["year"], query.validated_data["month"], 1)
-        qs = PayrollRecord.objects.select_related("user", "user__role", "user__payroll_compensation").filter(month=period)
-        qs = qs.exclude(user__role__name=Role.Name.INTERN)
-        if PayrollPolicy.can_manage_payroll(request.user):
-            qs = qs.order_by("user_id")
-        else:
-            qs = qs.filter(user__department_id=request.user.department_id).exclude(user=request.user).order_by("user_id")
+        # Compensation columns come from the same JOIN instead of one related object per row.
+        qs = (
+            _visible_records(request, period)
+            .select_related("user")
+            .annotate(
+                comp_pay_type=F("user__payroll_compensation__pay_type"),
+                comp_hourly_rate=F("user__payroll_compensation__hourly_rate"),
+                comp_minute_rate=F("user__payroll_compensation__minute_rate"),
+                comp_fixed_salary=F("user__payroll_compensation__fixed_salary"),
+            )
+            .order_by("user_id")
+        )
         return Response(
-            PayrollRecordSerializer(qs, many=True, context={"request": request}).data,
+            PayrollRecordListSerializer(qs, many=True, context={"request": request}).data,
             status=status.HTTP_200_OK,
         )
 
 
+def _summary_totals(rows) -> dict:
+    employees = sum(row.employees for row in rows)
+    payroll_fund = sum((row.payroll_fund for row in rows), Decimal("0.00"))
+    return {
+        "payroll_fund": payroll_fund,
+        "average_salary": money(payroll_fund / employees) if employees else Decimal("0.00"),
+        "total_employees": employees,
+        "total_hours": sum((row.total_hours for row in rows), Decimal("0.00")),
+    }
+
+
 class PayrollFundSummaryAPIView(APIView):
     permission_classes = [IsAuthenticated, IsPayrollViewer]
 
@@ -82,37 +127,60 @@ class PayrollFundSummaryAPIView(APIView):
         month = query.validated_data["month"]
         period = date(year, month, 1)
 
-        qs = PayrollRecord.objects.select_related("user", "user__role").filter(month=period).exclude(user__role__name=Role.Name.INTERN)
-        if not PayrollPolicy.can_manage_payroll(request.user):
-            qs = qs.filter(user__department_id=request.user.department_id).exclude(user=request.user)
-        aggregated = qs.aggregate(
-            payroll_fund=Coalesce(
-                Sum("total_salary"),
-                Value(0),
-                output_field=DecimalField(max_digits=12, decimal_places=2),
-            ),
-            average_salary=Coalesce(
-                Avg("total_salary"),
-                Value(0),
-                output_field=DecimalField(max_digits=12, decimal_places=2),
-            ),
-            total_hours=Coalesce(
-                Sum("total_hours"),
-                Value(0),
-                output_field=DecimalField(max_digits=8, decimal_places=2),
-            ),
-            total_employees=Count("id"),
-        )
-
+        # Read-only: a month without stored rows is aggregated on the fly, not saved.
+        if PayrollPolicy.can_manage_payroll(request.user):
+            rows = list(PayrollMonthSummary.objects.filter(month=period)) or PayrollMonthSummary.compute(period)
+        elif request.user.department_id is None:
+            # Users without a department see an empty fund, as before the summary table.
+            rows = []
+        else:
+            department_ids = [request.user.department_id]
+            rows = list(
+                PayrollMonthSummary.objects.filter(month=period, department_id=request.user.department_id)
+            ) or PayrollMonthSummary.compute(period, department_ids=department_ids)
+            # Department viewers do not see their own salary in the fund; interns are not in it.
+            own = (
+                PayrollRecord.objects.filter(user=request.user, month=period)
+                .exclude(user__role__name=Role.Name.INTERN)
+                .values("total_salary", "total_hours", "bonus", "status")
+                .first()
+            )
+            if own and rows:
+                row = rows[0]
+                rows = [
+                    PayrollMonthSummary(
+                        month=period,
+                        department_id=row.department_id,
+                        employees=row.employees - 1,
+                        paid_employees=row.paid_employees - (own["status"] == PayrollRecord.Status.PAID),
+                        payroll_fund=row.payroll_fund - own["total_salary"],
+                        total_bonus=row.total_bonus - own["bonus"],
+                        total_hours=row.total_hours - own["total_hours"],
+                    )
+                ]
+
+        totals = _summary_totals(rows)
         return Response(
             {
                 "year": year,
                 "month": month,
-                "payroll_fund": aggregated["payroll_fund"],
-                "total_fund": aggregated["payroll_fund"],
-                "average_salary": aggregated["average_salary"],
-                "total_employees": aggregated["total_employees"],
-                "total_hours": aggregated["total_hours"],
+                "payroll_fund": totals["payroll_fund"],
+                "total_fund": totals["payroll_fund"],
+                "average_salary": totals["average_salary"],
+                "total_employees": totals["total_employees"],
+                "total_hours": totals["total_hours"],
+                "departments": [
+                    {
+                        "department_id": row.department_id,
+                        "employees": row.employees,
+                        "paid_employees": row.paid_employees,
+                        "payroll_fund": row.payroll_fund,
+                        "average_salary": _summary_totals([row])["average_salary"],
+                        "total_bonus": row.total_bonus,
+                        "total_hours": row.total_hours,
+                    }
+                    for row in rows
+                ],
             },
             status=status.HTTP_200_OK,
         )
@@ -126,23 +194,154 @@ class PayrollRecalculateAPIView(APIView):
         serializer.is_valid(raise_exception=True)
         year = serializer.validated_data["year"]
         month = serializer.validated_data["month"]
+        hours_source = serializer.validated_data.get("hours_source") or default_hours_source()
 
-        result = PayrollService.recalculate_month(year=year, month=month)
-        PayrollAuditService.log_period_generated(request, year=year, month=month, created=result.created, updated=result.updated)
+        try:
+            run, resumed = start_or_resume_run(
+                year=year, month=month, requested_by=request.user, hours_source=hours_source
+            )
+        except RunInProgress as exc:
+            return Response(
+                {"detail": "Payroll run for this month is already in progress.", "run_id": exc.run.id},
+                status=status.HTTP_409_CONFLICT,
+            )
+        if not resumed:
+            PayrollAuditService.log_run_started(request, run)
+        run.refresh_from_db()
 
         return Response(
             {
                 "status": "ok",
+                "run_id": run.id,
+                "run_status": run.status,
+                "resumed": resumed,
                 "year": year,
                 "month": month,
-                "recalculated": result.created + result.updated,
-                "entries_created": result.created,
-                "entries_updated": result.updated,
+                "hours_source": run.hours_source,
+                "recalculated": run.processed_users,
+                "entries_created": run.entries_created,
+                "entries_updated": run.entries_updated,
             },
             status=status.HTTP_200_OK,
         )
 
 
+class PayrollRunListAPIView(APIView):
+    permission_classes = [IsAuthenticated, IsPayrollSuperAdmin]
+
+    def get(self, request):
+        qs = PayrollRun.objects.all()
+        if request.query_params.get("year") or request.query_params.get("month"):
+            query = MonthQuerySerializer(data=request.query_params)
+            query.is_valid(raise_exception=True)
+            qs = qs.filter(month=date(query.validated_data["year"], query.validated_data["month"], 1))
+        paginator = CreatedAtCursorPagination()
+        page = paginator.paginate_queryset(qs, request, view=self)
+        return paginator.get_paginated_response(PayrollRunSerializer(page, many=True).data)
+
+
+class PayrollRunDetailAPIView(APIView):
+    permission_classes = [IsAuthenticated, IsPayrollSuperAdmin]
+
+    def get(self, request, run_id: int):
+        run = PayrollRun.objects.filter(id=run_id).first()
+        if not run:
+            return Response({"detail": "Payroll run not found."}, status=status.HTTP_404_NOT_FOUND)
+        return Response(PayrollRunSerializer(run).data, status=status.HTTP_200_OK)
+
+
+def _resolve_diff_snapshots(query_params):
+    query = PayrollDiffQuerySerializer(data=query_params)
+    query.is_valid(raise_exception=True)
+    data = query.validated_data
+    if "base_run" in data and "run" in data:
+        base = PayrollSnapshot.objects.filter(run_id=data["base_run"]).first()
+        target = PayrollSnapshot.objects.filter(run_id=data["run"]).first()
+    else:
+        base = latest_snapshot(date(data["base_year"], data["base_month"], 1))
+        target = latest_snapshot(date(data["year"], data["month"], 1))
+    return base, target
+
+
+class PayrollDiffAPIView(APIView):
+    permission_classes = [IsAuthenticated, IsPayrollSuperAdmin]
+
+    def get(self, request):
+        base, target = _resolve_diff_snapshots(request.query_params)
+        if not base or not target:
+            return Response({"detail": "Payroll snapshot not found."}, status=status.HTTP_404_NOT_FOUND)
+        rows = list(iter_diff(base, target))
+        payload = diff_summary(base, target, rows)
+        payload["rows"] = [row.as_dict() for row in rows]
+        return Response(payload, status=status.HTTP_200_OK)
+
+
+class PayrollDiffExportAPIView(APIView):
+    permission_classes = [IsAuthenticated, IsPayrollSuperAdmin]
+
+    def get(self, request):
+        base, target = _resolve_diff_snapshots(request.query_params)
+        if not base or not target:
+            return Response({"detail": "Payroll snapshot not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        writer = csv.writer(_Echo())
+
+        def stream():
+            yield writer.writerow(DIFF_FIELDS)
+            for row in iter_diff(base, target):
+                values = row.as_dict()
+                values["reasons"] = ";".join(values["reasons"])
+                yield writer.writerow([values[name] for name in DIFF_FIELDS])
+
+        response = StreamingHttpResponse(stream(), content_type="text/csv; charset=utf-8")
+        filename = f"payroll-diff-{base.month:%Y-%m}-{target.month:%Y-%m}.csv"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+
+class PayrollRegisterExportAPIView(APIView):
+    permission_classes = [IsAuthenticated, IsPayrollViewer]
+
+    def get(self, request):
+        query = PayrollExportQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        period = date(query.validated_data["year"], query.validated_data["month"], 1)
+        rows = register_rows(_visible_records(request, period))
+
+        if query.validated_data["file_format"] == "xlsx":
+            response = StreamingHttpResponse(
+                iter_register_xlsx(rows),
+                content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            )
+            extension = "xlsx"
+        else:
+            response = StreamingHttpResponse(iter_register_csv(rows), content_type="text/csv; charset=utf-8")
+            extension = "csv"
+        response["Content-Disposition"] = f'attachment; filename="payroll-register-{period:%Y-%m}.{extension}"'
+        return response
+
+
+class PayrollPayslipsExportAPIView(APIView):
+    permission_classes = [IsAuthenticated, IsPayrollViewer]
+
+    def get(self, request):
+        query = PayrollExportQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        year = query.validated_data["year"]
+        month = query.validated_data["month"]
+        period = date(year, month, 1)
+        records = _visible_records(request, period)
+        if query.validated_data.get("user_ids"):
+            records = records.filter(user_id__in=query.validated_data["user_ids"])
+
+        response = StreamingHttpResponse(
+            iter_payslips_zip(payslip_contexts(records, year=year, month=month)),
+            content_type="application/zip",
+        )
+        response["Content-Disposition"] = f'attachment; filename="payslips-{period:%Y-%m}.zip"'
+        return response
+
+
 class PayrollRecordStatusAPIView(APIView):
     permission_classes = [IsAuthenticated, IsPayrollSuperAdmin]
 
@@ -150,6 +349,11 @@ class PayrollRecordStatusAPIView(APIView):
         record = PayrollRecord.objects.select_related("user").filter(id=record_id).first()
         if not record:
             return Response({"detail": "Payroll record not found."}, status=status.HTTP_404_NOT_FOUND)
+        if record.status == PayrollRecord.Status.PENDING:
+            return Response(
+                {"detail": "Payroll record is not calculated yet."},
+                status=status.HTTP_409_CONFLICT,
+            )
 
         serializer = PayrollRecordStatusSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
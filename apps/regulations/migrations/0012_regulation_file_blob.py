@@ -0,0 +1,20 @@
+# Generated by Django 4.2.30 on 2026-10-19 09:52
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0005_uploadblob_uploadsession_and_more'),
+        ('regulations', '0011_regulationknowledgecheck_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='regulation',
+            name='file_blob',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='regulations', to='common.uploadblob', verbose_name='Загруженный файл'),
+        ),
+    ]
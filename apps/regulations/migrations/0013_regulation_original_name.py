@@ -0,0 +1,37 @@
+# Generated by Django 4.2.30 on 2026-10-19 10:50
+
+import posixpath
+
+from django.db import migrations, models
+
+
+def forwards(apps, schema_editor):
+    # Blob files take the name of the latest completed upload of that blob,
+    # direct uploads the last part of their path.
+    Regulation = apps.get_model("regulations", "Regulation")
+    UploadSession = apps.get_model("common", "UploadSession")
+    names = dict(
+        UploadSession.objects.filter(status="completed", blob__isnull=False)
+        .order_by("created_at")
+        .values_list("blob_id", "filename")
+    )
+    for regulation in Regulation.objects.exclude(file="").exclude(file__isnull=True).only("id", "file", "file_blob_id"):
+        name = names.get(regulation.file_blob_id) or posixpath.basename(regulation.file.name)
+        Regulation.objects.filter(id=regulation.id).update(original_name=name[:255])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0005_uploadblob_uploadsession_and_more'),
+        ('regulations', '0012_regulation_file_blob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='regulation',
+            name='original_name',
+            field=models.CharField(blank=True, default='', max_length=255, verbose_name='Имя файла'),
+        ),
+        migrations.RunPython(forwards, migrations.RunPython.noop),
+    ]
@@ -5,6 +5,9 @@ from django.core.exceptions import ValidationError
 from django.core.validators import FileExtensionValidator
 from django.db import models
 
+from apps.common.models import UploadBlob
+from apps.common.uploads import release_blob
+
 
 def validate_regulation_file_size(value):
     max_size = 20 * 1024 * 1024  # 20MB
@@ -42,6 +45,15 @@ class Regulation(models.Model):
             validate_regulation_file_size,
         ],
     )
+    original_name = models.CharField(max_length=255, blank=True, default="", verbose_name="Имя файла")
+    file_blob = models.ForeignKey(
+        UploadBlob,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name="regulations",
+        verbose_name="Загруженный файл",
+    )
     position = models.PositiveIntegerField(default=0, verbose_name="Порядок")
     is_active = models.BooleanField(default=True, verbose_name="Активен")
     is_mandatory_on_day_one = models.BooleanField(
@@ -97,6 +109,12 @@ class Regulation(models.Model):
         self.full_clean()
         return super().save(*args, **kwargs)
 
+    def delete(self, *args, **kwargs):
+        blob_id = self.file_blob_id
+        result = super().delete(*args, **kwargs)
+        release_blob(blob_id)
+        return result
+
     @property
     def requires_quiz(self) -> bool:
         return bool(
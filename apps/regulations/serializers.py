@@ -1,6 +1,9 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
 from rest_framework import serializers
 
 from apps.common.i18n import request_language, status_label
+from apps.common.uploads import attach_blob, resolve_blob, validate_blob_for
 from .models import (
     InternOnboardingRequest,
     Regulation,
@@ -154,6 +157,9 @@ class RegulationSerializer(serializers.ModelSerializer):
 
 
 class RegulationAdminSerializer(serializers.ModelSerializer):
+    # Id of a blob from a completed chunked upload (``/api/v1/common/uploads/``).
+    file_blob_id = serializers.IntegerField(write_only=True, required=False, allow_null=True)
+
     class Meta:
         model = Regulation
         fields = (
@@ -163,6 +169,8 @@ class RegulationAdminSerializer(serializers.ModelSerializer):
             "type",
             "external_url",
             "file",
+            "original_name",
+            "file_blob_id",
             "position",
             "is_active",
             "is_mandatory_on_day_one",
@@ -174,12 +182,32 @@ class RegulationAdminSerializer(serializers.ModelSerializer):
             "created_at",
             "updated_at",
         )
-        read_only_fields = ("id", "created_at", "updated_at")
+        read_only_fields = ("id", "original_name", "created_at", "updated_at")
+
+    def validate_file_blob_id(self, value):
+        if value is None:
+            return None
+        request = self.context.get("request")
+        blob, filename = resolve_blob(request.user, value)
+        if blob is None:
+            raise serializers.ValidationError("Upload not found.")
+        try:
+            validate_blob_for(Regulation, "file", blob, filename)
+        except DjangoValidationError as exc:
+            raise serializers.ValidationError(exc.messages) from exc
+        return blob, filename
 
     def validate(self, attrs):
+        if "file_blob_id" in attrs:
+            resolved = attrs.pop("file_blob_id")
+            attrs["file_blob"] = None
+            if resolved is not None:
+                attrs["file_blob"], attrs["original_name"] = resolved
+        elif attrs.get("file"):
+            attrs["original_name"] = attrs["file"].name
         reg_type = attrs.get("type", getattr(self.instance, "type", None))
         external_url = attrs.get("external_url", getattr(self.instance, "external_url", None))
-        file = attrs.get("file", getattr(self.instance, "file", None))
+        file = attrs.get("file_blob") or attrs.get("file", getattr(self.instance, "file", None))
 
         if reg_type == Regulation.RegulationType.LINK:
             if not external_url:
@@ -187,6 +215,8 @@ class RegulationAdminSerializer(serializers.ModelSerializer):
                     {"external_url": "For type 'link' external_url is required."}
                 )
             attrs["file"] = None
+            attrs["original_name"] = ""
+            attrs.pop("file_blob", None)
 
         if reg_type == Regulation.RegulationType.FILE:
             if not file:
@@ -197,6 +227,29 @@ class RegulationAdminSerializer(serializers.ModelSerializer):
 
         return attrs
 
+    @transaction.atomic
+    def create(self, validated_data):
+        blob = validated_data.pop("file_blob", None)
+        if blob is None:
+            return super().create(validated_data)
+        validated_data.pop("file", None)
+        filename = validated_data.pop("original_name", "")
+        instance = Regulation(**validated_data)
+        attach_blob(instance, "file", blob, blob_field="file_blob", filename=filename, name_field="original_name")
+        instance.save()
+        return instance
+
+    @transaction.atomic
+    def update(self, instance, validated_data):
+        blob = validated_data.pop("file_blob", None)
+        if blob is not None:
+            validated_data.pop("file", None)
+            filename = validated_data.pop("original_name", "")
+            attach_blob(instance, "file", blob, blob_field="file_blob", filename=filename, name_field="original_name")
+        elif "file" in validated_data and instance.file_blob_id:
+            attach_blob(instance, "file", None, blob_field="file_blob", name_field="original_name")
+        return super().update(instance, validated_data)
+
 
 class RegulationAcknowledgementSerializer(serializers.ModelSerializer):
     class Meta:
@@ -157,7 +157,8 @@ class RegulationDownloadAPIView(APIView):
         if not file_path.exists():
             return Response({"detail": "Regulation file not found on disk."}, status=status.HTTP_404_NOT_FOUND)
 
-        return FileResponse(file_path.open("rb"), as_attachment=True, filename=file_path.name)
+        filename = regulation.original_name or file_path.name
+        return FileResponse(file_path.open("rb"), as_attachment=True, filename=filename)
 
 
 class RegulationViewAPIView(APIView):
@@ -172,15 +173,16 @@ class RegulationViewAPIView(APIView):
         if not file_path.exists():
             return Response({"detail": "Regulation file not found on disk."}, status=status.HTTP_404_NOT_FOUND)
 
-        content_type, _ = mimetypes.guess_type(str(file_path))
-        response = FileResponse(
+        # Blob files are stored under their hash; show the name they were uploaded under.
+        filename = regulation.original_name or file_path.name
+        content_type, _ = mimetypes.guess_type(filename)
+        # FileResponse sets an "inline" Content-Disposition, RFC 5987-encoding non-ASCII names.
+        return FileResponse(
             file_path.open("rb"),
             as_attachment=False,
-            filename=file_path.name,
+            filename=filename,
             content_type=content_type or "application/octet-stream",
         )
-        response["Content-Disposition"] = f'inline; filename="{file_path.name}"'
-        return response
 class RegulationAdminListCreateAPIView(ListCreateAPIView):
     serializer_class = RegulationAdminSerializer
     permission_classes = [IsAuthenticated, IsAdminLike]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.30 on 2026-10-19 11:21
+
+import posixpath
+
+from django.db import migrations, models
+
+
+def forwards(apps, schema_editor):
+    # Blob attachments take the name of the latest completed upload of that
+    # blob, direct uploads the last part of their path.
+    OnboardingReport = apps.get_model("reports", "OnboardingReport")
+    UploadSession = apps.get_model("common", "UploadSession")
+    names = dict(
+        UploadSession.objects.filter(status="completed", blob__isnull=False)
+        .order_by("created_at")
+        .values_list("blob_id", "filename")
+    )
+    reports = OnboardingReport.objects.exclude(attachment="").exclude(attachment__isnull=True)
+    for report in reports.only("id", "attachment", "attachment_blob_id"):
+        name = names.get(report.attachment_blob_id) or posixpath.basename(report.attachment.name)
+        OnboardingReport.objects.filter(id=report.id).update(original_name=name[:255])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0005_uploadblob_uploadsession_and_more'),
+        ('reports', '0006_onboardingreport_attachment_blob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='onboardingreport',
+            name='original_name',
+            field=models.CharField(blank=True, default='', max_length=255, verbose_name='Имя файла'),
+        ),
+        migrations.RunPython(forwards, migrations.RunPython.noop),
+    ]
@@ -4,6 +4,8 @@ from django.core.validators import FileExtensionValidator
 from django.db import models
 
 from apps.accounts.models import User
+from apps.common.models import UploadBlob
+from apps.common.uploads import release_blob
 from apps.onboarding_core.models import OnboardingDay
 
 
@@ -74,6 +76,15 @@ class OnboardingReport(models.Model):
         ],
         verbose_name="Вложение",
     )
+    attachment_blob = models.ForeignKey(
+        UploadBlob,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name="onboarding_reports",
+        verbose_name="Загруженный файл вложения",
+    )
+    original_name = models.CharField(max_length=255, blank=True, default="", verbose_name="Имя файла")
 
     status = models.CharField(
         max_length=20,
@@ -106,6 +117,12 @@ class OnboardingReport(models.Model):
             author=self.user,
         )
 
+    def delete(self, *args, **kwargs):
+        blob_id = self.attachment_blob_id
+        result = super().delete(*args, **kwargs)
+        release_blob(blob_id)
+        return result
+
     def can_be_modified(self) -> bool:
         return self.status in [self.Status.DRAFT, self.Status.REVISION, self.Status.REJECTED]
 
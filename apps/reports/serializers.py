@@ -1,7 +1,9 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
 from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 
 from apps.common.i18n import request_language, status_label
+from apps.common.uploads import resolve_blob, validate_blob_for
 from .models import (
     EmployeeDailyReport,
     OnboardingReport,
@@ -30,13 +32,14 @@ class OnboardingReportSerializer(serializers.ModelSerializer):
             "report_description",
             "github_url",
             "attachment",
+            "original_name",
             "status",
             "status_label",
             "reviewer_comment",
             "created_at",
             "updated_at",
         ]
-        read_only_fields = ("status", "reviewer_comment", "created_at", "updated_at")
+        read_only_fields = ("original_name", "status", "reviewer_comment", "created_at", "updated_at")
 
     def get_status_label(self, obj):
         return status_label(obj.status, request_language(self.context.get("request")))
@@ -51,6 +54,21 @@ class OnboardingReportCreateSerializer(serializers.Serializer):
     report_description = serializers.CharField(allow_blank=True, required=False)
     github_url = serializers.URLField(allow_blank=True, required=False)
     attachment = serializers.FileField(required=False, allow_null=True)
+    # Id of a blob from a completed chunked upload (``/api/v1/common/uploads/``).
+    attachment_blob_id = serializers.IntegerField(required=False, allow_null=True)
+
+    def validate_attachment_blob_id(self, value):
+        if value is None:
+            return None
+        request = self.context.get("request")
+        blob, filename = resolve_blob(request.user, value)
+        if blob is None:
+            raise serializers.ValidationError("Upload not found.")
+        try:
+            validate_blob_for(OnboardingReport, "attachment", blob, filename)
+        except DjangoValidationError as exc:
+            raise serializers.ValidationError(exc.messages) from exc
+        return blob, filename
 
     def validate(self, data):
         github_url = (data.get("github_url") or "").strip()
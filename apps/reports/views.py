@@ -11,6 +11,7 @@ from django.utils import timezone
 from apps.accounts.access_policy import AccessPolicy
 from apps.accounts.models import Role, User
 from apps.common.models import Notification
+from apps.common.uploads import attach_blob
 from apps.common.notification_codes import NotificationCode, NotificationEntity
 from .models import EmployeeDailyReport, OnboardingReport, OnboardingReportLog, ReportNotification
 from .serializers import (
@@ -49,7 +50,7 @@ class SubmitOnboardingReportView(APIView):
                 {"detail": "Only intern can submit onboarding report."},
                 status=drf_status.HTTP_403_FORBIDDEN,
             )
-        serializer = OnboardingReportCreateSerializer(data=request.data)
+        serializer = OnboardingReportCreateSerializer(data=request.data, context={"request": request})
         serializer.is_valid(raise_exception=True)
 
         day = get_object_or_404(
@@ -72,6 +73,7 @@ class SubmitOnboardingReportView(APIView):
         report_description = serializer.validated_data.get("report_description", "").strip()
         github_url = serializer.validated_data.get("github_url", "").strip()
         attachment = serializer.validated_data.get("attachment")
+        attachment_blob, attachment_name = serializer.validated_data.get("attachment_blob_id") or (None, "")
 
         if day.day_number == 2:
             did = did or report_title
@@ -96,8 +98,19 @@ class SubmitOnboardingReportView(APIView):
             existing_report.report_title = report_title
             existing_report.report_description = report_description
             existing_report.github_url = github_url
-            if attachment is not None:
+            if attachment_blob is not None:
+                attach_blob(
+                    existing_report,
+                    "attachment",
+                    attachment_blob,
+                    blob_field="attachment_blob",
+                    filename=attachment_name,
+                    name_field="original_name",
+                )
+            elif attachment is not None:
+                attach_blob(existing_report, "attachment", None, blob_field="attachment_blob")
                 existing_report.attachment = attachment
+                existing_report.original_name = attachment.name
             existing_report.save(
                 update_fields=[
                     "did",
@@ -107,6 +120,8 @@ class SubmitOnboardingReportView(APIView):
                     "report_description",
                     "github_url",
                     "attachment",
+                    "attachment_blob",
+                    "original_name",
                     "updated_at",
                 ]
             )
@@ -134,7 +149,7 @@ class SubmitOnboardingReportView(APIView):
                 }
             )
 
-        report = OnboardingReport.objects.create(
+        report = OnboardingReport(
             user=request.user,
             day=day,
             did=did,
@@ -144,7 +159,18 @@ class SubmitOnboardingReportView(APIView):
             report_description=report_description,
             github_url=github_url,
             attachment=attachment,
+            original_name=attachment.name if attachment is not None else "",
         )
+        if attachment_blob is not None:
+            attach_blob(
+                report,
+                "attachment",
+                attachment_blob,
+                blob_field="attachment_blob",
+                filename=attachment_name,
+                name_field="original_name",
+            )
+        report.save()
 
         OnboardingReportLog.objects.create(
             report=report,
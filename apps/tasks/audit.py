@@ -64,3 +64,22 @@ class TasksAuditService:
             },
         )
 
+
+    @classmethod
+    def log_weekly_plan_reminders_generated(cls, result, *, request=None) -> None:
+        actor = request.user if request is not None else None
+        log_event(
+            action=AuditEvents.TASK_WEEKLY_PLAN_REMINDERS_GENERATED,
+            actor=actor,
+            object_type="weekly_plan_reminders",
+            object_id=result.week_start.isoformat(),
+            level="info",
+            category="content",
+            ip_address=cls._ip(request) if request is not None else None,
+            metadata={
+                "actor_id": actor.id if actor is not None else None,
+                "week_start": result.week_start.isoformat(),
+                "created": result.created,
+                "boards_created": result.boards_created,
+            },
+        )
@@ -0,0 +1,111 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from apps.accounts.models import Role, User
+from apps.tasks.models import Board, Column, Task
+from apps.tasks.policies import TaskPolicy
+from apps.tasks.ranking import spaced_ranks
+from apps.tasks.search import search_tasks
+
+
+VOCABULARY = (
+    "invoice deploy report release backlog finance payroll onboarding review migration "
+    "budget contract audit client meeting schedule incident hotfix design roadmap "
+    "отчёт релиз договор бюджет клиент встреча график проверка миграция дизайн"
+).split()
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark task full-text search latency (admin and employee scope) on a large "
+        "synthetic table. Runs inside a rolled-back transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tasks", type=int, default=1_000_000)
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--queries", type=int, default=50)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._run(options)
+                raise _Rollback()
+        except _Rollback:
+            pass
+
+    def _sentence(self, rng, words):
+        return " ".join(rng.choice(VOCABULARY) for _ in range(words))
+
+    def _run(self, options):
+        rng = random.Random(options["seed"])
+        role, _ = Role.objects.get_or_create(name=Role.Name.EMPLOYEE, defaults={"level": Role.Level.EMPLOYEE})
+        admin_role, _ = Role.objects.get_or_create(name=Role.Name.ADMINISTRATOR, defaults={"level": Role.Level.ADMINISTRATOR})
+        admin = User.objects.create(username="bench_search_admin", role=admin_role)
+        users = User.objects.bulk_create(
+            [User(username=f"bench_search_{idx}", role=role) for idx in range(options["users"])],
+            batch_size=1000,
+        )
+        boards = Board.objects.bulk_create(
+            [Board(name=f"bench {user.username}", is_personal=True, created_by=user) for user in users],
+            batch_size=1000,
+        )
+        columns = Column.objects.bulk_create(
+            [Column(board=board, name="Новые", order=1) for board in boards],
+            batch_size=1000,
+        )
+
+        total = options["tasks"]
+        batch_size = options["batch_size"]
+        per_column = -(-total // len(columns))
+        ranks = spaced_ranks(per_column)
+        started = time.perf_counter()
+        for offset in range(0, total, batch_size):
+            Task.objects.bulk_create(
+                [
+                    Task(
+                        board=boards[index % len(boards)],
+                        column=columns[index % len(columns)],
+                        title=self._sentence(rng, 4),
+                        description=self._sentence(rng, 25),
+                        assignee=users[index % len(users)],
+                        reporter=users[index % len(users)],
+                        rank=ranks[index // len(columns)],
+                    )
+                    for index in range(offset, min(offset + batch_size, total))
+                ]
+            )
+        self.stdout.write(f"seeded tasks={total} vendor={connection.vendor} time={time.perf_counter() - started:.1f}s")
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE tasks_task")
+
+        scopes = {
+            "admin": TaskPolicy.visible_tasks(admin, Task.objects.all()),
+            "employee": TaskPolicy.visible_tasks(users[0], Task.objects.all()),
+        }
+        for label, qs in scopes.items():
+            timings = []
+            for _ in range(options["queries"]):
+                text = " ".join(rng.sample(VOCABULARY, 2))
+                began = time.perf_counter()
+                hits = search_tasks(qs.select_related("assignee", "reporter", "column", "board"), text, limit=20)
+                timings.append((time.perf_counter() - began) * 1000)
+            timings.sort()
+            p95 = timings[max(0, int(len(timings) * 0.95) - 1)]
+            self.stdout.write(
+                f"{label}: queries={len(timings)} last_hits={len(hits)} "
+                f"p50={statistics.median(timings):.1f}ms p95={p95:.1f}ms max={timings[-1]:.1f}ms"
+            )
+
+        self.stdout.write(self.style.SUCCESS("benchmark finished, data rolled back"))
@@ -0,0 +1,28 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from apps.tasks.audit import TasksAuditService
+from apps.tasks.services import generate_weekly_plan_reminders
+
+
+class Command(BaseCommand):
+    help = "Creates the weekly-plan reminder task for every active employee who has no plan for next week."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--week-start",
+            type=date.fromisoformat,
+            help="Monday of the target week (YYYY-MM-DD). Defaults to next Monday.",
+        )
+
+    def handle(self, *args, **options):
+        result = generate_weekly_plan_reminders(week_start=options["week_start"])
+        if result.created:
+            TasksAuditService.log_weekly_plan_reminders_generated(result)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"weekly_plan_reminders: week_start={result.week_start.isoformat()} "
+                f"created={result.created} boards_created={result.boards_created}"
+            )
+        )
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from apps.tasks.services import columns_needing_rebalance, rebalance_column
+
+
+class Command(BaseCommand):
+    help = "Rewrites task ranks as short evenly spaced keys in columns whose ranks grew too long."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--column-id", type=int, help="Rebalance only this column (regardless of rank length).")
+
+    def handle(self, *args, **options):
+        column_ids = [options["column_id"]] if options["column_id"] else list(columns_needing_rebalance())
+        updated = 0
+        for column_id in column_ids:
+            updated += rebalance_column(column_id)
+        self.stdout.write(self.style.SUCCESS(f"task_rank_rebalance: columns={len(column_ids)} tasks_updated={updated}"))
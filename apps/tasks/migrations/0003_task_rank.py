@@ -0,0 +1,39 @@
+# Generated by Django 4.2.30 on 2026-10-19 09:41
+
+from django.db import migrations, models
+
+from apps.tasks.ranking import spaced_ranks
+
+
+def forwards(apps, schema_editor):
+    Task = apps.get_model("tasks", "Task")
+    column_ids = list(Task.objects.order_by().values_list("column_id", flat=True).distinct())
+    for column_id in column_ids:
+        tasks = list(Task.objects.filter(column_id=column_id).order_by("created_at", "id").only("id"))
+        for task, rank in zip(tasks, spaced_ranks(len(tasks))):
+            task.rank = rank
+        Task.objects.bulk_update(tasks, ["rank"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0002_task_onboarding_day_taskcomment_taskattachment'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='task',
+            name='tasks_task_column__b027ef_idx',
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='rank',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.RunPython(forwards, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['column', 'rank'], name='tasks_task_column__131ec7_idx'),
+        ),
+    ]
@@ -0,0 +1,94 @@
+# Generated by Django 4.2.30 on 2026-10-19 09:45
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+# Title (A), description (B) and comments (C) are indexed with both the
+# russian and english configurations; attachment file names (D) with "simple".
+FORWARD_SQL = """
+CREATE OR REPLACE FUNCTION tasks_task_search_vector_update() RETURNS trigger AS $$
+DECLARE
+    comments text;
+    files text;
+BEGIN
+    SELECT coalesce(string_agg(c.text, ' '), '') INTO comments
+    FROM tasks_taskcomment c WHERE c.task_id = NEW.id;
+    SELECT coalesce(string_agg(regexp_replace(a.file, '^.*/', ''), ' '), '') INTO files
+    FROM tasks_taskattachment a WHERE a.task_id = NEW.id;
+    NEW.search_vector :=
+        setweight(to_tsvector('russian', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('russian', coalesce(NEW.description, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(NEW.description, '')), 'B') ||
+        setweight(to_tsvector('russian', comments), 'C') ||
+        setweight(to_tsvector('english', comments), 'C') ||
+        setweight(to_tsvector('simple', regexp_replace(files, '[._-]+', ' ', 'g')), 'D');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER tasks_task_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, description, search_vector ON tasks_task
+    FOR EACH ROW EXECUTE FUNCTION tasks_task_search_vector_update();
+
+-- Child rows reset the parent's vector; the BEFORE UPDATE trigger rebuilds it.
+CREATE OR REPLACE FUNCTION tasks_task_search_vector_touch() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE tasks_task SET search_vector = NULL WHERE id = OLD.task_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        UPDATE tasks_task SET search_vector = NULL WHERE id = NEW.task_id;
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER tasks_taskcomment_search_vector_trigger
+    AFTER INSERT OR UPDATE OR DELETE ON tasks_taskcomment
+    FOR EACH ROW EXECUTE FUNCTION tasks_task_search_vector_touch();
+
+CREATE TRIGGER tasks_taskattachment_search_vector_trigger
+    AFTER INSERT OR UPDATE OR DELETE ON tasks_taskattachment
+    FOR EACH ROW EXECUTE FUNCTION tasks_task_search_vector_touch();
+
+CREATE INDEX tasks_task_search_vector_gin ON tasks_task USING gin (search_vector);
+
+UPDATE tasks_task SET search_vector = NULL;
+"""
+
+REVERSE_SQL = """
+DROP INDEX IF EXISTS tasks_task_search_vector_gin;
+DROP TRIGGER IF EXISTS tasks_taskattachment_search_vector_trigger ON tasks_taskattachment;
+DROP TRIGGER IF EXISTS tasks_taskcomment_search_vector_trigger ON tasks_taskcomment;
+DROP TRIGGER IF EXISTS tasks_task_search_vector_trigger ON tasks_task;
+DROP FUNCTION IF EXISTS tasks_task_search_vector_touch();
+DROP FUNCTION IF EXISTS tasks_task_search_vector_update();
+"""
+
+
+def forwards(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(FORWARD_SQL)
+
+
+def backwards(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(REVERSE_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0003_task_rank'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(forwards, backwards),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.30 on 2026-10-19 09:57
+
+from django.db import migrations, models
+
+
+# The name heuristic metrics used before columns carried an explicit flag.
+CLOSED_COLUMN_NAMES = {"done", "completed", "closed", "завершено"}
+
+
+def forwards(apps, schema_editor):
+    Column = apps.get_model("tasks", "Column")
+    done_ids = [
+        column_id
+        for column_id, name in Column.objects.values_list("id", "name")
+        if name.strip().lower() in CLOSED_COLUMN_NAMES
+    ]
+    Column.objects.filter(id__in=done_ids).update(is_done=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0005_taskattachment_blob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='column',
+            name='is_done',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(forwards, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 4.2.30 on 2026-10-19 10:50
+
+import posixpath
+
+from django.db import migrations, models
+
+
+# Attachment names in the search vector come from original_name; blob files
+# are stored under their hash, so the path says nothing about the file.
+FILES_SQL = """
+CREATE OR REPLACE FUNCTION tasks_task_search_vector_update() RETURNS trigger AS $$
+DECLARE
+    comments text;
+    files text;
+BEGIN
+    SELECT coalesce(string_agg(c.text, ' '), '') INTO comments
+    FROM tasks_taskcomment c WHERE c.task_id = NEW.id;
+    SELECT coalesce(string_agg({name}, ' '), '') INTO files
+    FROM tasks_taskattachment a WHERE a.task_id = NEW.id;
+    NEW.search_vector :=
+        setweight(to_tsvector('russian', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('russian', coalesce(NEW.description, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(NEW.description, '')), 'B') ||
+        setweight(to_tsvector('russian', comments), 'C') ||
+        setweight(to_tsvector('english', comments), 'C') ||
+        setweight(to_tsvector('simple', regexp_replace(files, '[._-]+', ' ', 'g')), 'D');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+"""
+FILE_PATH_NAME = "regexp_replace(a.file, '^.*/', '')"
+ORIGINAL_NAME = f"coalesce(nullif(a.original_name, ''), {FILE_PATH_NAME})"
+
+
+def forwards(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(FILES_SQL.format(name=ORIGINAL_NAME))
+
+    # Blob attachments take the name of the uploader's completed session,
+    # direct uploads the last part of their path. Each save re-indexes the task.
+    TaskAttachment = apps.get_model("tasks", "TaskAttachment")
+    UploadSession = apps.get_model("common", "UploadSession")
+    names = {}
+    for owner_id, blob_id, filename in (
+        UploadSession.objects.filter(status="completed", blob__isnull=False)
+        .order_by("created_at")
+        .values_list("owner_id", "blob_id", "filename")
+    ):
+        names[(owner_id, blob_id)] = filename
+    for attachment in TaskAttachment.objects.only("id", "file", "blob_id", "uploaded_by_id").iterator():
+        name = names.get((attachment.uploaded_by_id, attachment.blob_id)) or posixpath.basename(attachment.file.name)
+        TaskAttachment.objects.filter(id=attachment.id).update(original_name=name[:255])
+
+
+def backwards(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(FILES_SQL.format(name=FILE_PATH_NAME))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0005_uploadblob_uploadsession_and_more'),
+        ('tasks', '0006_column_is_done'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='taskattachment',
+            name='original_name',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.RunPython(forwards, backwards),
+    ]
@@ -0,0 +1,18 @@
+from django.db import migrations
+
+
+def forwards(apps, schema_editor):
+    # Default boards got their "Завершенные" column without the done flag.
+    Column = apps.get_model("tasks", "Column")
+    Column.objects.filter(board__is_personal=True, order=4, name="Завершенные", is_done=False).update(is_done=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0007_taskattachment_original_name'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,14 @@
 from django.conf import settings
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models import Max
 
 from apps.accounts.models import Department
+from apps.common.models import UploadBlob
+
+from apps.common.uploads import release_blob
+
+from .ranking import rank_between
 
 
 class Board(models.Model):
@@ -34,6 +41,7 @@ class Column(models.Model):
     board = models.ForeignKey(Board, on_delete=models.CASCADE, related_name="columns")
     name = models.CharField(max_length=100)
     order = models.PositiveIntegerField(default=0)
+    is_done = models.BooleanField(default=False)
 
     class Meta:
         ordering = ["order", "id"]
@@ -43,6 +51,12 @@ class Column(models.Model):
         return f"{self.board_id}:{self.name}"
 
 
+class TaskManager(models.Manager):
+    def get_queryset(self):
+        # The tsvector is only ever read by search queries.
+        return super().get_queryset().defer("search_vector")
+
+
 class Task(models.Model):
     class Priority(models.TextChoices):
         LOW = "low", "Low"
@@ -64,6 +78,9 @@ class Task(models.Model):
         related_name="reported_tasks",
     )
     due_date = models.DateField(null=True, blank=True)
+    rank = models.CharField(max_length=64, blank=True, default="")
+    # PostgreSQL only: maintained by triggers (see migration 0004), NULL elsewhere.
+    search_vector = SearchVectorField(null=True, editable=False)
     priority = models.CharField(max_length=20, choices=Priority.choices, default=Priority.MEDIUM)
     onboarding_day = models.ForeignKey(
         "onboarding_core.OnboardingDay",
@@ -75,18 +92,32 @@ class Task(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = TaskManager()
+
     class Meta:
         ordering = ["-created_at"]
         indexes = [
             models.Index(fields=["assignee"]),
             models.Index(fields=["reporter"]),
-            models.Index(fields=["column"]),
+            models.Index(fields=["column", "rank"]),
             models.Index(fields=["due_date"]),
         ]
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        if self._state.adding and not self.rank and self.column_id:
+            # New tasks go to the bottom of their column.
+            last = type(self).objects.filter(column_id=self.column_id).aggregate(last=Max("rank"))["last"]
+            self.rank = rank_between(last, None)
+        super().save(*args, **kwargs)
+        # services imports this module, so the rebalance helpers are imported here.
+        from .services import dispatch_rebalance, rank_max_length
+
+        if self.column_id and len(self.rank) > rank_max_length():
+            dispatch_rebalance(self.column_id)
+
 
 class TaskComment(models.Model):
     task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name="comments")
@@ -108,6 +139,15 @@ class TaskComment(models.Model):
 class TaskAttachment(models.Model):
     task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name="attachments")
     file = models.FileField(upload_to="task_attachments/")
+    # Name the file was uploaded under; blob files are stored under their hash.
+    original_name = models.CharField(max_length=255, blank=True, default="")
+    blob = models.ForeignKey(
+        UploadBlob,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name="task_attachments",
+    )
     uploaded_by = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.PROTECT,
@@ -121,3 +161,9 @@ class TaskAttachment(models.Model):
     def __str__(self):
         return f"{self.task_id}:{self.id}"
 
+    def delete(self, *args, **kwargs):
+        blob_id = self.blob_id
+        result = super().delete(*args, **kwargs)
+        release_blob(blob_id)
+        return result
+
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from django.db.models import Q
+
 from apps.accounts.access_policy import AccessPolicy
 
 
@@ -50,3 +52,15 @@ class TaskPolicy:
         if task.reporter_id == actor.id:
             return True
         return AccessPolicy.is_teamlead(actor) and task.assignee.manager_id == actor.id
+
+    @classmethod
+    def visible_tasks(cls, actor, qs):
+        """Queryset form of ``can_view_task``."""
+        if not actor or not actor.is_authenticated:
+            return qs.none()
+        if cls.is_admin_like(actor):
+            return qs
+        condition = Q(assignee_id=actor.id) | Q(reporter_id=actor.id)
+        if AccessPolicy.is_teamlead(actor):
+            condition |= Q(assignee__manager_id=actor.id)
+        return qs.filter(condition)
@@ -0,0 +1,97 @@
+"""
+Fractional (lexicographic) ranks for ordering tasks inside a column.
+
+A rank is a base-36 fraction written with ``0-9a-z`` and never ends with
+``0``, so there is always a key strictly between any two distinct ranks and
+a move rewrites only the moved row. Appends to either end step the first
+digit that still has room instead of splitting the gap, so they grow by one
+digit per ~35 appends. Keys grow faster when users keep dropping tasks
+into the same gap; long columns are rebalanced in the background with
+``spaced_ranks``. The alphabet sorts the same in byte order and in the usual
+database collations, so ``ORDER BY rank`` needs no special collation.
+"""
+
+from __future__ import annotations
+
+
+DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+BASE = len(DIGITS)
+_VALUES = {digit: value for value, digit in enumerate(DIGITS)}
+
+
+def _validate(rank: str) -> None:
+    if rank.endswith(DIGITS[0]) or any(digit not in _VALUES for digit in rank):
+        raise ValueError(f"Invalid rank: {rank!r}")
+
+
+def _midpoint(low: str, high: str | None) -> str:
+    if high is not None:
+        prefix = 0
+        while prefix < len(high) and (low[prefix] if prefix < len(low) else DIGITS[0]) == high[prefix]:
+            prefix += 1
+        if prefix:
+            return high[:prefix] + _midpoint(low[prefix:], high[prefix:])
+
+    low_digit = _VALUES[low[0]] if low else 0
+    high_digit = _VALUES[high[0]] if high is not None else BASE
+    if high_digit - low_digit > 1:
+        return DIGITS[(low_digit + high_digit + 1) // 2]
+    if high is not None and len(high) > 1:
+        return high[0]
+    return DIGITS[low_digit] + _midpoint(low[1:], None)
+
+
+def _after(low: str) -> str:
+    """Shortest step past ``low``: bump its first digit below ``z``."""
+    for index, digit in enumerate(low):
+        if digit != DIGITS[-1]:
+            return low[:index] + DIGITS[_VALUES[digit] + 1]
+    return low + DIGITS[1]
+
+
+def _before(high: str) -> str:
+    """Shortest step below ``high``: lower its first digit above ``1``."""
+    for index, digit in enumerate(high):
+        if _VALUES[digit] > 1:
+            return high[:index] + DIGITS[_VALUES[digit] - 1]
+    # Only 0s and 1s, ending in 1: ...1 -> ...0z.
+    return high[:-1] + DIGITS[0] + DIGITS[-1]
+
+
+def rank_between(before: str | None, after: str | None) -> str:
+    """
+    A rank strictly between ``before`` and ``after``; ``None`` (or ``""``)
+    on either side means the start / end of the column.
+    """
+    low = before or ""
+    high = after or None
+    _validate(low)
+    if high is not None:
+        _validate(high)
+        if low >= high:
+            raise ValueError(f"Ranks are not ordered: {low!r} >= {high!r}")
+        if not low:
+            return _before(high)
+    elif low:
+        return _after(low)
+    return _midpoint(low, high)
+
+
+def spaced_ranks(count: int) -> list[str]:
+    """``count`` short, evenly spaced ranks (with room for ~36 inserts per gap)."""
+    if count <= 0:
+        return []
+    width = 1
+    while BASE**width <= count:
+        width += 1
+    width += 1
+    step = BASE**width // (count + 1)
+    ranks = []
+    for index in range(1, count + 1):
+        value = index * step
+        digits = []
+        for _ in range(width):
+            value, digit = divmod(value, BASE)
+            digits.append(DIGITS[digit])
+        ranks.append("".join(reversed(digits)).rstrip(DIGITS[0]))
+    return ranks
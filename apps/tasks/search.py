@@ -0,0 +1,97 @@
+"""
+Task search.
+
+On PostgreSQL ``Task.search_vector`` (title, description, comments and
+attachment names, kept current by triggers) is matched with a websearch
+query in the russian and/or english configuration, ranked with ``ts_rank``
+and highlighted with ``ts_headline``; the GIN index serves the match.
+Other backends (tests, local SQLite) fall back to ``icontains`` matching
+with the same response shape. Titles and snippets are HTML-escaped apart
+from their ``<mark>`` markers (``apps.common.search``).
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import Case, Exists, F, FloatField, OuterRef, Q, Value, When
+
+from apps.common.search import HEADLINE_OPTIONS, headline_html, highlight, search_terms, snippet, terms_pattern
+
+from .models import TaskAttachment, TaskComment
+
+
+SEARCH_CONFIGS = {"ru": ("russian",), "en": ("english",)}
+DEFAULT_CONFIGS = ("russian", "english")
+SNIPPET_WORDS = 30
+
+
+@dataclass(frozen=True)
+class SearchHit:
+    task: object
+    score: float
+    title: str
+    snippet: str
+
+
+def search_tasks(qs, text: str, *, lang: str | None = None, limit: int = 20) -> list[SearchHit]:
+    if connection.vendor == "postgresql":
+        return _search_postgres(qs, text, configs=SEARCH_CONFIGS.get(lang, DEFAULT_CONFIGS), limit=limit)
+    return _search_fallback(qs, text, limit=limit)
+
+
+def _search_postgres(qs, text: str, *, configs, limit: int) -> list[SearchHit]:
+    query = None
+    for config in configs:
+        part = SearchQuery(text, config=config, search_type="websearch")
+        query = part if query is None else query | part
+    headline = {"config": configs[0], **HEADLINE_OPTIONS}
+    rows = (
+        qs.filter(search_vector=query)
+        .annotate(
+            score=SearchRank(F("search_vector"), query),
+            title_highlight=SearchHeadline("title", query, highlight_all=True, **headline),
+            snippet=SearchHeadline("description", query, max_words=SNIPPET_WORDS, min_words=10, **headline),
+        )
+        .order_by("-score", "-id")[:limit]
+    )
+    return [
+        SearchHit(
+            task=row,
+            score=float(row.score),
+            title=headline_html(row.title_highlight),
+            snippet=headline_html(row.snippet),
+        )
+        for row in rows
+    ]
+
+
+def _search_fallback(qs, text: str, *, limit: int) -> list[SearchHit]:
+    terms = search_terms(text)
+    if not terms:
+        return []
+    score = Value(0.0, output_field=FloatField())
+    for term in terms:
+        in_comments = Exists(TaskComment.objects.filter(task_id=OuterRef("pk"), text__icontains=term))
+        in_files = Exists(TaskAttachment.objects.filter(task_id=OuterRef("pk"), original_name__icontains=term))
+        qs = qs.filter(Q(title__icontains=term) | Q(description__icontains=term) | in_comments | in_files)
+        score = score + Case(
+            When(title__icontains=term, then=Value(1.0)),
+            When(description__icontains=term, then=Value(0.4)),
+            default=Value(0.2),
+            output_field=FloatField(),
+        )
+    rows = qs.annotate(score=score).order_by("-score", "-id")[:limit]
+    pattern = terms_pattern(terms)
+    return [
+        SearchHit(
+            task=row,
+            score=row.score / len(terms),
+            title=highlight(row.title, pattern),
+            snippet=snippet(row.description, pattern, words=SNIPPET_WORDS),
+        )
+        for row in rows
+    ]
+
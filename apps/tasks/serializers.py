@@ -1,15 +1,34 @@
 from django.contrib.auth import get_user_model
+from django.db.models import Prefetch
 from rest_framework import serializers
 from rest_framework.exceptions import ErrorDetail
 
 from apps.common.i18n import request_language, status_label, tr
 
-from .models import Board, Column, Task
+from .models import Board, Column, Task, TaskAttachment
 
 
 User = get_user_model()
 
 
+def _column_payload(column) -> dict:
+    return {"id": column.id, "name": column.name, "order": column.order, "is_done": column.is_done}
+
+
+def ordered_columns_prefetch() -> Prefetch:
+    return Prefetch("board__columns", queryset=Column.objects.order_by("order", "id"))
+
+
+def build_boards_map(board_ids) -> dict[str, list[dict]]:
+    """Ordered columns of every board in one query, keyed by board id."""
+    board_ids = set(board_ids)
+    boards: dict[str, list[dict]] = {str(board_id): [] for board_id in sorted(board_ids)}
+    columns = Column.objects.filter(board_id__in=board_ids).order_by("board_id", "order", "id")
+    for column in columns:
+        boards[str(column.board_id)].append(_column_payload(column))
+    return boards
+
+
 class TaskSerializer(serializers.ModelSerializer):
     assignee_username = serializers.CharField(source="assignee.username", read_only=True)
     reporter_username = serializers.CharField(source="reporter.username", read_only=True)
@@ -33,6 +52,7 @@ class TaskSerializer(serializers.ModelSerializer):
             "due_date",
             "priority",
             "priority_label",
+            "rank",
             "onboarding_day",
             "column_name",
             "column_order",
@@ -40,13 +60,18 @@ class TaskSerializer(serializers.ModelSerializer):
             "created_at",
             "updated_at",
         )
-        read_only_fields = ("reporter", "created_at", "updated_at")
+        read_only_fields = ("reporter", "rank", "created_at", "updated_at")
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # List endpoints send columns once per board in a separate ``boards`` map.
+        if not self.context.get("embed_board_columns", True):
+            self.fields.pop("board_columns")
 
     def get_board_columns(self, obj):
-        return [
-            {"id": col.id, "name": col.name, "order": col.order}
-            for col in obj.board.columns.order_by("order", "id")
-        ]
+        if "columns" in getattr(obj.board, "_prefetched_objects_cache", {}):
+            return [_column_payload(col) for col in obj.board.columns.all()]
+        return [_column_payload(col) for col in obj.board.columns.order_by("order", "id")]
 
     def get_priority_label(self, obj):
         return status_label(obj.priority, request_language(self.context.get("request")))
@@ -77,6 +102,10 @@ class TaskCreateSerializer(serializers.Serializer):
 
 class TaskMoveSerializer(serializers.Serializer):
     column_id = serializers.IntegerField()
+    # Neighbours in the target column: the task is placed directly below
+    # ``after_id`` and/or above ``before_id``; neither means "to the bottom".
+    after_id = serializers.IntegerField(required=False, allow_null=True)
+    before_id = serializers.IntegerField(required=False, allow_null=True)
 
     def validate_column_id(self, value):
         if not Column.objects.filter(id=value).exists():
@@ -89,3 +118,39 @@ class TaskMoveSerializer(serializers.Serializer):
             )
         return value
 
+
+
+class TaskSearchQuerySerializer(serializers.Serializer):
+    q = serializers.CharField(max_length=200, trim_whitespace=True)
+    lang = serializers.ChoiceField(choices=("ru", "en"), required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=20)
+
+
+class TaskListQuerySerializer(serializers.Serializer):
+    column = serializers.IntegerField(min_value=1, required=False)
+    priority = serializers.ChoiceField(choices=Task.Priority.choices, required=False)
+    due_from = serializers.DateField(required=False)
+    due_to = serializers.DateField(required=False)
+    assignee = serializers.IntegerField(min_value=1, required=False)
+    overdue = serializers.BooleanField(required=False, allow_null=True, default=None)
+    board_columns = serializers.ChoiceField(choices=("embedded",), required=False)
+
+    def validate(self, attrs):
+        if attrs.get("due_from") and attrs.get("due_to") and attrs["due_from"] > attrs["due_to"]:
+            raise serializers.ValidationError({"due_to": "Must not be earlier than due_from."})
+        return attrs
+
+
+class TaskAttachmentSerializer(serializers.ModelSerializer):
+    size = serializers.IntegerField(source="blob.size", read_only=True, default=None)
+    sha256 = serializers.CharField(source="blob.sha256", read_only=True, default=None)
+
+    class Meta:
+        model = TaskAttachment
+        fields = ("id", "task", "file", "original_name", "blob", "size", "sha256", "uploaded_by", "uploaded_at")
+        read_only_fields = fields
+
+
+class TaskAttachmentCreateSerializer(serializers.Serializer):
+    # Id of a blob from a completed chunked upload (``/api/v1/common/uploads/``).
+    blob_id = serializers.IntegerField(min_value=1)
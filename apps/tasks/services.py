@@ -0,0 +1,260 @@
+from __future__ import annotations
+
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Exists, Max, OuterRef
+from django.db.models.functions import Length
+from django.utils import timezone
+
+from apps.accounts.models import Role, User
+from apps.work_schedule.models import WeeklyWorkPlan
+
+from .models import Board, Column, Task
+from .ranking import rank_between, spaced_ranks
+
+
+logger = logging.getLogger(__name__)
+
+
+MANDATORY_WEEKLY_PLAN_TASK_TITLE = "Сделать график работы на следующую неделю"
+DEFAULT_COLUMNS = (
+    (1, "Новые", False),
+    (2, "В работе", False),
+    (3, "На проверке", False),
+    (4, "Завершенные", True),
+)
+REMINDER_ROLES = (Role.Name.TEAMLEAD, Role.Name.EMPLOYEE, Role.Name.INTERN)
+
+
+def _ensure_default_columns(board: Board) -> None:
+    for order, name, is_done in DEFAULT_COLUMNS:
+        Column.objects.get_or_create(
+            board=board,
+            order=order,
+            defaults={"name": name, "is_done": is_done},
+        )
+
+
+def get_user_default_board(user) -> Board:
+    board, _ = Board.objects.get_or_create(
+        created_by=user,
+        is_personal=True,
+        defaults={"name": f"{user.username} board"},
+    )
+    _ensure_default_columns(board)
+    return board
+
+
+def next_monday(today: date) -> date:
+    days_ahead = (7 - today.weekday()) % 7
+    return today + timedelta(days=days_ahead or 7)
+
+
+def users_missing_weekly_plan_reminder(week_start: date, users=None):
+    """
+    Active staff with neither a plan for ``week_start`` nor a reminder task
+    for it: a single query with two NOT EXISTS anti-joins.
+    """
+    users = users if users is not None else User.objects.filter(is_active=True, role__name__in=REMINDER_ROLES)
+    has_plan = WeeklyWorkPlan.objects.filter(user_id=OuterRef("pk"), week_start=week_start)
+    has_reminder = Task.objects.filter(
+        assignee_id=OuterRef("pk"),
+        title=MANDATORY_WEEKLY_PLAN_TASK_TITLE,
+        due_date=week_start,
+    )
+    return users.filter(~Exists(has_plan), ~Exists(has_reminder))
+
+
+def _personal_boards(user_ids) -> dict[int, int]:
+    boards: dict[int, int] = {}
+    rows = (
+        Board.objects.filter(created_by_id__in=user_ids, is_personal=True)
+        .order_by("created_by_id", "id")
+        .values_list("created_by_id", "id")
+    )
+    for user_id, board_id in rows:
+        boards.setdefault(user_id, board_id)
+    return boards
+
+
+@dataclass(frozen=True)
+class ReminderResult:
+    week_start: date
+    created: int
+    boards_created: int
+
+
+@transaction.atomic
+def generate_weekly_plan_reminders(*, week_start: date | None = None, users=None) -> ReminderResult:
+    """
+    Set-based replacement for per-user reminder checks: a fixed number of
+    queries (anti-join, boards, columns, one bulk insert per model)
+    regardless of how many users are missing a plan.
+    """
+    week_start = week_start or next_monday(timezone.localdate())
+    missing = list(
+        users_missing_weekly_plan_reminder(week_start, users)
+        .order_by("id")
+        .values_list("id", "username", "manager_id")
+    )
+    if not missing:
+        return ReminderResult(week_start=week_start, created=0, boards_created=0)
+
+    user_ids = [user_id for user_id, _, _ in missing]
+    boards = _personal_boards(user_ids)
+    new_boards = [
+        Board(created_by_id=user_id, is_personal=True, name=f"{username} board")
+        for user_id, username, _ in missing
+        if user_id not in boards
+    ]
+    if new_boards:
+        Board.objects.bulk_create(new_boards)
+        boards = _personal_boards(user_ids)
+
+    board_ids = set(boards.values())
+    existing_orders = set(Column.objects.filter(board_id__in=board_ids).values_list("board_id", "order"))
+    Column.objects.bulk_create(
+        [
+            Column(board_id=board_id, order=order, name=name, is_done=is_done)
+            for board_id in board_ids
+            for order, name, is_done in DEFAULT_COLUMNS
+            if (board_id, order) not in existing_orders
+        ],
+        ignore_conflicts=True,
+    )
+    first_columns: dict[int, int] = {}
+    for board_id, column_id in (
+        Column.objects.filter(board_id__in=board_ids).order_by("board_id", "order", "id").values_list("board_id", "id")
+    ):
+        first_columns.setdefault(board_id, column_id)
+
+    last_ranks = dict(
+        Task.objects.filter(column_id__in=first_columns.values())
+        .order_by()
+        .values("column_id")
+        .annotate(last=Max("rank"))
+        .values_list("column_id", "last")
+    )
+    ranks = {column_id: rank_between(last_ranks.get(column_id), None) for column_id in set(first_columns.values())}
+
+    description = f"Заполнить и отправить недельный график на неделю с {week_start.isoformat()}"
+    Task.objects.bulk_create(
+        [
+            Task(
+                board_id=boards[user_id],
+                column_id=first_columns[boards[user_id]],
+                title=MANDATORY_WEEKLY_PLAN_TASK_TITLE,
+                description=description,
+                assignee_id=user_id,
+                reporter_id=manager_id or user_id,
+                due_date=week_start,
+                priority=Task.Priority.HIGH,
+                rank=ranks[first_columns[boards[user_id]]],
+            )
+            for user_id, _, manager_id in missing
+        ],
+        batch_size=1000,
+    )
+    for column_id, rank in ranks.items():
+        if len(rank) > rank_max_length():
+            dispatch_rebalance(column_id)
+    return ReminderResult(week_start=week_start, created=len(missing), boards_created=len(new_boards))
+
+
+EXECUTOR_THREAD = "thread"
+EXECUTOR_INLINE = "inline"
+EXECUTOR_WORKER = "worker"
+
+
+def rank_max_length() -> int:
+    return int(getattr(settings, "TASKS_RANK_MAX_LENGTH", 16))
+
+
+class RankConflict(Exception):
+    """Neighbour ranks are no longer ordered (concurrent move); rebalance and retry."""
+
+
+def rank_for_position(column_id: int, *, task_id: int, after: Task | None = None, before: Task | None = None) -> str:
+    """
+    Rank that puts a task directly below ``after`` / above ``before``
+    (end of the column when neither is given). At most one read to find
+    the missing neighbour.
+    """
+    others = Task.objects.filter(column_id=column_id).exclude(id=task_id)
+    if after is None and before is None:
+        return rank_between(others.aggregate(last=Max("rank"))["last"], None)
+    if before is None:
+        before = others.filter(rank__gt=after.rank).order_by("rank", "id").only("rank").first()
+    elif after is None:
+        after = others.filter(rank__lt=before.rank).order_by("-rank", "-id").only("rank").first()
+    low = after.rank if after is not None else None
+    high = before.rank if before is not None else None
+    if low is not None and high is not None and low >= high:
+        raise RankConflict(column_id)
+    return rank_between(low, high)
+
+
+def move_task(task: Task, column: Column, *, after: Task | None = None, before: Task | None = None) -> Task:
+    """Move ``task`` into ``column`` between two neighbours with a single-row UPDATE."""
+    try:
+        rank = rank_for_position(column.id, task_id=task.id, after=after, before=before)
+    except RankConflict:
+        rebalance_column(column.id)
+        after = Task.objects.only("rank").get(id=after.id) if after is not None else None
+        before = Task.objects.only("rank").get(id=before.id) if before is not None else None
+        rank = rank_for_position(column.id, task_id=task.id, after=after, before=before)
+
+    task.column = column
+    task.rank = rank
+    task.updated_at = timezone.now()
+    Task.objects.filter(id=task.id).update(column=column, rank=rank, updated_at=task.updated_at)
+    if len(rank) > rank_max_length():
+        dispatch_rebalance(column.id)
+    return task
+
+
+@transaction.atomic
+def rebalance_column(column_id: int) -> int:
+    """Rewrite the column's ranks as short, evenly spaced keys, keeping the order."""
+    tasks = list(Task.objects.select_for_update().filter(column_id=column_id).order_by("rank", "id").only("id", "rank"))
+    changed = []
+    for task, rank in zip(tasks, spaced_ranks(len(tasks))):
+        if task.rank != rank:
+            task.rank = rank
+            changed.append(task)
+    Task.objects.bulk_update(changed, ["rank"], batch_size=500)
+    return len(changed)
+
+
+def columns_needing_rebalance():
+    return (
+        Task.objects.annotate(rank_length=Length("rank"))
+        .filter(rank_length__gt=rank_max_length())
+        .order_by("column_id")
+        .values_list("column_id", flat=True)
+        .distinct()
+    )
+
+
+def dispatch_rebalance(column_id: int) -> None:
+    executor = getattr(settings, "TASKS_RANK_REBALANCE_EXECUTOR", EXECUTOR_THREAD)
+    if executor == EXECUTOR_INLINE:
+        rebalance_column(column_id)
+    elif executor == EXECUTOR_THREAD:
+        transaction.on_commit(lambda: threading.Thread(target=_rebalance_in_thread, args=(column_id,), daemon=True).start())
+    # EXECUTOR_WORKER: picked up by `manage.py rebalance_task_ranks`.
+
+
+def _rebalance_in_thread(column_id: int) -> None:
+    close_old_connections()
+    try:
+        rebalance_column(column_id)
+    except Exception:
+        logger.exception("Task rank rebalance failed for column %s", column_id)
+    finally:
+        close_old_connections()
@@ -1,14 +1,19 @@
 from datetime import timedelta
 from unittest.mock import patch
 
-from django.test import TestCase
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from rest_framework.test import APIClient
 
-from apps.accounts.models import Role, User
+from apps.accounts.models import Department, Role, User
+from apps.common.search import HEADLINE_OPTIONS, headline_html
 from apps.work_schedule.models import WeeklyWorkPlan
 
-from .models import Column, Task
+from .models import Column, Task, TaskComment
+from .ranking import rank_between, spaced_ranks
+from .services import generate_weekly_plan_reminders, rebalance_column
 from .views import MANDATORY_WEEKLY_PLAN_TASK_TITLE
 
 
@@ -139,7 +144,7 @@ class TasksApiTests(TestCase):
         self.client.force_authenticate(user=self.subordinate)
         response = self.client.get("/api/v1/tasks/my/")
         self.assertEqual(response.status_code, 200)
-        returned_ids = {item["id"] for item in response.data}
+        returned_ids = {item["id"] for item in response.data["results"]}
         self.assertIn(task1.id, returned_ids)
 
     def test_team_endpoint_for_lead_returns_subordinates_tasks(self):
@@ -160,7 +165,7 @@ class TasksApiTests(TestCase):
         self.client.force_authenticate(user=self.lead)
         response = self.client.get("/api/v1/tasks/team/")
         self.assertEqual(response.status_code, 200)
-        returned_ids = {item["id"] for item in response.data}
+        returned_ids = {item["id"] for item in response.data["results"]}
         self.assertIn(task.id, returned_ids)
 
     @patch("apps.tasks.views.TasksAuditService.log_task_moved")
@@ -183,6 +188,273 @@ class TasksApiTests(TestCase):
         self.assertEqual(task.column_id, col2.id)
         log_task_moved.assert_called_once()
 
+    def _column_tasks(self, column, count):
+        board = column.board
+        return [
+            Task.objects.create(board=board, column=column, title=f"R{idx}", assignee=self.subordinate, reporter=self.lead)
+            for idx in range(count)
+        ]
+
+    def _column_order(self, column):
+        self.client.force_authenticate(user=self.lead)
+        response = self.client.get("/api/v1/tasks/team/", {"column": column.id})
+        self.assertEqual(response.status_code, 200)
+        return [item["title"] for item in response.data["results"]]
+
+    def test_new_tasks_are_appended_to_column(self):
+        column = self._get_new_column(self.subordinate)
+        self._column_tasks(column, 3)
+        self.assertEqual(self._column_order(column), ["R0", "R1", "R2"])
+
+    def test_move_between_neighbours_updates_single_row(self):
+        column = self._get_new_column(self.subordinate)
+        first, second, third = self._column_tasks(column, 3)
+        ranks_before = dict(Task.objects.values_list("id", "rank"))
+        self.client.force_authenticate(user=self.lead)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.patch(
+                f"/api/v1/tasks/{third.id}/move/",
+                {"column_id": column.id, "after_id": first.id, "before_id": second.id},
+                format="json",
+            )
+        self.assertEqual(response.status_code, 200)
+        updates = [q["sql"] for q in ctx.captured_queries if q["sql"].startswith('UPDATE "tasks_task"')]
+        self.assertEqual(len(updates), 1)
+        ranks_after = dict(Task.objects.values_list("id", "rank"))
+        self.assertEqual({k for k in ranks_after if ranks_after[k] != ranks_before[k]}, {third.id})
+        self.assertEqual(self._column_order(column), ["R0", "R2", "R1"])
+
+        response = self.client.patch(
+            f"/api/v1/tasks/{first.id}/move/", {"column_id": column.id, "after_id": second.id}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self._column_order(column), ["R2", "R1", "R0"])
+
+    def test_move_rejects_neighbour_from_other_column(self):
+        board = self._create_default_board(self.subordinate)
+        column = self._get_new_column(self.subordinate)
+        other = board.columns.get(order=2)
+        task, neighbour = self._column_tasks(column, 2)
+        self.client.force_authenticate(user=self.lead)
+        response = self.client.patch(
+            f"/api/v1/tasks/{task.id}/move/", {"column_id": other.id, "after_id": neighbour.id}, format="json"
+        )
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(TASKS_RANK_MAX_LENGTH=4)
+    def test_long_ranks_trigger_rebalance(self):
+        column = self._get_new_column(self.subordinate)
+        tasks = self._column_tasks(column, 3)
+        self.client.force_authenticate(user=self.lead)
+        moving, anchor = tasks[2], tasks[1]
+        with patch("apps.tasks.services.rebalance_column", wraps=rebalance_column) as rebalance:
+            for _ in range(30):
+                response = self.client.patch(
+                    f"/api/v1/tasks/{moving.id}/move/",
+                    {"column_id": column.id, "before_id": anchor.id, "after_id": tasks[0].id},
+                    format="json",
+                )
+                self.assertEqual(response.status_code, 200)
+                moving, anchor = anchor, moving
+        self.assertTrue(rebalance.called)
+        self.assertLessEqual(max(len(rank) for rank in Task.objects.values_list("rank", flat=True)), 4)
+        self.assertEqual(len(self._column_order(column)), 3)
+        self.assertEqual(self._column_order(column)[0], "R0")
+
+    def test_appending_hundreds_of_tasks_keeps_ranks_short(self):
+        column = self._get_new_column(self.subordinate)
+        rank = None
+        for _ in range(400):
+            rank = rank_between(rank, None)
+        self.assertLessEqual(len(rank), 13)
+
+        with override_settings(TASKS_RANK_MAX_LENGTH=4):
+            tasks = [
+                Task.objects.create(
+                    board=column.board,
+                    column=column,
+                    title=f"A{idx}",
+                    assignee=self.subordinate,
+                    reporter=self.lead,
+                )
+                for idx in range(400)
+            ]
+        ranks = list(Task.objects.filter(column=column).order_by("rank", "id").values_list("id", "rank"))
+        self.assertEqual([task_id for task_id, _ in ranks], [task.id for task in tasks])
+        self.assertLessEqual(max(len(rank) for _, rank in ranks), 4)
+
+    def test_rank_between_and_spaced_ranks_are_ordered(self):
+        ranks = spaced_ranks(50)
+        self.assertEqual(ranks, sorted(ranks))
+        low, high = ranks[0], ranks[1]
+        for _ in range(40):
+            middle = rank_between(low, high)
+            self.assertTrue(low < middle < high)
+            high = middle
+        with self.assertRaises(ValueError):
+            rank_between("b", "a")
+
+    def test_search_matches_title_description_and_comments_within_visibility(self):
+        column = self._get_new_column(self.subordinate)
+        board = column.board
+        by_title = Task.objects.create(
+            board=board, column=column, title="Deploy invoice service", assignee=self.subordinate, reporter=self.lead
+        )
+        by_description = Task.objects.create(
+            board=board,
+            column=column,
+            title="Weekly sync",
+            description="Discuss the invoice backlog with finance",
+            assignee=self.subordinate,
+            reporter=self.lead,
+        )
+        by_comment = Task.objects.create(
+            board=board, column=column, title="Cleanup", assignee=self.subordinate, reporter=self.lead
+        )
+        TaskComment.objects.create(task=by_comment, author=self.lead, text="blocked by invoice export")
+        outsider_column = self._get_new_column(self.outsider)
+        Task.objects.create(
+            board=outsider_column.board,
+            column=outsider_column,
+            title="Outsider invoice",
+            assignee=self.outsider,
+            reporter=self.outsider,
+        )
+
+        self.client.force_authenticate(user=self.lead)
+        response = self.client.get("/api/v1/tasks/search/", {"q": "invoice"})
+        self.assertEqual(response.status_code, 200)
+        ids = [item["id"] for item in response.data["results"]]
+        self.assertEqual(ids[0], by_title.id)
+        self.assertEqual(set(ids), {by_title.id, by_description.id, by_comment.id})
+        self.assertIn("<mark>invoice</mark>", response.data["results"][0]["search"]["title"])
+        self.assertEqual(list(response.data["boards"]), [str(board.id)])
+
+        self.client.force_authenticate(user=self.outsider)
+        response = self.client.get("/api/v1/tasks/search/", {"q": "invoice"})
+        self.assertEqual([item["title"] for item in response.data["results"]], ["Outsider invoice"])
+
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get("/api/v1/tasks/search/", {"q": "invoice service"})
+        self.assertEqual([item["id"] for item in response.data["results"]], [by_title.id])
+
+    def test_search_highlights_are_html_escaped(self):
+        column = self._get_new_column(self.subordinate)
+        Task.objects.create(
+            board=column.board,
+            column=column,
+            title="<script>alert(1)</script> invoice",
+            description='<img src=x onerror="alert(1)"> invoice due',
+            assignee=self.subordinate,
+            reporter=self.lead,
+        )
+        self.client.force_authenticate(user=self.lead)
+        response = self.client.get("/api/v1/tasks/search/", {"q": "invoice"})
+        search = response.data["results"][0]["search"]
+        self.assertEqual(search["title"], "&lt;script&gt;alert(1)&lt;/script&gt; <mark>invoice</mark>")
+        self.assertEqual(search["snippet"], "&lt;img src=x onerror=&quot;alert(1)&quot;&gt; <mark>invoice</mark> due")
+
+        # ts_headline output: only the sentinel markers become markup.
+        marked = f"{HEADLINE_OPTIONS['start_sel']}invoice{HEADLINE_OPTIONS['stop_sel']} <script>"
+        self.assertEqual(headline_html(marked), "<mark>invoice</mark> &lt;script&gt;")
+
+    def test_search_requires_query(self):
+        self.client.force_authenticate(user=self.lead)
+        self.assertEqual(self.client.get("/api/v1/tasks/search/").status_code, 400)
+
+    def test_team_list_is_cursor_paginated_and_filtered(self):
+        column = self._get_new_column(self.subordinate)
+        today = timezone.localdate()
+        for idx in range(5):
+            Task.objects.create(
+                board=column.board,
+                column=column,
+                title=f"P{idx}",
+                assignee=self.subordinate,
+                reporter=self.lead,
+                priority=Task.Priority.HIGH if idx % 2 else Task.Priority.LOW,
+                due_date=today + timedelta(days=idx - 2),
+            )
+        self.client.force_authenticate(user=self.lead)
+
+        first = self.client.get("/api/v1/tasks/team/", {"page_size": 2})
+        self.assertEqual(len(first.data["results"]), 2)
+        second = self.client.get(first.data["next"])
+        self.assertEqual(len(second.data["results"]), 2)
+        seen = {item["id"] for item in first.data["results"] + second.data["results"]}
+        self.assertEqual(len(seen), 4)
+
+        def titles(**params):
+            response = self.client.get("/api/v1/tasks/team/", params)
+            self.assertEqual(response.status_code, 200)
+            return sorted(item["title"] for item in response.data["results"])
+
+        self.assertEqual(titles(priority="high"), ["P1", "P3"])
+        self.assertEqual(titles(overdue="true"), ["P0", "P1"])
+        self.assertEqual(titles(overdue="false"), ["P2", "P3", "P4"])
+        Column.objects.filter(id=column.id).update(is_done=True)
+        self.assertEqual(titles(overdue="true"), [])
+        Column.objects.filter(id=column.id).update(is_done=False)
+        self.assertEqual(titles(due_from=today.isoformat(), due_to=(today + timedelta(days=1)).isoformat()), ["P2", "P3"])
+        self.assertEqual(titles(assignee=self.lead.id), [])
+        response = self.client.get(
+            "/api/v1/tasks/team/", {"due_from": today.isoformat(), "due_to": (today - timedelta(days=1)).isoformat()}
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_task_list_answers_304_until_scope_changes(self):
+        column = self._get_new_column(self.subordinate)
+        task = Task.objects.create(
+            board=column.board, column=column, title="Cached", assignee=self.subordinate, reporter=self.lead
+        )
+        self.client.force_authenticate(user=self.subordinate)
+        response = self.client.get("/api/v1/tasks/my/")
+        etag = response["ETag"]
+        self.assertTrue(etag)
+
+        with CaptureQueriesContext(connection) as ctx:
+            cached = self.client.get("/api/v1/tasks/my/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(len([q for q in ctx.captured_queries if "tasks_task" in q["sql"]]), 1)
+
+        filtered = self.client.get("/api/v1/tasks/my/", {"priority": "high"}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(filtered.status_code, 200)
+
+        task.title = "Renamed"
+        task.save()
+        changed = self.client.get("/api/v1/tasks/my/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed["ETag"], etag)
+
+    def _team_list_queries(self, **params):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/api/v1/tasks/team/", params)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries), response.data
+
+    def test_team_list_returns_deduplicated_boards_in_constant_queries(self):
+        board = self._create_default_board(self.subordinate)
+        column = self._get_new_column(self.subordinate)
+        Task.objects.create(board=board, column=column, title="T0", assignee=self.subordinate, reporter=self.lead)
+        self.client.force_authenticate(user=self.lead)
+        few, _ = self._team_list_queries()
+
+        Task.objects.bulk_create(
+            [
+                Task(board=board, column=column, title=f"T{idx}", assignee=self.subordinate, reporter=self.lead)
+                for idx in range(1, 20)
+            ]
+        )
+        many, data = self._team_list_queries()
+        self.assertEqual(few, many)
+        self.assertNotIn("board_columns", data["results"][0])
+        self.assertEqual(list(data["boards"]), [str(board.id)])
+        self.assertEqual([col["order"] for col in data["boards"][str(board.id)]], [1, 2, 3, 4])
+
+        embedded_queries, embedded = self._team_list_queries(board_columns="embedded")
+        self.assertEqual(embedded_queries, many)
+        self.assertEqual([col["order"] for col in embedded["results"][0]["board_columns"]], [1, 2, 3, 4])
+
     def _create_default_board(self, user):
         from .views import get_user_default_board
 
@@ -206,18 +478,32 @@ class TasksApiTests(TestCase):
             for i in range(7)
         ]
 
-    def test_team_endpoint_creates_weekly_plan_task_if_missing(self):
-        self.client.force_authenticate(user=self.lead)
-        response = self.client.get("/api/v1/tasks/team/")
-        self.assertEqual(response.status_code, 200)
+    def test_default_board_marks_last_column_done(self):
+        board = self._create_default_board(self.subordinate)
+        self.assertEqual(
+            list(board.columns.order_by("order").values_list("name", "is_done")),
+            [("Новые", False), ("В работе", False), ("На проверке", False), ("Завершенные", True)],
+        )
+
+    def test_reminder_job_creates_weekly_plan_task_if_missing(self):
+        result = generate_weekly_plan_reminders()
+        self.assertEqual(result.week_start, self._next_monday())
         task = Task.objects.filter(
             assignee=self.subordinate,
             title=MANDATORY_WEEKLY_PLAN_TASK_TITLE,
             due_date=self._next_monday(),
         ).first()
         self.assertIsNotNone(task)
+        self.assertEqual(task.reporter_id, self.lead.id)
+        self.assertEqual(task.column.order, 1)
+        self.assertEqual(task.board.columns.count(), 4)
+        self.assertEqual(list(task.board.columns.filter(is_done=True).values_list("order", flat=True)), [4])
 
-    def test_team_endpoint_does_not_create_weekly_plan_task_if_plan_exists(self):
+        again = generate_weekly_plan_reminders()
+        self.assertEqual(again.created, 0)
+        self.assertEqual(Task.objects.filter(title=MANDATORY_WEEKLY_PLAN_TASK_TITLE).count(), result.created)
+
+    def test_reminder_job_does_not_create_weekly_plan_task_if_plan_exists(self):
         next_monday = self._next_monday()
         WeeklyWorkPlan.objects.create(
             user=self.subordinate,
@@ -227,9 +513,7 @@ class TasksApiTests(TestCase):
             online_hours=0,
             online_reason="n/a",
         )
-        self.client.force_authenticate(user=self.lead)
-        response = self.client.get("/api/v1/tasks/team/")
-        self.assertEqual(response.status_code, 200)
+        generate_weekly_plan_reminders()
         self.assertFalse(
             Task.objects.filter(
                 assignee=self.subordinate,
@@ -237,6 +521,49 @@ class TasksApiTests(TestCase):
                 due_date=next_monday,
             ).exists()
         )
+        self.assertTrue(Task.objects.filter(assignee=self.outsider, title=MANDATORY_WEEKLY_PLAN_TASK_TITLE).exists())
+        self.assertFalse(Task.objects.filter(assignee=self.admin, title=MANDATORY_WEEKLY_PLAN_TASK_TITLE).exists())
+
+    def test_task_list_endpoints_are_read_only(self):
+        self.client.force_authenticate(user=self.lead)
+        self.assertEqual(self.client.get("/api/v1/tasks/team/").status_code, 200)
+        self.client.force_authenticate(user=self.subordinate)
+        self.assertEqual(self.client.get("/api/v1/tasks/my/").status_code, 200)
+        self.assertFalse(Task.objects.exists())
+
+    def test_reminder_job_query_count_does_not_grow_with_headcount(self):
+        def run_for(count, prefix):
+            users = [
+                User.objects.create_user(username=f"{prefix}{idx}", password="x", role=self.employee_role)
+                for idx in range(count)
+            ]
+            self._create_default_board(users[0])
+            Task.objects.filter(title=MANDATORY_WEEKLY_PLAN_TASK_TITLE).delete()
+            with CaptureQueriesContext(connection) as ctx:
+                result = generate_weekly_plan_reminders(users=User.objects.filter(id__in=[u.id for u in users]))
+            self.assertEqual(result.created, count)
+            return len(ctx.captured_queries)
+
+        self.assertEqual(run_for(2, "few_"), run_for(25, "many_"))
+
+    def test_reminder_endpoint_is_admin_only(self):
+        self.client.force_authenticate(user=self.lead)
+        self.assertEqual(self.client.post("/api/v1/tasks/weekly-plan-reminders/").status_code, 403)
+
+        # A department admin without a department reaches nobody.
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.post("/api/v1/tasks/weekly-plan-reminders/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["week_start"], self._next_monday().isoformat())
+        self.assertEqual(response.data["created"], 0)
+
+        department = Department.objects.create(name="Tasks Dept")
+        User.objects.filter(id__in=[self.admin.id, self.lead.id, self.subordinate.id]).update(department=department)
+        self.admin.refresh_from_db()
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.post("/api/v1/tasks/weekly-plan-reminders/")
+        self.assertEqual(response.data["created"], 2)
+        self.assertFalse(Task.objects.filter(assignee=self.outsider, title=MANDATORY_WEEKLY_PLAN_TASK_TITLE).exists())
 
     def test_assignees_endpoint_for_teamlead_returns_only_subordinates(self):
         self.client.force_authenticate(user=self.lead)
@@ -2,20 +2,30 @@ from django.urls import path
 
 from .views import (
     TaskAssigneesAPIView,
+    TaskAttachmentListCreateAPIView,
     TaskCreateAPIView,
     TaskDetailAPIView,
     TaskMoveAPIView,
     TaskMyAPIView,
+    TaskSearchAPIView,
     TaskTeamAPIView,
+    TaskWeeklyPlanRemindersAPIView,
 )
 
 
 urlpatterns = [
     path("my/", TaskMyAPIView.as_view(), name="tasks-my"),
     path("team/", TaskTeamAPIView.as_view(), name="tasks-team"),
+    path(
+        "weekly-plan-reminders/",
+        TaskWeeklyPlanRemindersAPIView.as_view(),
+        name="tasks-weekly-plan-reminders",
+    ),
+    path("search/", TaskSearchAPIView.as_view(), name="tasks-search"),
     path("assignees/", TaskAssigneesAPIView.as_view(), name="tasks-assignees"),
     path("create/", TaskCreateAPIView.as_view(), name="tasks-create"),
     path("<int:pk>/", TaskDetailAPIView.as_view(), name="tasks-detail"),
     path("<int:pk>/move/", TaskMoveAPIView.as_view(), name="tasks-move"),
+    path("<int:pk>/attachments/", TaskAttachmentListCreateAPIView.as_view(), name="tasks-attachments"),
 ]
 
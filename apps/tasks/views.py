@@ -1,8 +1,11 @@
-from datetime import timedelta
+import hashlib
 
-from django.db.models import Q
+from django.db import transaction
+from django.db.models import Count, Max, Q
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags, quote_etag
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
@@ -10,87 +13,104 @@ from rest_framework.views import APIView
 
 from apps.accounts.access_policy import AccessPolicy
 from apps.accounts.models import Role, User
+from apps.common.pagination import CreatedAtCursorPagination
+from apps.common.uploads import attach_blob, resolve_blob
 from apps.onboarding_core.models import OnboardingDay
-from apps.work_schedule.models import WeeklyWorkPlan
 from .audit import TasksAuditService
-from .models import Board, Column, Task
+from .models import Column, Task, TaskAttachment
 from .policies import TaskPolicy
-from .serializers import TaskCreateSerializer, TaskMoveSerializer, TaskSerializer
-
-
-MANDATORY_WEEKLY_PLAN_TASK_TITLE = "Сделать график работы на следующую неделю"
-DEFAULT_COLUMNS = (
-    (1, "Новые"),
-    (2, "В работе"),
-    (3, "На проверке"),
-    (4, "Завершенные"),
+from .serializers import (
+    TaskAttachmentCreateSerializer,
+    TaskAttachmentSerializer,
+    TaskCreateSerializer,
+    TaskListQuerySerializer,
+    TaskMoveSerializer,
+    TaskSearchQuerySerializer,
+    TaskSerializer,
+    build_boards_map,
+    ordered_columns_prefetch,
+)
+from .search import search_tasks
+from .services import (
+    MANDATORY_WEEKLY_PLAN_TASK_TITLE,  # noqa: F401 (re-exported)
+    REMINDER_ROLES,
+    generate_weekly_plan_reminders,
+    get_user_default_board,
+    move_task,
 )
 
 
-def _ensure_default_columns(board: Board) -> None:
-    for order, name in DEFAULT_COLUMNS:
-        Column.objects.get_or_create(
-            board=board,
-            order=order,
-            defaults={"name": name},
-        )
-
-
-def get_user_default_board(user) -> Board:
-    board, _ = Board.objects.get_or_create(
-        created_by=user,
-        is_personal=True,
-        defaults={"name": f"{user.username} board"},
-    )
-    _ensure_default_columns(board)
-    return board
-
-
-def _next_monday(today):
-    days_ahead = (7 - today.weekday()) % 7
-    return today + timedelta(days=days_ahead or 7)
-
-
-def _ensure_weekly_plan_task_for_user(*, assignee, reporter):
-    next_week_start = _next_monday(timezone.localdate())
-    has_plan = WeeklyWorkPlan.objects.filter(user=assignee, week_start=next_week_start).exists()
-    if has_plan:
-        return None
-
-    exists_task = Task.objects.filter(
-        assignee=assignee,
-        title=MANDATORY_WEEKLY_PLAN_TASK_TITLE,
-        due_date=next_week_start,
-    ).exists()
-    if exists_task:
-        return None
-
-    board = get_user_default_board(assignee)
-    column = board.columns.order_by("order", "id").first()
-    if column is None:
-        column = Column.objects.create(board=board, name="Новые", order=1)
-    return Task.objects.create(
-        board=board,
-        column=column,
-        title=MANDATORY_WEEKLY_PLAN_TASK_TITLE,
-        description=f"Заполнить и отправить недельный график на неделю с {next_week_start.isoformat()}",
-        assignee=assignee,
-        reporter=reporter,
-        due_date=next_week_start,
-        priority=Task.Priority.HIGH,
-    )
+class TaskCursorPagination(CreatedAtCursorPagination):
+    def get_ordering(self, request, queryset, view):
+        # A single column is read in drag-and-drop order via the (column, rank) index.
+        if request.query_params.get("column"):
+            return ("rank", "id")
+        return super().get_ordering(request, queryset, view)
+
+
+def _filter_tasks(qs, params: dict):
+    if params.get("column"):
+        qs = qs.filter(column_id=params["column"])
+    if params.get("priority"):
+        qs = qs.filter(priority=params["priority"])
+    if params.get("due_from"):
+        qs = qs.filter(due_date__gte=params["due_from"])
+    if params.get("due_to"):
+        qs = qs.filter(due_date__lte=params["due_to"])
+    if params.get("assignee"):
+        qs = qs.filter(assignee_id=params["assignee"])
+    if params.get("overdue") is not None:
+        overdue = Q(due_date__lt=timezone.localdate(), column__is_done=False)
+        qs = qs.filter(overdue if params["overdue"] else ~overdue)
+    return qs
+
+
+def _list_etag(request, qs) -> str:
+    """Changes whenever a task in the filtered scope is added, removed or updated."""
+    state = qs.order_by().aggregate(last=Max("updated_at"), count=Count("id"))
+    params = sorted(request.query_params.lists())
+    raw = f"{request.user.id}|{request.path}|{params}|{state['last'] and state['last'].isoformat()}|{state['count']}"
+    return quote_etag(hashlib.sha1(raw.encode("utf-8")).hexdigest())
+
+
+def _task_list_response(request, qs):
+    """
+    Keyset-paginated ``{"next", "previous", "results", "boards"}`` with
+    server-side filters and a conditional GET: the ETag is derived from
+    max(updated_at) and the count of the filtered scope, so a matching
+    If-None-Match is answered with 304 before any task is serialized.
+    ``?board_columns=embedded`` keeps columns inside each task instead of ``boards``.
+    """
+    query = TaskListQuerySerializer(data=request.query_params)
+    query.is_valid(raise_exception=True)
+    qs = _filter_tasks(qs, query.validated_data)
+
+    etag = _list_etag(request, qs)
+    if etag in parse_etags(request.headers.get("If-None-Match", "")):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        response["ETag"] = etag
+        return response
+
+    embedded = query.validated_data.get("board_columns") == "embedded"
+    if embedded:
+        qs = qs.prefetch_related(ordered_columns_prefetch())
+    paginator = TaskCursorPagination()
+    tasks = paginator.paginate_queryset(qs, request, view=None)
+    results = TaskSerializer(tasks, many=True, context={"request": request, "embed_board_columns": embedded}).data
+    response = paginator.get_paginated_response(results)
+    if not embedded:
+        response.data["boards"] = build_boards_map(task.board_id for task in tasks)
+    response["ETag"] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
 
 
 class TaskMyAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        reporter = request.user.manager if request.user.manager_id else request.user
-        auto_task = _ensure_weekly_plan_task_for_user(assignee=request.user, reporter=reporter)
-        if auto_task is not None:
-            TasksAuditService.log_task_created(request, auto_task)
         qs = Task.objects.filter(assignee=request.user).select_related("assignee", "reporter", "column", "board")
-        return Response(TaskSerializer(qs, many=True, context={"request": request}).data)
+        return _task_list_response(request, qs)
 
 
 class TaskTeamAPIView(APIView):
@@ -101,26 +121,72 @@ class TaskTeamAPIView(APIView):
             return Response({"detail": "Access denied."}, status=status.HTTP_403_FORBIDDEN)
 
         if TaskPolicy.is_admin_like(request.user):
-            team_users = User.objects.filter(
-                is_active=True,
-                role__name__in=[Role.Name.TEAMLEAD, Role.Name.EMPLOYEE, Role.Name.INTERN],
-            )
             qs = Task.objects.all()
             if TaskPolicy.is_department_admin(request.user):
                 if request.user.department_id:
-                    team_users = team_users.filter(department_id=request.user.department_id)
                     qs = qs.filter(assignee__department_id=request.user.department_id)
         else:
-            team_users = request.user.team_members.filter(is_active=True)
             qs = Task.objects.filter(assignee__manager=request.user)
 
-        for user in team_users:
-            auto_task = _ensure_weekly_plan_task_for_user(assignee=user, reporter=request.user)
-            if auto_task is not None:
-                TasksAuditService.log_task_created(request, auto_task)
-
         qs = qs.select_related("assignee", "reporter", "column", "board")
-        return Response(TaskSerializer(qs, many=True, context={"request": request}).data)
+        return _task_list_response(request, qs)
+
+
+class TaskSearchAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        query = TaskSearchQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        qs = TaskPolicy.visible_tasks(request.user, Task.objects.all()).select_related(
+            "assignee", "reporter", "column", "board"
+        )
+        hits = search_tasks(
+            qs,
+            query.validated_data["q"],
+            lang=query.validated_data.get("lang"),
+            limit=query.validated_data["limit"],
+        )
+        tasks = TaskSerializer(
+            [hit.task for hit in hits],
+            many=True,
+            context={"request": request, "embed_board_columns": False},
+        ).data
+        results = [
+            {**task, "search": {"score": round(hit.score, 6), "title": hit.title, "snippet": hit.snippet}}
+            for task, hit in zip(tasks, hits)
+        ]
+        return Response({"results": results, "boards": build_boards_map(hit.task.board_id for hit in hits)})
+
+
+class TaskWeeklyPlanRemindersAPIView(APIView):
+    """
+    Explicit trigger for the reminder job (normally run on a schedule via
+    ``manage.py generate_weekly_plan_reminders``).
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        if not TaskPolicy.is_admin_like(request.user):
+            return Response({"detail": "Access denied."}, status=status.HTTP_403_FORBIDDEN)
+
+        users = User.objects.filter(is_active=True, role__name__in=REMINDER_ROLES)
+        if TaskPolicy.is_department_admin(request.user):
+            if request.user.department_id:
+                users = users.filter(department_id=request.user.department_id)
+            else:
+                users = users.none()
+
+        result = generate_weekly_plan_reminders(users=users)
+        TasksAuditService.log_weekly_plan_reminders_generated(result, request=request)
+        return Response(
+            {
+                "week_start": result.week_start.isoformat(),
+                "created": result.created,
+                "boards_created": result.boards_created,
+            }
+        )
 
 
 class TaskCreateAPIView(APIView):
@@ -215,6 +281,37 @@ class TaskDetailAPIView(APIView):
         return Response(serializer.data)
 
 
+class TaskAttachmentListCreateAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk):
+        task = get_object_or_404(Task.objects.select_related("assignee"), pk=pk)
+        if not TaskPolicy.can_view_task(request.user, task):
+            return Response({"detail": "Access denied."}, status=status.HTTP_403_FORBIDDEN)
+        attachments = task.attachments.select_related("blob")
+        return Response(TaskAttachmentSerializer(attachments, many=True, context={"request": request}).data)
+
+    def post(self, request, pk):
+        task = get_object_or_404(Task.objects.select_related("assignee"), pk=pk)
+        if not TaskPolicy.can_edit_task(request.user, task):
+            return Response({"detail": "Access denied."}, status=status.HTTP_403_FORBIDDEN)
+        serializer = TaskAttachmentCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        blob, filename = resolve_blob(request.user, serializer.validated_data["blob_id"])
+        if blob is None:
+            return Response({"detail": "Upload not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        with transaction.atomic():
+            attachment = TaskAttachment(task=task, uploaded_by=request.user)
+            attach_blob(attachment, "file", blob, blob_field="blob", filename=filename, name_field="original_name")
+            attachment.save()
+        TasksAuditService.log_task_updated(request, task, ["attachments"])
+        return Response(
+            TaskAttachmentSerializer(attachment, context={"request": request}).data,
+            status=status.HTTP_201_CREATED,
+        )
+
+
 class TaskMoveAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -232,9 +329,21 @@ class TaskMoveAPIView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
+        neighbours = {}
+        for key, name in (("after_id", "after"), ("before_id", "before")):
+            neighbour_id = serializer.validated_data.get(key)
+            if neighbour_id is None:
+                continue
+            neighbour = Task.objects.filter(id=neighbour_id).only("id", "column_id", "rank").first()
+            if neighbour is None or neighbour.column_id != new_column.id or neighbour.id == task.id:
+                return Response(
+                    {"detail": "Neighbour task is not in the target column."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            neighbours[name] = neighbour
+
         old_column_id = task.column_id
-        task.column = new_column
-        task.save(update_fields=["column", "updated_at"])
+        move_task(task, new_column, **neighbours)
         TasksAuditService.log_task_moved(request, task, old_column_id, task.column_id)
         return Response(TaskSerializer(task, context={"request": request}).data)
 
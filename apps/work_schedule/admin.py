@@ -17,6 +17,7 @@ try:
 except Exception:
     ModelAdmin = admin.ModelAdmin
 
+from . import cache as schedule_cache
 from .models import (
     UserWorkSchedule,
     WeeklyWorkPlan,
@@ -129,11 +130,13 @@ class WorkScheduleAdmin(ModelAdmin):
     @admin.action(description="Активировать выбранные")
     def activate_selected(self, request, queryset):
         updated = queryset.update(is_active=True)
+        schedule_cache.invalidate_all()
         self.message_user(request, f"Активировано графиков: {updated}")
 
     @admin.action(description="Деактивировать выбранные")
     def deactivate_selected(self, request, queryset):
         updated = queryset.update(is_active=False)
+        schedule_cache.invalidate_all()
         self.message_user(request, f"Деактивировано графиков: {updated}", level=messages.WARNING)
 
     @admin.action(description="Сделать выбранный график базовым")
@@ -506,6 +509,7 @@ class UserWorkScheduleAdmin(ModelAdmin):
             self.message_user(request, "Недостаточно прав.", level=messages.ERROR)
             return
         updated = queryset.update(approved=True)
+        schedule_cache.invalidate_all()
         self.message_user(request, f"Подтверждено запросов: {updated}")
 
     @admin.action(description="Отклонить выбранные запросы")
@@ -514,6 +518,7 @@ class UserWorkScheduleAdmin(ModelAdmin):
             self.message_user(request, "Недостаточно прав.", level=messages.ERROR)
             return
         updated = queryset.update(approved=False)
+        schedule_cache.invalidate_all()
         self.message_user(request, f"Отклонено запросов: {updated}")
 
     def has_module_permission(self, request):
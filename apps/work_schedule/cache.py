@@ -0,0 +1,37 @@
+"""
+Cache keys for resolved work schedules.
+
+Per-user entries are dropped when that user's UserWorkSchedule changes.
+Any WorkSchedule change (or a bulk update that bypasses ``save``) bumps the
+global version (``apps.common.cache.VersionedCache``), which orphans every
+cached entry at once.
+"""
+
+from django.conf import settings
+
+from apps.common.cache import VersionedCache
+
+USE_DEFAULT = "default"
+NO_SCHEDULE = "none"
+
+versions = VersionedCache("work_schedule")
+cache = versions.cache
+current_version = versions.current_version
+invalidate_all = versions.invalidate_all
+
+
+def timeout() -> int:
+    return int(getattr(settings, "WORK_SCHEDULE_CACHE_TIMEOUT", 3600))
+
+
+def user_key(user_id, version=None) -> str:
+    return versions.key("user", user_id, version=version)
+
+
+def default_key(version=None) -> str:
+    return versions.key("default", version=version)
+
+
+def invalidate_user(user_id) -> None:
+    cache.delete(user_key(user_id))
+
@@ -0,0 +1,160 @@
+import json
+import random
+import statistics
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import RequestFactory
+from rest_framework.request import Request
+
+from apps.accounts.models import Role, User
+from apps.common.pagination import CreatedAtCursorPagination
+from apps.work_schedule.models import WeeklyWorkPlan, WeeklyWorkPlanChangeLog
+from apps.work_schedule.services import rebuild_weekly_plan_as_of
+from apps.work_schedule.views import _build_weekly_plan_changes
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _week_days(week_start, *, end_hour=13):
+    days = []
+    for offset in range(7):
+        day = week_start + timedelta(days=offset)
+        start_hour = 9 if offset < 5 else 11
+        days.append(
+            {
+                "date": day.isoformat(),
+                "start_time": f"{start_hour:02d}:00",
+                "end_time": f"{end_hour:02d}:00",
+                "mode": "office",
+                "comment": "",
+                "breaks": [],
+                "lunch_start": None,
+                "lunch_end": None,
+            }
+        )
+    return days
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark weekly plan change-log storage (legacy full-day vs compact diffs) "
+        "and history read latency. Runs inside a rolled-back transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--plans", type=int, default=200)
+        parser.add_argument("--edits", type=int, default=20, help="Edits per plan.")
+        parser.add_argument("--reads", type=int, default=200)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._run(options)
+                raise _Rollback()
+        except _Rollback:
+            pass
+
+    def _run(self, options):
+        rng = random.Random(options["seed"])
+        plans_count = options["plans"]
+        edits = options["edits"]
+        week_start = date(2030, 1, 7)  # Monday, far from real data
+
+        role, _ = Role.objects.get_or_create(name=Role.Name.EMPLOYEE, defaults={"level": Role.Level.EMPLOYEE})
+        users = User.objects.bulk_create(
+            [User(username=f"bench_wp_{idx}", role=role) for idx in range(plans_count)]
+        )
+        plans = WeeklyWorkPlan.objects.bulk_create(
+            [
+                WeeklyWorkPlan(user=user, week_start=week_start, days=_week_days(week_start), office_hours=24)
+                for user in users
+            ]
+        )
+
+        legacy_bytes = 0
+        compact_bytes = 0
+        logs = []
+        for plan in plans:
+            current = plan
+            for _ in range(edits):
+                days = [dict(item) for item in current.days]
+                days[rng.randrange(7)]["comment"] = f"edit {rng.randrange(10_000)}"
+                defaults = {
+                    "days": days,
+                    "office_hours": current.office_hours,
+                    "online_hours": current.online_hours,
+                    "online_reason": current.online_reason,
+                    "employee_comment": current.employee_comment,
+                }
+                changes = _build_weekly_plan_changes(current, defaults)
+                legacy = self._legacy_changes(current, defaults)
+                compact_bytes += len(json.dumps(changes))
+                legacy_bytes += len(json.dumps(legacy))
+                logs.append(
+                    WeeklyWorkPlanChangeLog(
+                        weekly_plan=plan,
+                        user_id=plan.user_id,
+                        changed_by_id=plan.user_id,
+                        week_start=week_start,
+                        changes=changes,
+                    )
+                )
+                current = WeeklyWorkPlan(user_id=plan.user_id, week_start=week_start, **defaults)
+            plan.days = current.days
+        WeeklyWorkPlan.objects.bulk_update(plans, ["days"], batch_size=500)
+        WeeklyWorkPlanChangeLog.objects.bulk_create(logs, batch_size=1000)
+
+        history_ms = []
+        factory = RequestFactory()
+        qs = WeeklyWorkPlanChangeLog.objects.filter(week_start=week_start).select_related("changed_by", "user")
+        for _ in range(options["reads"]):
+            started = time.perf_counter()
+            paginator = CreatedAtCursorPagination()
+            page = paginator.paginate_queryset(qs, Request(factory.get("/")))
+            len(page)
+            history_ms.append((time.perf_counter() - started) * 1000)
+
+        # Worst case: rebuild the original submission, reverting every edit.
+        rebuild_ms = []
+        for _ in range(options["reads"]):
+            plan = plans[rng.randrange(len(plans))]
+            started = time.perf_counter()
+            rebuild_weekly_plan_as_of(plan, plan.submitted_at)
+            rebuild_ms.append((time.perf_counter() - started) * 1000)
+
+        total_logs = len(logs)
+        ratio = (compact_bytes / legacy_bytes) if legacy_bytes else 0
+        self.stdout.write(f"logs={total_logs} plans={plans_count} edits_per_plan={edits}")
+        self.stdout.write(
+            f"storage: legacy={legacy_bytes} B ({legacy_bytes / max(total_logs, 1):.0f} B/log) "
+            f"compact={compact_bytes} B ({compact_bytes / max(total_logs, 1):.0f} B/log) ratio={ratio:.2f}"
+        )
+        for label, values in (("history_page", history_ms), ("rebuild_as_of", rebuild_ms)):
+            self.stdout.write(
+                f"{label}: mean={statistics.mean(values):.2f}ms "
+                f"p95={_percentile(values, 95):.2f}ms max={max(values):.2f}ms"
+            )
+        self.stdout.write(self.style.SUCCESS("benchmark finished, data rolled back"))
+
+    @staticmethod
+    def _legacy_changes(previous_plan, defaults):
+        before_days = {item["date"]: item for item in previous_plan.days}
+        return [
+            {"field": f"day:{item['date']}", "before": before_days.get(item["date"], {}), "after": item}
+            for item in defaults["days"]
+            if before_days.get(item["date"]) != item
+        ]
@@ -7,6 +7,8 @@ from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.db import models
 
+from . import cache as schedule_cache
+
 
 class WorkSchedule(models.Model):
     name = models.CharField(max_length=100)
@@ -47,6 +49,12 @@ class WorkSchedule(models.Model):
     def save(self, *args, **kwargs):
         self.full_clean()
         super().save(*args, **kwargs)
+        schedule_cache.invalidate_all()
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        schedule_cache.invalidate_all()
+        return result
 
     def __str__(self):
         return self.name
@@ -97,6 +105,16 @@ class UserWorkSchedule(models.Model):
             models.Index(fields=["approved"]),
         ]
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        schedule_cache.invalidate_user(self.user_id)
+
+    def delete(self, *args, **kwargs):
+        user_id = self.user_id
+        result = super().delete(*args, **kwargs)
+        schedule_cache.invalidate_user(user_id)
+        return result
+
     def __str__(self):
         return f"{self.user} - {self.schedule}"
 
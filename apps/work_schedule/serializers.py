@@ -373,3 +373,15 @@ class WeeklyWorkPlanChangeLogSerializer(serializers.ModelSerializer):
             "changed_by_username",
             "created_at",
         )
+
+
+class WeeklyWorkPlanChangeLogQuerySerializer(serializers.Serializer):
+    user_id = serializers.IntegerField(min_value=1, required=False)
+    department_id = serializers.IntegerField(min_value=1, required=False)
+    plan_id = serializers.IntegerField(min_value=1, required=False)
+    week_start = serializers.DateField(required=False)
+
+    def validate_week_start(self, value):
+        if value.weekday() != 0:
+            raise serializers.ValidationError("week_start must be a Monday.")
+        return value
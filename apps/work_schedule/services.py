@@ -4,6 +4,7 @@ from datetime import time as dt_time
 from datetime import timedelta
 
 from django.db import transaction
+from django.db.models import Q, QuerySet
 from django.utils import timezone
 
 from apps.accounts.access_policy import AccessPolicy
@@ -11,6 +12,8 @@ from apps.accounts.models import User
 from apps.common.models import Notification
 from apps.common.notification_codes import NotificationCode, NotificationEntity
 
+from . import cache as schedule_cache
+from .cache import cache
 from .models import (
     ProductionCalendar,
     UserWorkSchedule,
@@ -20,22 +23,87 @@ from .models import (
 )
 
 
+def _default_work_schedule():
+    key = schedule_cache.default_key()
+    cached = cache.get(key)
+    if cached is not None:
+        return None if cached == schedule_cache.NO_SCHEDULE else cached
+
+    schedule = WorkSchedule.objects.filter(
+        is_default=True,
+        is_active=True
+    ).first()
+    cache.set(key, schedule or schedule_cache.NO_SCHEDULE, schedule_cache.timeout())
+    return schedule
+
+
 def get_user_work_schedule(user):
     """
     Возвращает утверждённый график пользователя
-    или базовый график компании
+    или базовый график компании.
+    Результат кэшируется по пользователю (см. apps.work_schedule.cache).
     """
-    try:
-        uws = user.work_schedule
-        if uws.approved:
-            return uws.schedule
-    except UserWorkSchedule.DoesNotExist:
-        pass
-
-    return WorkSchedule.objects.filter(
-        is_default=True,
-        is_active=True
-    ).first()
+    key = schedule_cache.user_key(user.pk)
+    cached = cache.get(key)
+    if cached is None:
+        assignment = (
+            UserWorkSchedule.objects.filter(user_id=user.pk, approved=True)
+            .select_related("schedule")
+            .first()
+        )
+        cached = assignment.schedule if assignment else schedule_cache.USE_DEFAULT
+        cache.set(key, cached, schedule_cache.timeout())
+
+    if cached == schedule_cache.USE_DEFAULT:
+        return _default_work_schedule()
+    return cached
+
+
+def get_users_work_schedules(users):
+    """
+    Batch variant of get_user_work_schedule for reports and payroll.
+
+    ``users`` may be a User queryset or an iterable of users/ids. Always costs
+    two queries regardless of headcount: users LEFT JOIN their assignment, then
+    every referenced schedule plus the company default.
+    Returns {user_id: WorkSchedule | None} and warms the per-user cache.
+    """
+    if not isinstance(users, QuerySet):
+        users = User.objects.filter(id__in=[getattr(item, "pk", item) for item in users])
+
+    assignments = {
+        user_id: schedule_id if approved else None
+        for user_id, schedule_id, approved in users.order_by().values_list(
+            "id",
+            "work_schedule__schedule_id",
+            "work_schedule__approved",
+        )
+    }
+    schedules = {
+        item.id: item
+        for item in WorkSchedule.objects.filter(
+            Q(id__in={schedule_id for schedule_id in assignments.values() if schedule_id})
+            | Q(is_default=True, is_active=True)
+        )
+    }
+    default_schedule = next(
+        (schedules[pk] for pk in sorted(schedules) if schedules[pk].is_default and schedules[pk].is_active),
+        None,
+    )
+
+    version = schedule_cache.current_version()
+    entries = {
+        schedule_cache.user_key(user_id, version): (
+            schedules[schedule_id] if schedule_id else schedule_cache.USE_DEFAULT
+        )
+        for user_id, schedule_id in assignments.items()
+    }
+    entries[schedule_cache.default_key(version)] = default_schedule or schedule_cache.NO_SCHEDULE
+    cache.set_many(entries, schedule_cache.timeout())
+    return {
+        user_id: schedules[schedule_id] if schedule_id else default_schedule
+        for user_id, schedule_id in assignments.items()
+    }
 
 
 def get_month_calendar(user, year: int, month: int):
@@ -45,6 +113,13 @@ def get_month_calendar(user, year: int, month: int):
 
     cal = calendar.Calendar()
     month_days = cal.itermonthdates(year, month)
+    production_days = {
+        item.date: item
+        for item in ProductionCalendar.objects.filter(
+            date__gte=date(year, month, 1),
+            date__lte=date(year, month, calendar.monthrange(year, month)[1]),
+        )
+    }
 
     result = []
 
@@ -54,7 +129,7 @@ def get_month_calendar(user, year: int, month: int):
 
         weekday = day.weekday()
 
-        prod_day = ProductionCalendar.objects.filter(date=day).first()
+        prod_day = production_days.get(day)
 
         is_holiday = False
         is_working_day = False
@@ -211,6 +286,58 @@ def _build_schedule_from_weekly_plan(plan):
     )
 
 
+WEEKLY_PLAN_HISTORY_FIELDS = ("days", "office_hours", "online_hours", "online_reason", "employee_comment")
+
+
+def _revert_day(day, change):
+    """Undo a single ``day:<date>`` change entry on a copy of the day dict."""
+    restored = dict(day or {})
+    before = change.get("before") or {}
+    after = change.get("after") or {}
+    for key in after:
+        if key not in before:
+            restored.pop(key, None)
+    restored.update(before)
+    return restored
+
+
+def rebuild_weekly_plan_as_of(plan, at):
+    """
+    Rebuild the employee-editable part of a weekly plan as it was at ``at``.
+
+    Change logs are stored as forward diffs, so the current plan is taken as
+    the starting point and every log written after ``at`` is reverted,
+    newest first. Returns ``None`` when the plan did not exist yet.
+    Works for both compact (changed keys only) and legacy full-day diffs.
+    """
+    if plan.submitted_at and at < plan.submitted_at:
+        return None
+
+    state = {field: getattr(plan, field) for field in WEEKLY_PLAN_HISTORY_FIELDS}
+    days = {
+        str(item.get("date")): dict(item)
+        for item in (plan.days or [])
+        if isinstance(item, dict) and item.get("date")
+    }
+
+    logs = plan.change_logs.filter(created_at__gt=at).order_by("-created_at", "-id").only("changes")
+    for log in logs.iterator():
+        for change in log.changes or []:
+            field = change.get("field") or ""
+            if field.startswith("day:"):
+                day_key = field[len("day:"):]
+                restored = _revert_day(days.get(day_key), change)
+                if restored:
+                    days[day_key] = restored
+                else:
+                    days.pop(day_key, None)
+            elif field in state:
+                state[field] = change.get("before")
+
+    state["days"] = [days[key] for key in sorted(days)]
+    return state
+
+
 def notify_admins_about_weekly_plan_deadline_miss(*, now=None):
     """
     Monday 12:00 control:
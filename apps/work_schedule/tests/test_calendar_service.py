@@ -5,7 +5,7 @@ from django.contrib.auth import get_user_model
 
 from apps.accounts.models import Role
 from apps.work_schedule.models import ProductionCalendar, UserWorkSchedule, WorkSchedule
-from apps.work_schedule.services import get_month_calendar
+from apps.work_schedule.services import get_month_calendar, get_user_work_schedule, get_users_work_schedules
 
 
 User = get_user_model()
@@ -134,3 +134,66 @@ def test_unapproved_schedule_falls_back_to_default():
     monday = next(d for d in calendar if d["weekday"] == 0)
 
     assert monday["work_time"]["start"].strftime("%H:%M") == "09:00"
+
+
+@pytest.mark.django_db
+def test_user_schedule_is_cached_and_invalidated_on_assignment_change(django_assert_num_queries):
+    user = create_test_user("cached_schedule_user")
+    default = WorkSchedule.objects.create(
+        name="Default",
+        work_days=[0, 1, 2, 3, 4],
+        start_time="09:00",
+        end_time="18:00",
+        is_default=True,
+        is_active=True,
+    )
+    custom = WorkSchedule.objects.create(
+        name="Custom",
+        work_days=[0],
+        start_time="10:00",
+        end_time="17:00",
+        is_active=True,
+    )
+
+    assert get_user_work_schedule(user) == default
+    with django_assert_num_queries(0):
+        assert get_user_work_schedule(user) == default
+
+    UserWorkSchedule.objects.create(user=user, schedule=custom, approved=True)
+    assert get_user_work_schedule(user) == custom
+
+    custom.start_time = "11:00"
+    custom.save()
+    assert get_user_work_schedule(user).start_time.strftime("%H:%M") == "11:00"
+
+
+@pytest.mark.django_db
+def test_batch_schedule_resolution_uses_two_queries(django_assert_num_queries):
+    default = WorkSchedule.objects.create(
+        name="Default",
+        work_days=[0, 1, 2, 3, 4],
+        start_time="09:00",
+        end_time="18:00",
+        is_default=True,
+        is_active=True,
+    )
+    custom = WorkSchedule.objects.create(
+        name="Custom",
+        work_days=[0],
+        start_time="10:00",
+        end_time="17:00",
+        is_active=True,
+    )
+    users = [create_test_user(f"batch_schedule_{idx}") for idx in range(20)]
+    UserWorkSchedule.objects.create(user=users[0], schedule=custom, approved=True)
+    UserWorkSchedule.objects.create(user=users[1], schedule=custom, approved=False)
+
+    with django_assert_num_queries(2):
+        resolved = get_users_work_schedules(User.objects.filter(username__startswith="batch_schedule_"))
+
+    assert len(resolved) == 20
+    assert resolved[users[0].id] == custom
+    assert resolved[users[1].id] == default
+    assert resolved[users[5].id] == default
+    with django_assert_num_queries(0):
+        assert get_user_work_schedule(users[0]) == custom
@@ -278,7 +278,8 @@ class WeeklyWorkPlanApiTests(TestCase):
         self.client.force_authenticate(self.admin)
         response = self.client.get(f"/api/v1/work-schedules/admin/weekly-plans/{plan.id}/changes/")
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertIsNone(response.data["next"])
 
     def test_employee_can_view_own_weekly_plan_changes(self):
         plan = WeeklyWorkPlan.objects.create(
@@ -299,4 +300,105 @@ class WeeklyWorkPlanApiTests(TestCase):
         self.client.force_authenticate(self.employee)
         response = self.client.get("/api/v1/work-schedules/weekly-plans/my/changes/")
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data["results"]), 1)
+        response = self.client.get("/api/v1/work-schedules/weekly-plans/my/changes/", {"plan_id": plan.id + 1})
+        self.assertEqual(response.data["results"], [])
+        response = self.client.get("/api/v1/work-schedules/weekly-plans/my/changes/", {"plan_id": "x"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_resubmit_stores_only_changed_day_keys(self):
+        self.client.force_authenticate(self.employee)
+        self.client.post(
+            "/api/v1/work-schedules/weekly-plans/my/",
+            {"week_start": str(self.week_start), "days": self._shifts_payload()},
+            format="json",
+        )
+        changed = self._shifts_payload()
+        changed[0]["end_time"] = "14:00"
+        self.client.post(
+            "/api/v1/work-schedules/weekly-plans/my/",
+            {"week_start": str(self.week_start), "days": changed},
+            format="json",
+        )
+        log = WeeklyWorkPlanChangeLog.objects.get(user=self.employee, week_start=self.week_start)
+        day_change = next(item for item in log.changes if item["field"] == "day:2026-03-02")
+        self.assertEqual(day_change["before"], {"end_time": "13:00"})
+        self.assertEqual(day_change["after"], {"end_time": "14:00"})
+
+    def test_plan_can_be_rebuilt_as_of_previous_version(self):
+        self.client.force_authenticate(self.employee)
+        self.client.post(
+            "/api/v1/work-schedules/weekly-plans/my/",
+            {"week_start": str(self.week_start), "days": self._shifts_payload()},
+            format="json",
+        )
+        plan = WeeklyWorkPlan.objects.get(user=self.employee, week_start=self.week_start)
+        first_version_at = timezone.now()
+        changed = self._shifts_payload()
+        changed[0]["end_time"] = "14:00"
+        changed[1]["comment"] = "Doctor"
+        self.client.post(
+            "/api/v1/work-schedules/weekly-plans/my/",
+            {"week_start": str(self.week_start), "days": changed},
+            format="json",
+        )
+
+        self.client.force_authenticate(self.admin)
+        old = self.client.get(
+            f"/api/v1/work-schedules/weekly-plans/{plan.id}/as-of/",
+            {"at": first_version_at.isoformat()},
+        )
+        self.assertEqual(old.status_code, 200)
+        self.assertEqual(old.data["days"][0]["end_time"], "13:00")
+        self.assertEqual(old.data["days"][1]["comment"], "")
+        self.assertEqual(old.data["office_hours"], 24)
+
+        current = self.client.get(f"/api/v1/work-schedules/weekly-plans/{plan.id}/as-of/")
+        self.assertEqual(current.data["days"][0]["end_time"], "14:00")
+        self.assertEqual(current.data["office_hours"], 25)
+
+    def test_change_history_is_cursor_paginated_and_filtered(self):
+        other = User.objects.create_user(
+            username="weekly_employee_other",
+            password="StrongPass123!",
+            role=self.employee_role,
+        )
+        for owner in (self.employee, other):
+            plan = WeeklyWorkPlan.objects.create(
+                user=owner,
+                week_start=self.week_start,
+                days=self._shifts_payload(),
+                office_hours=24,
+                online_hours=0,
+                online_reason="",
+            )
+            for idx in range(3):
+                WeeklyWorkPlanChangeLog.objects.create(
+                    weekly_plan=plan,
+                    user=owner,
+                    changed_by=owner,
+                    week_start=self.week_start,
+                    changes=[{"field": "employee_comment", "before": "", "after": f"v{idx}"}],
+                )
+
+        self.client.force_authenticate(self.admin)
+        first = self.client.get(
+            "/api/v1/work-schedules/admin/weekly-plans/changes/",
+            {"user_id": self.employee.id, "page_size": 2},
+        )
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(len(first.data["results"]), 2)
+        self.assertTrue(all(item["user"] == self.employee.id for item in first.data["results"]))
+        self.assertIsNotNone(first.data["next"])
+
+        second = self.client.get(first.data["next"])
+        self.assertEqual(len(second.data["results"]), 1)
+        self.assertIsNone(second.data["next"])
+
+        for params in ({"user_id": "abc"}, {"department_id": "1;"}, {"week_start": "2026-03-03"}):
+            response = self.client.get("/api/v1/work-schedules/admin/weekly-plans/changes/", params)
+            self.assertEqual(response.status_code, 400, params)
+
+        self.client.force_authenticate(self.employee)
+        denied = self.client.get("/api/v1/work-schedules/admin/weekly-plans/changes/")
+        self.assertEqual(denied.status_code, 403)
@@ -17,6 +17,8 @@ from .views import (
     WeeklyWorkPlanAdminDecisionAPIView,
     WeeklyWorkPlanAdminChangesAPIView,
     WeeklyWorkPlanAdminListAPIView,
+    WeeklyWorkPlanAsOfAPIView,
+    WeeklyWorkPlanChangeHistoryAPIView,
     WeeklyWorkPlanMyChangesAPIView,
     WeeklyWorkPlanMyAPIView,
 )
@@ -32,6 +34,8 @@ urlpatterns = [
     path("v1/work-schedules/admin/weekly-plans/", WeeklyWorkPlanAdminListAPIView.as_view()),
     path("v1/work-schedules/admin/weekly-plans/<int:plan_id>/decision/", WeeklyWorkPlanAdminDecisionAPIView.as_view()),
     path("v1/work-schedules/admin/weekly-plans/<int:plan_id>/changes/", WeeklyWorkPlanAdminChangesAPIView.as_view()),
+    path("v1/work-schedules/admin/weekly-plans/changes/", WeeklyWorkPlanChangeHistoryAPIView.as_view()),
+    path("v1/work-schedules/weekly-plans/<int:plan_id>/as-of/", WeeklyWorkPlanAsOfAPIView.as_view()),
     path("v1/work-schedules/admin/templates/", WorkScheduleAdminListCreateAPIView.as_view()),
     path("v1/work-schedules/admin/templates/<int:schedule_id>/", WorkScheduleAdminDetailAPIView.as_view()),
     path("v1/work-schedules/admin/templates/<int:schedule_id>/users/", WorkScheduleTemplateUsersAPIView.as_view()),
@@ -1,8 +1,10 @@
-from datetime import date
+from datetime import date, datetime
+from datetime import time as dt_time
 from datetime import timedelta
 
 from django.db.models import Count
 from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from rest_framework import status
 from rest_framework.exceptions import PermissionDenied
 from rest_framework.permissions import IsAuthenticated
@@ -12,6 +14,7 @@ from rest_framework.views import APIView
 from apps.accounts.access_policy import AccessPolicy
 from apps.accounts.models import User
 from apps.common.i18n import request_language, status_label
+from apps.common.pagination import CreatedAtCursorPagination
 from .audit import WorkScheduleAuditService
 from .models import (
     ProductionCalendar,
@@ -24,6 +27,7 @@ from .policies import WorkSchedulePolicy
 from .serializers import (
     CalendarDaySerializer,
     ScheduleRequestDecisionSerializer,
+    WeeklyWorkPlanChangeLogQuerySerializer,
     WeeklyWorkPlanChangeLogSerializer,
     WeeklyWorkPlanDecisionSerializer,
     WeeklyWorkPlanSerializer,
@@ -38,6 +42,7 @@ from .services import (
     generate_production_calendar_month,
     get_month_calendar,
     notify_admins_about_weekly_plan_deadline_miss,
+    rebuild_weekly_plan_as_of,
 )
 
 
@@ -54,12 +59,38 @@ def _week_start_from_dt(dt_value):
     return local_date - timedelta(days=local_date.weekday())
 
 
+def _parse_as_of(value):
+    """Accept ISO datetime or date (end of that day); naive values use the current timezone."""
+    if not value:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            return None
+        parsed = datetime.combine(day, dt_time.max)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
 def _day_diff(previous_day, current_day):
+    """
+    Field-level diff of one day: only keys whose value changed are stored.
+    A key missing on one side means it was added/removed by the edit.
+    """
     before = previous_day or {}
     after = current_day or {}
     if before == after:
         return None
-    return {"before": before, "after": after}
+    changed_keys = sorted(
+        key for key in set(before) | set(after)
+        if key not in before or key not in after or before[key] != after[key]
+    )
+    return {
+        "before": {key: before[key] for key in changed_keys if key in before},
+        "after": {key: after[key] for key in changed_keys if key in after},
+    }
 
 
 def _build_weekly_plan_changes(previous_plan, defaults):
@@ -546,6 +577,7 @@ class WeeklyWorkPlanAdminListAPIView(APIView):
 
 class WeeklyWorkPlanAdminChangesAPIView(APIView):
     permission_classes = [IsAuthenticated]
+    pagination_class = CreatedAtCursorPagination
 
     def get(self, request, plan_id: int):
         if not WorkSchedulePolicy.can_view_weekly_plan_requests(request.user):
@@ -557,33 +589,101 @@ class WeeklyWorkPlanAdminChangesAPIView(APIView):
         scope_department_id = _department_scope_id(request.user)
         if scope_department_id and plan.user.department_id != scope_department_id:
             raise PermissionDenied("Insufficient permissions for this department.")
-        logs = (
-            WeeklyWorkPlanChangeLog.objects.filter(weekly_plan=plan)
-            .select_related("changed_by", "user")
-            .order_by("-created_at")
-        )
-        return Response(WeeklyWorkPlanChangeLogSerializer(logs, many=True).data)
+        logs = WeeklyWorkPlanChangeLog.objects.filter(weekly_plan=plan).select_related("changed_by", "user")
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(logs, request, view=self)
+        return paginator.get_paginated_response(WeeklyWorkPlanChangeLogSerializer(page, many=True).data)
 
 
 class WeeklyWorkPlanMyChangesAPIView(APIView):
+    """Own change feed with keyset pagination. Filters: plan_id, week_start."""
+
     permission_classes = [IsAuthenticated]
+    pagination_class = CreatedAtCursorPagination
 
     def get(self, request):
         if not WorkSchedulePolicy.can_submit_weekly_plan(request.user):
             raise PermissionDenied("Insufficient permissions.")
 
-        qs = (
-            WeeklyWorkPlanChangeLog.objects.filter(user=request.user)
-            .select_related("changed_by", "weekly_plan")
-            .order_by("-created_at")
+        query = WeeklyWorkPlanChangeLogQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        filters = query.validated_data
+        qs = WeeklyWorkPlanChangeLog.objects.filter(user=request.user).select_related("changed_by")
+        if "plan_id" in filters:
+            qs = qs.filter(weekly_plan_id=filters["plan_id"])
+        if "week_start" in filters:
+            qs = qs.filter(week_start=filters["week_start"])
+
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(qs, request, view=self)
+        return paginator.get_paginated_response(WeeklyWorkPlanChangeLogSerializer(page, many=True).data)
+
+
+class WeeklyWorkPlanChangeHistoryAPIView(APIView):
+    """
+    Company-wide change feed with keyset pagination.
+    Filters: user_id, week_start, department_id (department admins are always
+    limited to their own department).
+    """
+
+    permission_classes = [IsAuthenticated]
+    pagination_class = CreatedAtCursorPagination
+
+    def get(self, request):
+        if not WorkSchedulePolicy.can_view_weekly_plan_requests(request.user):
+            raise PermissionDenied("Insufficient permissions.")
+
+        query = WeeklyWorkPlanChangeLogQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        filters = query.validated_data
+
+        qs = WeeklyWorkPlanChangeLog.objects.select_related("changed_by", "user")
+        scope_department_id = _department_scope_id(request.user)
+        if scope_department_id:
+            qs = qs.filter(user__department_id=scope_department_id)
+        elif "department_id" in filters:
+            qs = qs.filter(user__department_id=filters["department_id"])
+        if "user_id" in filters:
+            qs = qs.filter(user_id=filters["user_id"])
+        if "week_start" in filters:
+            qs = qs.filter(week_start=filters["week_start"])
+
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(qs, request, view=self)
+        return paginator.get_paginated_response(WeeklyWorkPlanChangeLogSerializer(page, many=True).data)
+
+
+class WeeklyWorkPlanAsOfAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, plan_id: int):
+        plan = WeeklyWorkPlan.objects.select_related("user").filter(id=plan_id).first()
+        if not plan:
+            return Response({"detail": "Plan not found."}, status=status.HTTP_404_NOT_FOUND)
+        if plan.user_id != request.user.id:
+            if not WorkSchedulePolicy.can_view_weekly_plan_requests(request.user):
+                raise PermissionDenied("Insufficient permissions.")
+            scope_department_id = _department_scope_id(request.user)
+            if scope_department_id and plan.user.department_id != scope_department_id:
+                raise PermissionDenied("Insufficient permissions for this department.")
+
+        raw_at = request.query_params.get("at")
+        at = _parse_as_of(raw_at) if raw_at else timezone.now()
+        if at is None:
+            return Response({"detail": "at must be an ISO date or datetime."}, status=status.HTTP_400_BAD_REQUEST)
+
+        state = rebuild_weekly_plan_as_of(plan, at)
+        if state is None:
+            return Response({"detail": "Plan did not exist at this time."}, status=status.HTTP_404_NOT_FOUND)
+        return Response(
+            {
+                "id": plan.id,
+                "user": plan.user_id,
+                "week_start": plan.week_start,
+                "as_of": at,
+                **state,
+            }
         )
-        plan_id = request.query_params.get("plan_id")
-        week_start = request.query_params.get("week_start")
-        if plan_id:
-            qs = qs.filter(weekly_plan_id=plan_id)
-        if week_start:
-            qs = qs.filter(week_start=week_start)
-        return Response(WeeklyWorkPlanChangeLogSerializer(qs, many=True).data)
 
 
 class WeeklyWorkPlanAdminDecisionAPIView(APIView):
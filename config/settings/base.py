@@ -87,6 +87,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
 
     # Third-party
     "corsheaders",
@@ -172,6 +173,21 @@ else:
         }
     }
 
+# ======================
+# CACHES
+# ======================
+# "shared" holds cached data whose invalidation must reach every worker
+# (KB lists and articles, resolved work schedules); per-process LocMem would
+# keep serving stale entries from workers that did not see the change. The
+# database backend needs no extra service; its table is created by a migration.
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "shared": {
+        "BACKEND": os.environ.get("SHARED_CACHE_BACKEND", "django.core.cache.backends.db.DatabaseCache"),
+        "LOCATION": os.environ.get("SHARED_CACHE_LOCATION", "django_shared_cache"),
+    },
+}
+
 # ======================
 # AUTH
 # ======================
@@ -458,6 +474,40 @@ OFFICE_IP_NETWORKS = [
     if value.strip()
 ]
 
+# Resolved per-user work schedule cache TTL (seconds).
+# Entries are also invalidated on UserWorkSchedule/WorkSchedule changes.
+WORK_SCHEDULE_CACHE_TIMEOUT = int(os.environ.get("WORK_SCHEDULE_CACHE_TIMEOUT", "3600"))
+# norm (fixed 160h), attendance (AttendanceMark.actual_hours) or calendar (working days x 8h).
+PAYROLL_HOURS_SOURCE = os.environ.get("PAYROLL_HOURS_SOURCE", "norm")
+# thread (started after the request commits), inline, or worker (`manage.py process_payroll_runs`).
+PAYROLL_RUN_EXECUTOR = os.environ.get("PAYROLL_RUN_EXECUTOR", "thread")
+PAYROLL_RUN_CHUNK_SIZE = int(os.environ.get("PAYROLL_RUN_CHUNK_SIZE", "1000"))
+PAYROLL_RUN_STALE_SECONDS = int(os.environ.get("PAYROLL_RUN_STALE_SECONDS", "300"))
+# Size of the process pool each web worker shares for rendering payslips in the
+# ZIP export; 0 renders in the request worker.
+PAYROLL_EXPORT_WORKERS = int(os.environ.get("PAYROLL_EXPORT_WORKERS", "0"))
+# Task ranks longer than this trigger a column rebalance: thread, inline,
+# or worker (`manage.py rebalance_task_ranks`).
+TASKS_RANK_MAX_LENGTH = int(os.environ.get("TASKS_RANK_MAX_LENGTH", "16"))
+TASKS_RANK_REBALANCE_EXECUTOR = os.environ.get("TASKS_RANK_REBALANCE_EXECUTOR", "thread")
+# Chunked uploads (/api/v1/common/uploads/): temp files live in UPLOAD_TEMP_DIR
+# (default MEDIA_ROOT/uploads/tmp) until completed; see `manage.py purge_uploads`.
+UPLOAD_MAX_SIZE = int(os.environ.get("UPLOAD_MAX_SIZE", str(20 * 1024 * 1024)))
+UPLOAD_CHUNK_SIZE = int(os.environ.get("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+UPLOAD_TEMP_DIR = os.environ.get("UPLOAD_TEMP_DIR", "")
+UPLOAD_SESSION_TTL_HOURS = int(os.environ.get("UPLOAD_SESSION_TTL_HOURS", "24"))
+UPLOAD_BLOB_GRACE_HOURS = int(os.environ.get("UPLOAD_BLOB_GRACE_HOURS", "24"))
+# KB article views are buffered per process and written in batches; the report
+# reads daily rollups (`manage.py rollup_kb_views`), raw logs are kept this long.
+KB_VIEW_BUFFER_SIZE = int(os.environ.get("KB_VIEW_BUFFER_SIZE", "100"))
+KB_VIEW_FLUSH_SECONDS = int(os.environ.get("KB_VIEW_FLUSH_SECONDS", "10"))
+KB_VIEW_LOG_RETENTION_DAYS = int(os.environ.get("KB_VIEW_LOG_RETENTION_DAYS", "90"))
+# Cached KB article lists, bodies and the category tree (apps/kb/cache.py, "shared" cache).
+KB_CACHE_TIMEOUT = int(os.environ.get("KB_CACHE_TIMEOUT", "300"))
+# BPM step deadlines (`due_at`) skip non-working days of the work calendar when enabled;
+# breaches are detected by `manage.py detect_bpm_sla_breaches`.
+BPM_SLA_WORKING_CALENDAR = _env_bool("BPM_SLA_WORKING_CALENDAR", False)
+
 SPECTACULAR_SETTINGS = {
     "TITLE": "Onboarding API",
     "DESCRIPTION": "API for onboarding platform",
@@ -16,6 +16,15 @@ PASSWORD_HASHERS = [
     "django.contrib.auth.hashers.MD5PasswordHasher",
 ]
 
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "shared": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "shared"},
+}
+
+PAYROLL_RUN_EXECUTOR = "inline"
+TASKS_RANK_REBALANCE_EXECUTOR = "inline"
+KB_VIEW_BUFFER_SIZE = 1
+
 EMAIL_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
 
 CSRF_COOKIE_SECURE = False